@@ -1,18 +1,13 @@
 # Flask app initialization
-from flask import Flask
+import os
+import time
+from flask import Flask, g, request
+from core.config import Config
+from .json_provider import FastJSONProvider
 from .routes import bp
+from metrics.store import metrics_store
 import logging
-import sys
-
-# Настройка логирования
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('app.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,12 +15,71 @@ def create_app():
     """Создает и настраивает Flask приложение"""
     try:
         app = Flask(__name__)
+        app.json = FastJSONProvider(app)
 
         # Регистрируем blueprint
         app.register_blueprint(bp)
 
+        # Время ответа по эндпоинтам - в хранилище метрик. Это единственная запись из веб-процесса:
+        # отдельная БД metrics.db, а не vacancies.db, и пачками из фонового потока, а не в запросе
+        metrics_store.start_flusher()
+
+        @app.before_request
+        def start_timer():
+            g.started_at = time.perf_counter()
+
+        @app.after_request
+        def record_response_time(response):
+            started_at = g.pop('started_at', None)
+            if started_at is not None and request.endpoint:
+                metrics_store.record('ui.response_time', (time.perf_counter() - started_at) * 1000,
+                                     request.endpoint)
+            return response
+
+        # Профилирование отдельных запросов по заголовку администратора; без токена хуки не ставятся
+        if Config.PROFILE_TOKEN:
+            install_request_profiling(app)
+
         logger.info("Flask приложение успешно создано")
         return app
     except Exception as e:
         logger.error(f"Ошибка при создании Flask приложения: {e}")
-        raise
\ No newline at end of file
+        raise
+
+
+def install_request_profiling(app):
+    """
+    Запрос с заголовком X-Profile: <PROFILE_TOKEN> профилируется (режим - X-Profile-Mode: cprofile
+    или sample), файл профиля с именем эндпоинта возвращается в заголовке X-Profile-File.
+    """
+    import hmac
+    import threading
+    from core.profiling import MODES, create_session, finish_session
+
+    @app.before_request
+    def start_profile():
+        token = request.headers.get('X-Profile')
+        if not token or not hmac.compare_digest(token.encode(), Config.PROFILE_TOKEN.encode()):
+            return
+        mode = request.headers.get('X-Profile-Mode', 'cprofile')
+        if mode not in MODES:
+            return
+        session = create_session(mode, {threading.get_ident()})
+        session.start()
+        g.profile = (session, session.enter(request.endpoint or 'unknown'))
+
+    @app.after_request
+    def write_profile(response):
+        profile = g.pop('profile', None)
+        if profile is not None:
+            paths = finish_session(*profile, 'request')
+            if paths:
+                response.headers['X-Profile-File'] = ', '.join(os.path.basename(path) for path in paths)
+        return response
+
+    @app.teardown_request
+    def drop_profile(exc):
+        # Запрос упал до after_request: профиль все равно пишется
+        profile = g.pop('profile', None)
+        if profile is not None:
+            finish_session(*profile, 'request')
@@ -0,0 +1,23 @@
+from typing import Any, Union
+
+from flask.json.provider import JSONProvider
+
+from core import jsonutil
+
+
+class FastJSONProvider(JSONProvider):
+    """
+    JSON-провайдер Flask на core.jsonutil (orjson, если установлен): jsonify отдает
+    уже закодированные байты без промежуточной строки, datetime - в ISO 8601.
+    """
+    mimetype = "application/json"
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return jsonutil.dumps(obj)
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        return jsonutil.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(jsonutil.dumps_bytes(obj), mimetype=self.mimetype)
@@ -1,21 +1,66 @@
 from flask import Blueprint, render_template, request, jsonify
 from core.database import (
-    get_vacancies,
     get_vacancy_by_id,
-    search_vacancies,
     get_vacancies_by_source,
     get_total_vacancies_count,
     get_unique_sources,
     get_unique_cities,
     remove_duplicates,
-    get_filtered_vacancies
+    get_filtered_vacancies,
+    get_descriptions,
+    get_location_directory,
+    get_unique_tags,
+    get_company_counts,
+    get_rollup_summary,
+    get_daily_stats
 )
+from core.generation import generation_cached
+from core.suggest import suggest_service, SUGGEST_KINDS
+from core.timeutils import parse_time_filter
 import logging
 import traceback
 
 logger = logging.getLogger(__name__)
 bp = Blueprint("main", __name__)
 
+# Статистика и списки для фильтров меняются только после записи воркером
+# (города уже берутся из справочника в памяти)
+get_total_vacancies_count = generation_cached(get_total_vacancies_count)
+get_unique_sources = generation_cached(get_unique_sources)
+get_unique_tags = generation_cached(get_unique_tags)
+get_company_counts = generation_cached(get_company_counts)
+get_rollup_summary = generation_cached(get_rollup_summary)
+get_daily_stats = generation_cached(get_daily_stats)
+
+
+def get_include_archived_arg() -> bool:
+    """Флаг include_archived: искать также в архиве старых вакансий"""
+    return request.args.get('include_archived', '').lower() in ('1', 'true', 'on', 'yes')
+
+
+def get_tag_arg() -> str:
+    """Фильтр tag: вариант написания (postgres, k8s) приводится к тегу словаря навыков"""
+    tag = request.args.get('tag', '').strip()
+    if not tag:
+        return ''
+    # Словарь навыков загружается только при фильтре по тегу
+    from services.skill_tagger import canonical_tag
+    return canonical_tag(tag)
+
+
+def get_time_range_args():
+    """
+    Читает фильтры since/until из запроса ('24h', '7d', таймстамп или ISO-дата).
+    Границы округляются до минуты, чтобы кэш счетчиков переиспользовался между запросами.
+    """
+    since = parse_time_filter(request.args.get('since', ''))
+    until = parse_time_filter(request.args.get('until', ''))
+    if since is not None:
+        since -= since % 60
+    if until is not None:
+        until -= until % 60
+    return since, until
+
 
 def filter_vacancies(
     vacancies: list,
@@ -82,10 +127,9 @@ def index():
     """Главная страница"""
     try:
         logger.debug("Начало обработки запроса главной страницы")
-        # Получаем статистику для главной страницы
+        # Статистика для главной страницы берется из дневных агрегатов, а не из таблицы вакансий
         stats = {
-            "total_vacancies": get_total_vacancies_count(),
-            "sources_count": len(get_unique_sources()),
+            **get_rollup_summary(),
             "cities_count": len(get_unique_cities()),
         }
         logger.debug(f"Статистика получена: {stats}")
@@ -109,6 +153,13 @@ def vacancies():
         order_by = request.args.get('order_by', 'published_at')
         order_direction = request.args.get('order_direction', 'DESC')
         source = request.args.get('source', '')
+        since_arg = request.args.get('since', '')
+        include_archived = get_include_archived_arg()
+        tag = get_tag_arg()
+        try:
+            since, until = get_time_range_args()
+        except ValueError as e:
+            return str(e), 400
 
         # Получаем отфильтрованные вакансии
         vacancies = get_filtered_vacancies(
@@ -118,11 +169,15 @@ def vacancies():
             page=page,
             per_page=per_page,
             order_by=order_by,
-            order_direction=order_direction
+            order_direction=order_direction,
+            since=since,
+            until=until,
+            include_archived=include_archived,
+            tag=tag
         )
 
         # Получаем общее количество вакансий для пагинации
-        total_count = get_total_vacancies_count(query, location, company)
+        total_count = get_total_vacancies_count(query, location, company, since, until, include_archived, tag)
         total_pages = (total_count + per_page - 1) // per_page
 
         # Получаем списки для фильтров
@@ -141,7 +196,11 @@ def vacancies():
             total_count=total_count,
             sources=sources,
             cities=cities,
-            current_source=source
+            current_source=source,
+            since=since_arg,
+            include_archived=include_archived,
+            tag=tag,
+            tags=get_unique_tags()
         )
     except Exception as e:
         logger.error(f"Ошибка при отображении списка вакансий: {e}")
@@ -151,18 +210,8 @@ def vacancies():
 
 @bp.route("/search")
 def search():
-    """Поиск вакансий"""
-    try:
-        query = request.args.get('q', '')
-        if query:
-            results = search_vacancies(query)
-        else:
-            results = get_vacancies()
-        return render_template('vacancies.html', vacancies=results)
-    except Exception as e:
-        logger.error(f"Ошибка при поиске вакансий: {e}")
-        logger.error(f"Traceback: {traceback.format_exc()}")
-        return "Ошибка сервера", 500
+    """Поиск вакансий: та же постраничная выдача, что и /vacancies?q="""
+    return vacancies()
 
 
 @bp.route("/vacancy/<int:vacancy_id>")
@@ -188,19 +237,38 @@ def api_vacancies():
         company = request.args.get('company', '')
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 50))
+        # Тяжелые поля (полное описание) отдаются только по явному запросу: fields=description
+        fields = set(request.args.get('fields', '').split(','))
+        include_archived = get_include_archived_arg()
+        tag = get_tag_arg()
+        try:
+            since, until = get_time_range_args()
+        except ValueError as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 400
 
         vacancies = get_filtered_vacancies(
             query=query,
             location=location,
             company=company,
             page=page,
-            per_page=per_page
+            per_page=per_page,
+            since=since,
+            until=until,
+            include_archived=include_archived,
+            tag=tag
         )
+        if 'description' in fields:
+            descriptions = get_descriptions([vacancy['id'] for vacancy in vacancies], include_archived)
+            for vacancy in vacancies:
+                vacancy['description'] = descriptions.get(vacancy['id'], '')
 
         return jsonify({
             'status': 'success',
             'data': vacancies,
-            'total': get_total_vacancies_count(query, location, company)
+            'total': get_total_vacancies_count(query, location, company, since, until, include_archived, tag)
         })
     except Exception as e:
         logger.error(f"Ошибка в API /api/vacancies: {e}")
@@ -211,6 +279,118 @@ def api_vacancies():
         }), 500
 
 
+@bp.route("/api/suggest")
+def api_suggest():
+    """API endpoint подсказок по префиксу для названий, компаний и городов"""
+    try:
+        prefix = request.args.get('q', '')
+        limit = min(int(request.args.get('limit', 10)), 50)
+        kinds = [kind for kind in request.args.get('kind', '').split(',') if kind]
+        unknown = [kind for kind in kinds if kind not in SUGGEST_KINDS]
+        if unknown:
+            return jsonify({
+                'status': 'error',
+                'message': f"Unknown kind: {', '.join(unknown)}"
+            }), 400
+
+        return jsonify({
+            'status': 'success',
+            'data': suggest_service.suggest(prefix, kinds, limit)
+        })
+    except Exception as e:
+        logger.error(f"Ошибка в API /api/suggest: {e}")
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+
+@bp.route("/api/stats/salary")
+def api_salary_stats():
+    """API endpoint статистики зарплат (медиана, перцентили, гистограмма) по источникам и городам"""
+    # Импорт здесь: аналитика тянет NumPy, который не нужен для холодного старта веб-процесса
+    from services.salary_analytics import salary_analytics, GROUP_BY_CHOICES
+    try:
+        group_by = request.args.get('group_by', 'none')
+        if group_by not in GROUP_BY_CHOICES:
+            return jsonify({
+                'status': 'error',
+                'message': f"group_by must be one of: {', '.join(GROUP_BY_CHOICES)}"
+            }), 400
+        try:
+            since, until = get_time_range_args()
+        except ValueError as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 400
+        city = request.args.get('city', '')
+        bins = min(max(int(request.args.get('bins', 10)), 1), 50)
+
+        stats = salary_analytics.salary_stats(
+            group_by=group_by,
+            since=since,
+            until=until,
+            query=request.args.get('q', ''),
+            source=request.args.get('source', ''),
+            city_ids=get_location_directory().match_ids(city) if city else None,
+            bins=bins
+        )
+        return jsonify({
+            'status': 'success',
+            'data': stats
+        })
+    except Exception as e:
+        logger.error(f"Ошибка в API /api/stats/salary: {e}")
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+
+@bp.route("/api/stats/companies")
+def api_company_stats():
+    """API endpoint числа вакансий по компаниям (канонические имена из справочника компаний)"""
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+        return jsonify({
+            'status': 'success',
+            'data': get_company_counts(limit)
+        })
+    except Exception as e:
+        logger.error(f"Ошибка в API /api/stats/companies: {e}")
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+
+@bp.route("/api/stats/daily")
+def api_daily_stats():
+    """API endpoint вакансий и зарплат по дням и источникам (из дневных агрегатов)"""
+    try:
+        days = min(max(int(request.args.get('days', 30)), 1), 366)
+        city = request.args.get('city', '')
+        return jsonify({
+            'status': 'success',
+            'data': get_daily_stats(
+                days=days,
+                source=request.args.get('source', ''),
+                location_ids=tuple(get_location_directory().match_ids(city)) if city else None
+            )
+        })
+    except Exception as e:
+        logger.error(f"Ошибка в API /api/stats/daily: {e}")
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+
 @bp.route("/api/vacancy/<int:vacancy_id>")
 def api_vacancy_detail(vacancy_id):
     """API endpoint для получения деталей вакансии"""
@@ -0,0 +1,112 @@
+"""
+Бенчмарк очистки текста (стадия clean конвейера загрузки).
+
+Запуск из корня проекта:
+    python benchmarks/data_cleaner.py --records 50000 --companies 2000
+
+Чистит синтетические вакансии той же формы, что приходят от источников: сниппеты HH
+с <highlighttext>, многострочные описания FL после get_text('\\n'), названия компаний
+в разных кавычках. Компании, города и зарплаты повторяются из ограниченного набора,
+как в реальной выдаче. Печатает записей в секунду (с кэшем и без) и попадания в кэш.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services import data_cleaner  # noqa: E402
+from services.data_cleaner import DataCleaner  # noqa: E402
+
+CITIES = ["Москва", "Санкт-Петербург", "Казань,", "Новосибирск", "Екатеринбург", "Удаленно", "  Москва  "]
+TITLES = ["Python-разработчик", "PYTHON РАЗРАБОТЧИК", "Backend developer (Django)", "Senior  Python Engineer",
+          "Инженер данных", "DevOps-инженер"]
+FL_DESCRIPTION = (
+    "\n\n  Нужно доработать сервис на Flask  \n\n\n\nТребования:\n  - Python 3.11\n  - PostgreSQL\n\n\n"
+    "  Бюджет обсуждается &nbsp; \n\n"
+)
+
+
+@dataclass
+class Vacancy:
+    title: str
+    company: str
+    location: str
+    salary: Optional[str]
+    description: str
+
+
+def make_vacancies(count: int, companies: int, seed: int = 1) -> List[Vacancy]:
+    rng = random.Random(seed)
+    forms = ['ООО "Компания {}"', "ооо «Компания {}»", "АО “Компания {}”", "Компания {}", "ИП Иванов {}"]
+    vacancies = []
+    for i in range(count):
+        company = rng.choice(forms).format(rng.randrange(companies))
+        if i % 2:
+            description = (f"Опыт коммерческой разработки на <highlighttext>Python</highlighttext> от 3 лет. "
+                           f"Разработка сервисов &amp; интеграций #{i}.")
+        else:
+            description = FL_DESCRIPTION + str(i)
+        vacancies.append(Vacancy(
+            title=rng.choice(TITLES),
+            company=company,
+            location=rng.choice(CITIES),
+            salary=rng.choice([None, "от 150000 RUR", "от 200000 до 300000 RUR", " 100000 RUR "]),
+            description=description,
+        ))
+    return vacancies
+
+
+def run(records: int, companies: int) -> float:
+    """Записей в секунду на свежих копиях вакансий"""
+    vacancies = make_vacancies(records, companies)
+    cleaner = DataCleaner()
+    started = time.perf_counter()
+    for offset in range(0, len(vacancies), 50):  # как на конвейере: по странице за вызов
+        cleaner.clean_batch(vacancies[offset:offset + 50])
+    return records / (time.perf_counter() - started)
+
+
+def clear_caches() -> None:
+    for func in (data_cleaner.clean_title, data_cleaner.clean_company,
+                 data_cleaner.clean_location, data_cleaner.clean_salary):
+        func.cache_clear()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Скорость стадии clean")
+    parser.add_argument("--records", type=int, default=50000)
+    parser.add_argument("--companies", type=int, default=2000, help="число разных компаний в выборке")
+    args = parser.parse_args()
+
+    clear_caches()
+    cold = run(args.records, args.companies)
+    print(f"Первый проход (кэш наполняется): {cold:10.0f} записей/с")
+    warm = run(args.records, args.companies)
+    print(f"Повторный проход (кэш прогрет):  {warm:10.0f} записей/с")
+
+    print("Кэш повторяющихся значений:")
+    for name, info in DataCleaner.cache_info().items():
+        total = info["hits"] + info["misses"]
+        print(f"  {name:<9} попаданий {info['hits'] / total:6.1%}, значений {info['currsize']}/{info['maxsize']}")
+
+    uncached = {name: getattr(data_cleaner, name) for name in ("clean_title", "clean_company",
+                                                               "clean_location", "clean_salary")}
+    try:
+        for name, func in uncached.items():
+            setattr(data_cleaner, name, func.__wrapped__)
+        plain = run(args.records, args.companies)
+    finally:
+        for name, func in uncached.items():
+            setattr(data_cleaner, name, func)
+    print(f"Без кэша:                        {plain:10.0f} записей/с")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Бенчмарк холодного старта веб-процесса на основе `python -X importtime`.
+
+Запуск из корня проекта:
+    python benchmarks/import_time.py --budget-ms 300 --runs 5
+
+Скрипт несколько раз импортирует модуль в чистом интерпретаторе, берет медиану
+суммарного времени импорта и завершается с кодом 1, если превышен бюджет или
+веб-путь подтянул модули, нужные только воркеру (парсеры, requests, bs4, APScheduler).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Модули, которые не должны загружаться при старте веб-приложения
+FORBIDDEN_MODULES = ("parsers", "requests", "bs4", "apscheduler", "core.scheduler", "services")
+
+
+def measure_import(module: str) -> Tuple[float, Dict[str, int]]:
+    """Импортирует модуль в новом процессе; возвращает суммарное время (мс) и cumulative по модулям (мкс)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Импорт {module} завершился с ошибкой:\n{result.stderr}")
+
+    total_us = 0
+    cumulative: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        total_us += int(self_us)
+        cumulative[name.strip()] = int(cumulative_us)
+    return total_us / 1000, cumulative
+
+
+def forbidden_loaded(cumulative: Dict[str, int]) -> List[str]:
+    return sorted(
+        name for name in cumulative
+        if any(name == prefix or name.startswith(prefix + ".") for prefix in FORBIDDEN_MODULES)
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Бюджет времени импорта веб-приложения")
+    parser.add_argument("--module", default="run", help="импортируемый модуль (по умолчанию run)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", 300)))
+    parser.add_argument("--top", type=int, default=10, help="сколько самых дорогих модулей показать")
+    args = parser.parse_args()
+
+    totals = []
+    cumulative: Dict[str, int] = {}
+    for _ in range(args.runs):
+        total_ms, cumulative = measure_import(args.module)
+        totals.append(total_ms)
+    median_ms = statistics.median(totals)
+
+    print(f"import {args.module}: медиана {median_ms:.1f} мс за {args.runs} запусков "
+          f"(мин {min(totals):.1f}, макс {max(totals):.1f}), бюджет {args.budget_ms:.0f} мс")
+    print("Самые дорогие модули (cumulative, мс):")
+    for name, us in sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {us / 1000:8.1f}  {name}")
+
+    failed = False
+    loaded = forbidden_loaded(cumulative)
+    if loaded:
+        print(f"ОШИБКА: веб-путь импортирует модули воркера: {', '.join(loaded)}")
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f"ОШИБКА: бюджет превышен на {median_ms - args.budget_ms:.1f} мс")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
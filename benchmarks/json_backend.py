@@ -0,0 +1,144 @@
+"""
+Бенчмарк JSON: разбор страниц выдачи HH/SuperJob и кодирование ответов /api/vacancies.
+
+Запуск из корня проекта:
+    python benchmarks/json_backend.py --runs 200 --per-page 50,500
+
+Сравнивает стандартный json (response.json() в парсерах и DefaultJSONProvider во Flask)
+с core.jsonutil (orjson, если установлен) на синтетических данных той же формы,
+что и реальные ответы: 50 вакансий на страницу API, описания и datetime в published_at.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from app.json_provider import FastJSONProvider  # noqa: E402
+from core import jsonutil  # noqa: E402
+
+DESCRIPTION = (
+    "Мы ищем Python-разработчика в команду платформы данных. Задачи: развитие сервисов на Flask и FastAPI, "
+    "оптимизация запросов к PostgreSQL, интеграция с внешними API, code review. "
+) * 4
+
+
+def hh_page(page: int = 0, per_page: int = 50) -> bytes:
+    """Страница поиска api.hh.ru/vacancies с типичным набором полей"""
+    items = []
+    for i in range(page * per_page, (page + 1) * per_page):
+        items.append({
+            "id": str(90000000 + i),
+            "premium": False,
+            "name": f"Python-разработчик (Senior) #{i}",
+            "department": None,
+            "has_test": False,
+            "response_letter_required": False,
+            "area": {"id": "1", "name": "Москва", "url": "https://api.hh.ru/areas/1"},
+            "salary": {"from": 250000 + i, "to": 350000, "currency": "RUR", "gross": False},
+            "type": {"id": "open", "name": "Открытая"},
+            "address": None,
+            "published_at": "2026-10-01T10:00:00+0300",
+            "created_at": "2026-10-01T10:00:00+0300",
+            "archived": False,
+            "apply_alternate_url": f"https://hh.ru/applicant/vacancy_response?vacancyId={90000000 + i}",
+            "url": f"https://api.hh.ru/vacancies/{90000000 + i}?host=hh.ru",
+            "alternate_url": f"https://hh.ru/vacancy/{90000000 + i}",
+            "employer": {
+                "id": str(1000 + i % 50),
+                "name": f"ООО Компания {i % 50}",
+                "url": f"https://api.hh.ru/employers/{1000 + i % 50}",
+                "alternate_url": f"https://hh.ru/employer/{1000 + i % 50}",
+                "logo_urls": {"90": "https://img.hhcdn.ru/a.png", "240": "https://img.hhcdn.ru/b.png"},
+                "trusted": True,
+            },
+            "snippet": {
+                "requirement": "Опыт коммерческой разработки на <highlighttext>Python</highlighttext> от 3 лет.",
+                "responsibility": "Разработка и поддержка сервисов, участие в проектировании архитектуры.",
+            },
+            "schedule": {"id": "remote", "name": "Удаленная работа"},
+            "professional_roles": [{"id": "96", "name": "Программист, разработчик"}],
+            "experience": {"id": "between3And6", "name": "От 3 до 6 лет"},
+            "employment": {"id": "full", "name": "Полная занятость"},
+        })
+    return json.dumps({"items": items, "found": 2000, "pages": 40, "page": page, "per_page": per_page},
+                      ensure_ascii=False).encode("utf-8")
+
+
+def api_payload(per_page: int) -> dict:
+    """Ответ /api/vacancies?fields=description: строки из БД плюс datetime в published_at"""
+    published = datetime(2026, 10, 1, 10, 0, tzinfo=timezone.utc)
+    vacancies = [
+        {
+            "id": i,
+            "title": f"Python-разработчик #{i}",
+            "company": f"ООО Компания {i % 50}",
+            "location": "Москва",
+            "salary": "от 250000 до 350000 RUR",
+            "excerpt": DESCRIPTION[:200],
+            "description": DESCRIPTION,
+            "published_at": published - timedelta(minutes=i),
+            "source": "hh.ru",
+            "original_url": f"https://hh.ru/vacancy/{90000000 + i}",
+            "published_at_ts": int((published - timedelta(minutes=i)).timestamp()),
+        }
+        for i in range(per_page)
+    ]
+    return {"status": "success", "data": vacancies, "total": 12345}
+
+
+def measure(func: Callable[[], object], runs: int) -> float:
+    """Медиана времени одного вызова, мкс"""
+    func()
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1e6
+
+
+def report(name: str, baseline_us: float, fast_us: float) -> None:
+    print(f"  {name:<38} json {baseline_us:9.1f} мкс   {jsonutil.BACKEND} {fast_us:9.1f} мкс   "
+          f"x{baseline_us / fast_us:.1f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Сравнение стандартного json и core.jsonutil")
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--per-page", default="50,500", help="размеры страниц /api/vacancies через запятую")
+    args = parser.parse_args()
+    sizes: List[int] = [int(size) for size in args.per_page.split(",") if size]
+
+    print(f"Бэкенд core.jsonutil: {jsonutil.BACKEND}")
+
+    print("Разбор ответов источников:")
+    page = hh_page()
+    report(f"HH, страница 50 вакансий ({len(page) // 1024} КБ)",
+           measure(lambda: json.loads(page.decode("utf-8")), args.runs),
+           measure(lambda: jsonutil.loads(page), args.runs))
+
+    print("Кодирование ответов /api/vacancies:")
+    app = Flask(__name__)
+    default_provider = DefaultJSONProvider(app)
+    fast_provider = FastJSONProvider(app)
+    for size in sizes:
+        payload = api_payload(size)
+        body = fast_provider.response(payload).get_data()
+        report(f"{size} вакансий с описанием ({len(body) // 1024} КБ)",
+               measure(lambda: default_provider.response(payload).get_data(), args.runs),
+               measure(lambda: fast_provider.response(payload).get_data(), args.runs))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,402 @@
+"""
+Нагрузочный тест веб-приложения: смесь запросов к страницам и API от N параллельных клиентов.
+
+Запуск из корня проекта:
+    python benchmarks/load_test.py --serve --vacancies 50000 --clients 16 --duration 30
+    python benchmarks/load_test.py --url http://localhost:5000 --mix "vacancies=5,api=3,search=1,index=1"
+    python benchmarks/load_test.py --serve --save before.json
+    python benchmarks/load_test.py --serve --compare before.json
+
+С --serve строит синтетическую БД во временном каталоге (вакансии с городами, компаниями, тегами,
+зарплатами и датами за ARCHIVE_AFTER_DAYS дней), публикует снимок и поднимает приложение отдельным
+процессом, который читает этот снимок. С --url нагружает уже запущенный сервер (например, gunicorn).
+
+Запросы похожи на реальные: чаще первая страница и пустой или короткий запрос, реже глубокие
+страницы, фильтры по городу, компании, тегу и дате и сортировка не по дате. Каждый клиент держит
+одно keep-alive соединение. По каждому маршруту печатаются запросы в секунду, p50/p95/p99 и ошибки
+(ответ не 2xx или сбой соединения); --save сохраняет отчет в JSON, --compare сравнивает с сохраненным.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.config import Config  # noqa: E402
+
+WORDS = ["python", "django", "аналитик", "devops", "java", "frontend", "data", "тестировщик", "go", "senior"]
+CITIES = ["Москва", "Санкт-Петербург", "Казань", "Новосибирск", "Екатеринбург", "Удаленно"]
+COMPANIES = ["Яндекс", "Сбер", "Т-Банк", "VK", "Ozon", "Авито", "Касперский"] + [f"Компания {i}" for i in range(300)]
+TAGS = ["python", "django", "fastapi", "postgresql", "docker", "kubernetes", "react", "java", "go", "kafka"]
+TITLES = ["Python-разработчик", "Backend developer (Django)", "Аналитик данных", "DevOps-инженер",
+          "Java-разработчик", "Frontend-разработчик (React)", "Тестировщик", "Go-разработчик", "Data engineer"]
+SOURCES = ["hh.ru", "superjob.ru", "fl.ru"]
+SALARIES = [None, None, "от 100000 руб.", "150 000 – 250 000 ₽", "до 300000 руб.", "до 3000 USD"]
+
+DEFAULT_MIX = "index=1,vacancies=5,search=1,api=3"
+PERCENTILES = (50, 95, 99)
+
+
+# --- Синтетическая БД ---
+
+def build_database(directory: str, count: int, seed: int) -> str:
+    """Заполняет БД в directory синтетическими вакансиями и возвращает путь к опубликованному снимку"""
+    from core import database
+    db_path = os.path.join(directory, "vacancies.db")
+    database.get_db_path = lambda: db_path
+    Config.READ_FROM_SNAPSHOT = False
+    Config.SNAPSHOT_DATABASE_PATH = os.path.join(directory, "vacancies_snapshot.db")
+    database.initialize_database()
+
+    rng = random.Random(seed)
+    location_ids = database.resolve_location_ids(CITIES)
+    company_ids = database.resolve_company_ids(COMPANIES)
+    now = datetime.now()
+    batch = []
+    for i in range(count):
+        title = rng.choice(TITLES)
+        if rng.random() < 0.3:
+            title = f"Senior {title}"
+        city = rng.choice(CITIES)
+        # Компании распределены неравномерно: крупные встречаются чаще
+        company = COMPANIES[min(int(rng.paretovariate(1.2)) - 1, len(COMPANIES) - 1)]
+        published_at = now - timedelta(seconds=rng.randint(0, Config.ARCHIVE_AFTER_DAYS * 86400))
+        source = rng.choice(SOURCES)
+        batch.append(database.prepare_vacancy({
+            "title": title,
+            "company": company,
+            "location": city,
+            "salary": rng.choice(SALARIES),
+            "description": f"{title}. " + " ".join(rng.choices(WORDS + TAGS, k=60)),
+            "published_at": published_at.strftime("%Y-%m-%dT%H:%M:%S"),
+            "source": source,
+            "original_url": f"https://{source}/vacancy/{i}",
+            "source_id": str(i),
+            "location_id": location_ids[city],
+            "company_id": company_ids[company],
+            "tags": rng.sample(TAGS, rng.randint(0, 4)),
+        }))
+        if len(batch) >= 2000:
+            database.upsert_prepared_vacancies(batch)
+            batch = []
+    if batch:
+        database.upsert_prepared_vacancies(batch)
+    if not database.publish_snapshot():
+        raise RuntimeError("не удалось опубликовать снимок БД")
+    return Config.SNAPSHOT_DATABASE_PATH
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(directory: str, snapshot_path: str, port: int) -> subprocess.Popen:
+    """Поднимает приложение отдельным процессом (клиенты не делят с ним GIL) и ждет, пока оно ответит"""
+    env = dict(os.environ,
+               SNAPSHOT_DATABASE_PATH=snapshot_path,
+               READ_FROM_SNAPSHOT="True",
+               ARCHIVE_DATABASE_PATH=os.path.join(directory, "vacancies_archive.db"),
+               METRICS_DATABASE_PATH=os.path.join(directory, "metrics.db"),
+               PYTHONPATH=ROOT)
+    code = ("from werkzeug.serving import run_simple; from app import create_app; "
+            f"run_simple('127.0.0.1', {port}, create_app(), threaded=True)")
+    process = subprocess.Popen([sys.executable, "-c", code], cwd=directory, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"сервер завершился с кодом {process.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("сервер не ответил за 30 секунд")
+
+
+# --- Смесь запросов ---
+
+def page_depth(rng: random.Random) -> int:
+    """Номер страницы: в основном первая, изредка глубокие"""
+    roll = rng.random()
+    if roll < 0.6:
+        return 1
+    if roll < 0.9:
+        return rng.randint(2, 5)
+    return rng.randint(6, 100)
+
+
+def common_filters(rng: random.Random) -> Dict[str, Any]:
+    params: Dict[str, Any] = {}
+    if rng.random() < 0.5:
+        params["q"] = rng.choice(WORDS)
+    if rng.random() < 0.3:
+        params["location"] = rng.choice(CITIES)
+    if rng.random() < 0.1:
+        params["company"] = rng.choice(COMPANIES[:7])
+    if rng.random() < 0.15:
+        params["tag"] = rng.choice(TAGS)
+    if rng.random() < 0.2:
+        params["since"] = rng.choice(["24h", "7d", "30d"])
+    if rng.random() < 0.03:
+        params["include_archived"] = 1
+    return params
+
+
+def index_request(rng: random.Random) -> str:
+    return "/"
+
+
+def vacancies_request(rng: random.Random) -> str:
+    params = common_filters(rng)
+    params["page"] = page_depth(rng)
+    params["per_page"] = rng.choice([20, 50, 50, 100])
+    if rng.random() < 0.1:
+        params["source"] = rng.choice(SOURCES)
+    if rng.random() < 0.3:
+        params["order_by"] = rng.choice(["title", "company", "location", "source"])
+        params["order_direction"] = rng.choice(["ASC", "DESC"])
+    return "/vacancies?" + urlencode(params)
+
+
+def search_request(rng: random.Random) -> str:
+    return "/search?" + urlencode({"q": " ".join(rng.sample(WORDS, rng.randint(1, 2)))})
+
+
+def api_request(rng: random.Random) -> str:
+    params = common_filters(rng)
+    params["page"] = page_depth(rng)
+    params["per_page"] = rng.choice([20, 50, 100])
+    if rng.random() < 0.1:
+        params["fields"] = "description"
+    return "/api/vacancies?" + urlencode(params)
+
+
+def stats_request(rng: random.Random) -> str:
+    return rng.choice(["/api/stats/daily?days=30", "/api/stats/companies?limit=20",
+                       "/api/stats/salary?group_by=source"])
+
+
+ROUTES: Dict[str, Callable[[random.Random], str]] = {
+    "index": index_request,
+    "vacancies": vacancies_request,
+    "search": search_request,
+    "api": api_request,
+    "stats": stats_request,
+}
+
+
+def parse_mix(value: str) -> List[Tuple[str, float]]:
+    """'vacancies=5,api=3' -> [(маршрут, вес)]"""
+    mix = []
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in ROUTES:
+            raise argparse.ArgumentTypeError(f"неизвестный маршрут {name!r}, доступны: {', '.join(ROUTES)}")
+        mix.append((name, float(weight or 1)))
+    return mix
+
+
+# --- Клиенты ---
+
+class RouteStats:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.statuses: Dict[int, int] = {}
+
+
+class Client(threading.Thread):
+    """Клиент с одним keep-alive соединением: запросы подряд, без пауз"""
+
+    def __init__(self, host: str, port: int, mix: List[Tuple[str, float]], seed: int,
+                 warmup_until: float, stop_at: float, max_requests: Optional[int]):
+        super().__init__(daemon=True)
+        self.host, self.port = host, port
+        self.names = [name for name, _ in mix]
+        self.weights = [weight for _, weight in mix]
+        self.rng = random.Random(seed)
+        self.warmup_until, self.stop_at = warmup_until, stop_at
+        self.max_requests = max_requests
+        self.stats: Dict[str, RouteStats] = {name: RouteStats() for name in self.names}
+        self.conn: Optional[http.client.HTTPConnection] = None
+
+    def request(self, path: str) -> int:
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        try:
+            self.conn.request("GET", path)
+            response = self.conn.getresponse()
+            response.read()
+            return response.status
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = None
+            raise
+
+    def run(self) -> None:
+        done = 0
+        while time.monotonic() < self.stop_at and (self.max_requests is None or done < self.max_requests):
+            name = self.rng.choices(self.names, self.weights)[0]
+            path = ROUTES[name](self.rng)
+            started = time.perf_counter()
+            try:
+                status = self.request(path)
+            except (OSError, http.client.HTTPException):
+                status = 0
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if time.monotonic() < self.warmup_until:
+                continue
+            stats = self.stats[name]
+            stats.latencies.append(elapsed_ms)
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            if not 200 <= status < 300:
+                stats.errors += 1
+            done += 1
+        if self.conn is not None:
+            self.conn.close()
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Перцентиль по отсортированному списку (ближайший ранг)"""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, int(round(pct / 100 * len(values))) - 1))
+    return values[index]
+
+
+def run_load(host: str, port: int, mix: List[Tuple[str, float]], clients: int, duration: float,
+             warmup: float, max_requests: Optional[int], seed: int) -> Dict[str, Any]:
+    started = time.monotonic()
+    warmup_until = started + warmup
+    stop_at = warmup_until + duration
+    per_client = -(-max_requests // clients) if max_requests else None
+    workers = [Client(host, port, mix, seed + i, warmup_until, stop_at, per_client) for i in range(clients)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    # Запросы, начатые до конца замера, дожидаются ответа, но время замера не растягивают
+    elapsed = max(min(time.monotonic(), stop_at) - warmup_until, 1e-9)
+
+    routes = {}
+    for name, _ in mix:
+        latencies = sorted(ms for worker in workers for ms in worker.stats[name].latencies)
+        errors = sum(worker.stats[name].errors for worker in workers)
+        statuses: Dict[str, int] = {}
+        for worker in workers:
+            for status, count in worker.stats[name].statuses.items():
+                statuses[str(status)] = statuses.get(str(status), 0) + count
+        routes[name] = {
+            "requests": len(latencies),
+            "errors": errors,
+            "error_rate": round(errors / len(latencies), 4) if latencies else 0.0,
+            "rps": round(len(latencies) / elapsed, 1),
+            **{f"p{pct}": round(percentile(latencies, pct), 2) for pct in PERCENTILES},
+            "max": round(latencies[-1], 2) if latencies else 0.0,
+            "statuses": statuses,
+        }
+    total = sum(route["requests"] for route in routes.values())
+    errors = sum(route["errors"] for route in routes.values())
+    return {
+        "config": {"clients": clients, "duration": round(elapsed, 1), "mix": dict(mix), "seed": seed},
+        "total": {"requests": total, "errors": errors, "rps": round(total / elapsed, 1)},
+        "routes": routes,
+    }
+
+
+# --- Отчет ---
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    config, total = report["config"], report["total"]
+    print(f"{config['clients']} клиентов, {config['duration']} с: {total['requests']} запросов, "
+          f"{total['rps']} запр/с, ошибок {total['errors']}")
+    header = f"{'маршрут':<10} {'запросов':>9} {'запр/с':>8} {'p50 мс':>8} {'p95 мс':>8} {'p99 мс':>8} " \
+             f"{'макс мс':>8} {'ошибки':>7}"
+    print(header)
+    for name, route in report["routes"].items():
+        print(f"{name:<10} {route['requests']:>9} {route['rps']:>8} {route['p50']:>8} {route['p95']:>8} "
+              f"{route['p99']:>8} {route['max']:>8} {route['error_rate'] * 100:>6.2f}%")
+        base = (baseline or {}).get("routes", {}).get(name)
+        if base:
+            print(f"{'  к базе':<10} {'':>9} {delta(route['rps'], base['rps']):>8} "
+                  + " ".join(f"{delta(route[key], base[key]):>8}" for key in ("p50", "p95", "p99", "max")))
+
+
+def delta(value: float, base: float) -> str:
+    if not base:
+        return "-"
+    return f"{(value - base) / base * 100:+.0f}%"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Нагрузочный тест маршрутов веб-приложения")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="адрес запущенного сервера, например http://localhost:5000")
+    target.add_argument("--serve", action="store_true", help="поднять приложение на синтетической БД")
+    parser.add_argument("--vacancies", type=int, default=50000, help="размер синтетической БД (с --serve)")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"веса маршрутов (по умолчанию {DEFAULT_MIX}; еще есть stats)")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20, help="секунд замера (после прогрева)")
+    parser.add_argument("--warmup", type=float, default=3, help="секунд прогрева, не входят в отчет")
+    parser.add_argument("--requests", type=int, help="остановиться после стольких запросов")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", help="сохранить отчет в JSON")
+    parser.add_argument("--compare", help="сравнить с отчетом, сохраненным через --save")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    directory = None
+    server = None
+    try:
+        if args.serve:
+            directory = tempfile.mkdtemp(prefix="load_test_")
+            started = time.perf_counter()
+            snapshot_path = build_database(directory, args.vacancies, args.seed)
+            print(f"Синтетическая БД: {args.vacancies} вакансий за {time.perf_counter() - started:.1f} с")
+            host, port = "127.0.0.1", free_port()
+            server = start_server(directory, snapshot_path, port)
+        else:
+            parts = urlsplit(args.url)
+            host, port = parts.hostname, parts.port or 80
+
+        report = run_load(host, port, args.mix, args.clients, args.duration, args.warmup,
+                          args.requests, args.seed)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        if directory is not None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    print_report(report, baseline)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 1 if report["total"]["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,7 +14,6 @@ from .database import (
     get_vacancies_by_source,
     remove_duplicates
 )
-from .scheduler import start_scheduler
 
 __all__ = [
     'initialize_database',
@@ -28,6 +27,15 @@ __all__ = [
     'remove_duplicates'
 ]
 
+def __getattr__(name):
+    # Планировщик тянет за собой APScheduler, requests, bs4 и все парсеры;
+    # веб-процессу он не нужен, поэтому импортируем его только по требованию
+    if name == 'start_scheduler':
+        from .scheduler import start_scheduler
+        return start_scheduler
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def create_db():
     # Инициализация базы данных
     initialize_database()
\ No newline at end of file
@@ -0,0 +1,51 @@
+import re
+
+from core.dictionary import SPACES_RE, AliasDirectory
+
+QUOTES_RE = re.compile(r"[\"'«»“”„`]")
+# Сокращения организационно-правовых форм, которые пишутся заглавными (ООО, АО, ИП)
+LEGAL_FORM_ABBREVIATIONS = ("ооо", "оао", "зао", "пао", "ао", "ип", "нко", "гк")
+LEGAL_FORMS = (
+    "общество с ограниченной ответственностью", "публичное акционерное общество",
+    "акционерное общество", "индивидуальный предприниматель", "группа компаний",
+    *LEGAL_FORM_ABBREVIATIONS, "llc", "ltd", "inc", "gmbh",
+)
+# Сокращение формы в любом месте названия (services/data_cleaner.py приводит его к заглавным)
+LEGAL_ABBREVIATION_RE = re.compile(rf"(?<!\w)({'|'.join(LEGAL_FORM_ABBREVIATIONS)})(?!\w)", re.IGNORECASE)
+# Организационно-правовая форма в начале или в конце названия: «ООО Ромашка», «Ромашка, LLC»
+LEGAL_FORM_RE = re.compile(
+    rf"^(?:(?:{'|'.join(LEGAL_FORMS)})\.?[\s,]+)+|(?:[\s,]+(?:{'|'.join(LEGAL_FORMS)})\.?)+$",
+    re.IGNORECASE
+)
+EDGE_PUNCTUATION_RE = re.compile(r"^[\s,.;:\-]+|[\s,.;:\-]+$")
+
+
+def strip_company_name(value: str) -> str:
+    """Название без кавычек и организационно-правовой формы: «ООО "Яндекс"» -> «Яндекс»"""
+    value = SPACES_RE.sub(" ", QUOTES_RE.sub(" ", value or "")).strip()
+    stripped = EDGE_PUNCTUATION_RE.sub("", LEGAL_FORM_RE.sub("", value))
+    # Название из одной формы («ИП») оставляем как есть
+    return stripped or value
+
+
+class CompanyDirectory(AliasDirectory):
+    """Справочник компаний: «ООО «Яндекс»», «Яндекс» и «YANDEX» с разных источников получают один id"""
+    table = "companies"
+    alias_table = "company_aliases"
+    ref_column = "company_id"
+    seeds = {
+        "Частное лицо": ["частное лицо"],
+        "Яндекс": ["яндекс", "yandex"],
+        "Сбер": ["сбер", "сбербанк", "sber", "sberbank", "сбербанк россии"],
+        "Т-Банк": ["т-банк", "тинькофф", "тинькофф банк", "tinkoff", "t-bank"],
+        "VK": ["vk", "вк", "вконтакте", "mail.ru group"],
+        "Ozon": ["ozon", "озон"],
+        "Авито": ["авито", "avito"],
+        "Лаборатория Касперского": ["лаборатория касперского", "kaspersky", "kaspersky lab"],
+    }
+
+    def normalize(self, value: str) -> str:
+        return super().normalize(strip_company_name(value))
+
+    def display_name(self, value: str) -> str:
+        return strip_company_name(value)
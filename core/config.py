@@ -6,13 +6,102 @@ from dotenv import load_dotenv
 # Загружаем переменные окружения из файла .env
 load_dotenv()
 
+
+def _env_list(name: str, default: str) -> list:
+    """Читает из окружения список значений через запятую"""
+    return [item.strip() for item in os.getenv(name, default).split(',') if item.strip()]
+
+
+def _env_map(name: str, default: str = '') -> dict:
+    """Читает из окружения пары ключ=число через запятую"""
+    pairs = (item.split('=', 1) for item in _env_list(name, default) if '=' in item)
+    return {key.strip(): float(value) for key, value in pairs}
+
+
 class Config:
     # Пример конфигурации
     DEBUG = os.getenv('DEBUG', 'False') == 'True'
     DATABASE_PATH = os.getenv('DATABASE_PATH', 'parsers/vacancies.db')
     SJ_API_KEY = os.getenv("SJ_API_KEY", "v3.r.139040003.a8a7c7612fa80498a334a3f6d07ee655d3629be1.50b7a63c5ab8c028784ec64ca96d91c82673fa2d")
     SCHEDULER_INTERVAL = int(os.getenv('SCHEDULER_INTERVAL', 3600))  # Интервал в секундах
+    GENERATION_POLL_INTERVAL = float(os.getenv('GENERATION_POLL_INTERVAL', 5))  # Как часто веб проверяет новые данные
+    # Аренда обхода в БД: срок без heartbeat и минимальный промежуток между стартами
+    CRAWL_LEASE_TTL = int(os.getenv('CRAWL_LEASE_TTL', 300))
+    CRAWL_MIN_GAP = int(os.getenv('CRAWL_MIN_GAP', SCHEDULER_INTERVAL * 9 // 10))
     SEARCH_QUERY = "Python"
+    # Планировщик обхода: поисковые запросы и регионы (HH area, SuperJob town)
+    SEARCH_QUERIES = _env_list('SEARCH_QUERIES', SEARCH_QUERY)
+    HH_AREAS = [int(area) for area in _env_list('HH_AREAS', '1')]
+    SJ_TOWNS = [int(town) for town in _env_list('SJ_TOWNS', '4')]
+    CRAWL_CONCURRENCY = int(os.getenv('CRAWL_CONCURRENCY', 4))
+    # Источники обхода (встроенные или из entry points), таймаут запроса и срок обхода на источник,
+    # например SOURCE_DEADLINES="fl.ru=300,hh.ru=1200"
+    CRAWL_SOURCES = _env_list('CRAWL_SOURCES', 'hh.ru,superjob.ru,fl.ru')
+    SOURCE_REQUEST_TIMEOUT = float(os.getenv('SOURCE_REQUEST_TIMEOUT', 15))
+    SOURCE_DEADLINE = float(os.getenv('SOURCE_DEADLINE', 1200))
+    SOURCE_REQUEST_TIMEOUTS = _env_map('SOURCE_REQUEST_TIMEOUTS')
+    SOURCE_DEADLINES = _env_map('SOURCE_DEADLINES')
+    # Размыкатель: после N неудачных задач подряд источник пропускается на время охлаждения
+    CIRCUIT_BREAKER_THRESHOLD = int(os.getenv('CIRCUIT_BREAKER_THRESHOLD', 3))
+    CIRCUIT_BREAKER_COOLDOWN = int(os.getenv('CIRCUIT_BREAKER_COOLDOWN', 1800))
+    HH_SEARCH_PERIOD_DAYS = int(os.getenv('HH_SEARCH_PERIOD_DAYS', 30))  # HH ищет не глубже 30 дней
+    HH_MIN_WINDOW_MINUTES = int(os.getenv('HH_MIN_WINDOW_MINUTES', 10))
+    # Дообогащение HH полными описаниями
+    HH_DETAILS_CACHE_PATH = os.getenv('HH_DETAILS_CACHE_PATH', '')  # по умолчанию рядом с основной БД
+    HH_DETAILS_CACHE_TTL = int(os.getenv('HH_DETAILS_CACHE_TTL', 14 * 86400))  # вакансия пропала из выдачи
+    HH_DETAILS_CONCURRENCY = int(os.getenv('HH_DETAILS_CONCURRENCY', 4))
+    # Конвейер загрузки: потоков на стадию (PIPELINE_WORKERS="fetch=8,parse=2"), размер очередей между
+    # стадиями и пачки записи. Запись в SQLite все равно последовательна, поэтому write - один поток
+    PIPELINE_WORKERS = {
+        'fetch': CRAWL_CONCURRENCY,
+        'parse': 2,
+        'enrich': HH_DETAILS_CONCURRENCY,
+        'clean': 1,
+        'tag': 1,
+        'normalize': 1,
+        'write': 1,
+        **{stage: int(count) for stage, count in _env_map('PIPELINE_WORKERS').items()},
+    }
+    PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', 50))
+    PIPELINE_BATCH_SIZE = int(os.getenv('PIPELINE_BATCH_SIZE', 500))
+    PIPELINE_REPORT_INTERVAL = float(os.getenv('PIPELINE_REPORT_INTERVAL', 30))
+    # Очистка текста: размер кэша повторяющихся значений (названия, компании, города, зарплаты)
+    CLEANER_CACHE_SIZE = int(os.getenv('CLEANER_CACHE_SIZE', 10000))
+    # Прерванный обход продолжается с сохраненных страниц, если начат не раньше чем столько секунд назад
+    CRAWL_CHECKPOINT_MAX_AGE = int(os.getenv('CRAWL_CHECKPOINT_MAX_AGE', 6 * 3600))
+    # Уведомления по сохраненным поискам: размер пачки новых вакансий и корзины зарплат индекса поисков
+    NOTIFIER_BATCH_SIZE = int(os.getenv('NOTIFIER_BATCH_SIZE', 1000))
+    NOTIFIER_SALARY_STEP = int(os.getenv('NOTIFIER_SALARY_STEP', 25000))
+    NOTIFIER_SALARY_BUCKETS = int(os.getenv('NOTIFIER_SALARY_BUCKETS', 40))
+    # Подсказки (core/suggest.py): журнал изменений названий, компаний и городов хранится столько поколений
+    # данных; если с прошлого обновления индекса изменений больше SUGGEST_MAX_CHANGES, индекс строится заново
+    SUGGEST_CHANGE_LOG_GENERATIONS = int(os.getenv('SUGGEST_CHANGE_LOG_GENERATIONS', 100))
+    SUGGEST_MAX_CHANGES = int(os.getenv('SUGGEST_MAX_CHANGES', 50000))
+    # Дневные агрегаты: сдвиг границы суток от UTC в секундах (по умолчанию московское время)
+    ROLLUP_DAY_OFFSET = int(os.getenv('ROLLUP_DAY_OFFSET', 3 * 3600))
+    # Архив старых вакансий: отдельный файл SQLite (по умолчанию рядом с основной БД)
+    ARCHIVE_DATABASE_PATH = os.getenv('ARCHIVE_DATABASE_PATH', '')
+    ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', 90))
+    ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', 500))
+    ARCHIVE_INTERVAL = int(os.getenv('ARCHIVE_INTERVAL', 86400))  # Раз в сутки
+    # Метрики (metrics/store.py): отдельная БД, буфер записи и сроки хранения сырых, часовых и дневных точек
+    METRICS_DATABASE_PATH = os.getenv('METRICS_DATABASE_PATH', '')
+    METRICS_FLUSH_SIZE = int(os.getenv('METRICS_FLUSH_SIZE', 200))
+    METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 10))
+    METRICS_RAW_RETENTION = int(os.getenv('METRICS_RAW_RETENTION', 2 * 86400))
+    METRICS_HOURLY_RETENTION = int(os.getenv('METRICS_HOURLY_RETENTION', 90 * 86400))
+    METRICS_DAILY_RETENTION = int(os.getenv('METRICS_DAILY_RETENTION', 3 * 365 * 86400))
+    METRICS_DOWNSAMPLE_INTERVAL = int(os.getenv('METRICS_DOWNSAMPLE_INTERVAL', 3600))
+    # Профилирование по запросу (core/profiling.py): запрос с заголовком X-Profile: PROFILE_TOKEN
+    # (пустой токен - хуки не ставятся), обход воркера в режиме PROFILE_CRAWL (cprofile/sample)
+    PROFILE_TOKEN = os.getenv('PROFILE_TOKEN', '')
+    PROFILE_DIR = os.getenv('PROFILE_DIR', '')
+    PROFILE_CRAWL = os.getenv('PROFILE_CRAWL', '')
+    PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', 0.005))
+    # Неизменяемый снимок БД, который воркер публикует после каждой записи, а веб только читает
+    SNAPSHOT_DATABASE_PATH = os.getenv('SNAPSHOT_DATABASE_PATH', '')
+    READ_FROM_SNAPSHOT = os.getenv('READ_FROM_SNAPSHOT', 'True') == 'True'
+    SNAPSHOT_MMAP_SIZE = int(os.getenv('SNAPSHOT_MMAP_SIZE', 256 * 1024 * 1024))
 
 config = Config()
 
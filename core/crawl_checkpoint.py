@@ -0,0 +1,197 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set, Tuple, TypeVar
+
+from core.config import Config
+from core.database import create_connection
+from parsers.registry import CrawlTask
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Страница задачи, дошедшая до записи: ключ задачи и номер страницы от начала задачи
+PageRef = Tuple[str, int]
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+class CrawlCheckpoint:
+    """
+    Контрольные точки обхода в БД (crawl_runs, crawl_checkpoints).
+    В начале запуска сохраняется план задач (с окнами HH), затем вместе с каждой записанной пачкой
+    вакансий, в той же транзакции, - число страниц задачи, записанных подряд с начала.
+    Если процесс упал или часть задач не прошла до конца, следующий запуск берет незавершенный план
+    и продолжает задачи с этих страниц.
+    Страницы одной задачи могут записываться не по порядку (параллельные стадии),
+    поэтому засчитывается только непрерывный префикс.
+    """
+
+    def __init__(self, max_age: Optional[int] = None):
+        self.max_age = max_age if max_age is not None else Config.CRAWL_CHECKPOINT_MAX_AGE
+        self.run_id: Optional[int] = None
+        self.resumed = False
+        self._pages_done: Dict[str, int] = {}
+        # Записанные страницы после непрерывного префикса
+        self._committed: Dict[str, Set[int]] = {}
+        self._totals: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def begin(self) -> bool:
+        """
+        Продолжает незавершенный свежий запуск с сохраненным планом; True, если это продолжение.
+        Иначе старые запуски удаляются, а новый создается вместе с планом в save_plan.
+        """
+        now = time.time()
+        conn = create_connection()
+        try:
+            row = conn.execute("""
+                SELECT id, started_at FROM crawl_runs r
+                WHERE finished_at IS NULL AND EXISTS (SELECT 1 FROM crawl_checkpoints c WHERE c.run_id = r.id)
+                ORDER BY id DESC LIMIT 1
+            """).fetchone()
+            if row is not None and row['started_at'] >= now - self.max_age:
+                self.run_id = row['id']
+                self.resumed = True
+            else:
+                # Старые незавершенные запуски и запуски без плана больше не продолжаются
+                conn.execute("DELETE FROM crawl_checkpoints")
+                conn.execute("DELETE FROM crawl_runs")
+                self.run_id = None
+                self.resumed = False
+            conn.commit()
+        finally:
+            conn.close()
+        return self.resumed
+
+    def save_plan(self, tasks: List[CrawlTask]) -> None:
+        """Создает запуск и сохраняет его план задач одной транзакцией"""
+        now = time.time()
+        conn = create_connection()
+        try:
+            self.run_id = conn.execute("INSERT INTO crawl_runs (started_at) VALUES (?)", (now,)).lastrowid
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO crawl_checkpoints
+                    (run_id, task_key, position, source, query, region, date_from, date_to, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (self.run_id, task.key, position, task.source, task.query, task.region,
+                     task.date_from.isoformat() if task.date_from else None,
+                     task.date_to.isoformat() if task.date_to else None, now)
+                    for position, task in enumerate(tasks)
+                ]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        with self._lock:
+            for task in tasks:
+                self._pages_done[task.key] = 0
+
+    def pending(self) -> List[Tuple[CrawlTask, int]]:
+        """Незавершенные задачи запуска и число уже записанных страниц каждой"""
+        conn = create_connection()
+        try:
+            rows = conn.execute(
+                "SELECT * FROM crawl_checkpoints WHERE run_id = ? AND done = 0 ORDER BY position",
+                (self.run_id,)
+            ).fetchall()
+        finally:
+            conn.close()
+        pending = []
+        with self._lock:
+            for row in rows:
+                task = CrawlTask(row['source'], row['query'], row['region'],
+                                 _parse_datetime(row['date_from']), _parse_datetime(row['date_to']))
+                self._pages_done[task.key] = row['pages_done']
+                pending.append((task, row['pages_done']))
+                if row['pages_done']:
+                    logger.info(f"Задача {task.key}: уже записано страниц {row['pages_done']}, "
+                                f"обход продолжается со следующей")
+        return pending
+
+    def _updates(self, pages: List[PageRef]) -> List[tuple]:
+        """Новые значения контрольных точек, если все страницы пачки будут записаны"""
+        by_task: Dict[str, Set[int]] = {}
+        for task_key, index in pages:
+            by_task.setdefault(task_key, set()).add(index)
+        updates = []
+        for task_key, new_pages in by_task.items():
+            committed = self._committed.get(task_key, set()) | new_pages
+            pages_done = self._pages_done.get(task_key, 0)
+            while pages_done in committed:
+                pages_done += 1
+            total = self._totals.get(task_key)
+            done = total is not None and pages_done >= total
+            updates.append((task_key, pages_done, done, new_pages))
+        return updates
+
+    def _save(self, cursor, updates: List[tuple]) -> None:
+        now = time.time()
+        cursor.executemany(
+            """
+            UPDATE crawl_checkpoints
+            SET pages_done = MAX(pages_done, ?), done = MAX(done, ?), updated_at = ?
+            WHERE run_id = ? AND task_key = ?
+            """,
+            [(pages_done, int(done), now, self.run_id, task_key) for task_key, pages_done, done, _ in updates]
+        )
+
+    def commit_pages(self, pages: List[PageRef], write: Callable[[Callable], T]) -> T:
+        """
+        Выполняет запись пачки: write получает функцию, которая дописывает контрольные точки
+        в транзакцию записи. Состояние в памяти обновляется только после успешной записи.
+        """
+        with self._lock:
+            updates = self._updates(pages)
+            result = write(lambda cursor: self._save(cursor, updates))
+            for task_key, pages_done, _, new_pages in updates:
+                committed = self._committed.setdefault(task_key, set())
+                committed.update(new_pages)
+                # Страницы внутри непрерывного префикса больше не нужны
+                for index in range(self._pages_done.get(task_key, 0), pages_done):
+                    committed.discard(index)
+                self._pages_done[task_key] = pages_done
+            return result
+
+    def finish_task(self, task_key: str, total_pages: int) -> None:
+        """Загрузка задачи закончилась без ошибок: задача завершена, когда записаны все ее страницы"""
+        with self._lock:
+            self._totals[task_key] = total_pages
+            if self._pages_done.get(task_key, 0) < total_pages:
+                return
+            conn = create_connection()
+            try:
+                conn.execute(
+                    "UPDATE crawl_checkpoints SET done = 1, updated_at = ? WHERE run_id = ? AND task_key = ?",
+                    (time.time(), self.run_id, task_key)
+                )
+                conn.commit()
+            finally:
+                conn.close()
+
+    def unfinished(self) -> int:
+        """Число задач запуска, не пройденных до конца (ошибка загрузки или записи страниц)"""
+        conn = create_connection()
+        try:
+            return conn.execute(
+                "SELECT COUNT(*) FROM crawl_checkpoints WHERE run_id = ? AND done = 0", (self.run_id,)
+            ).fetchone()[0]
+        finally:
+            conn.close()
+
+    def finish(self) -> None:
+        """Запуск завершен: план и контрольные точки больше не нужны"""
+        conn = create_connection()
+        try:
+            conn.execute("DELETE FROM crawl_checkpoints WHERE run_id = ?", (self.run_id,))
+            conn.execute("UPDATE crawl_runs SET finished_at = ? WHERE id = ?", (time.time(), self.run_id))
+            conn.commit()
+        finally:
+            conn.close()
@@ -0,0 +1,113 @@
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Optional
+
+from core.config import Config
+from core.database import create_connection
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlLease:
+    """
+    Аренда права на обход, хранящаяся в БД (таблица crawl_leases).
+    Пока владелец жив, фоновый поток продлевает срок аренды (heartbeat);
+    если процесс упал, аренда истекает через ttl секунд и ее может взять другой процесс.
+    min_gap не дает начать новый обход раньше, чем через заданное время после предыдущего старта,
+    поэтому за один интервал обход выполняет только один процесс.
+    """
+
+    def __init__(self, name: str = 'parse_jobs', ttl: Optional[int] = None, min_gap: Optional[int] = None):
+        self.name = name
+        self.ttl = ttl if ttl is not None else Config.CRAWL_LEASE_TTL
+        self.min_gap = min_gap if min_gap is not None else Config.CRAWL_MIN_GAP
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.acquired = False
+        # Аренду забрал другой процесс (или ее не удавалось продлить дольше ttl): обход нужно прервать
+        self.lost = False
+        self._renewed_at = 0.0
+        self._stop = threading.Event()
+        self._heartbeat_thread = None
+
+    def acquire(self) -> bool:
+        """Пытается взять аренду; атомарно за счет одного UPDATE с условием"""
+        now = time.time()
+        conn = create_connection()
+        try:
+            conn.execute("INSERT OR IGNORE INTO crawl_leases (name) VALUES (?)", (self.name,))
+            cursor = conn.execute("""
+                UPDATE crawl_leases
+                SET owner = ?, expires_at = ?, heartbeat_at = ?, last_started_at = ?
+                WHERE name = ?
+                  AND (owner IS NULL OR expires_at <= ?)
+                  AND (last_started_at IS NULL OR last_started_at <= ?)
+            """, (self.owner, now + self.ttl, now, now, self.name, now, now - self.min_gap))
+            conn.commit()
+            self.acquired = cursor.rowcount == 1
+            self._renewed_at = now
+        finally:
+            conn.close()
+        return self.acquired
+
+    def heartbeat(self) -> bool:
+        """Продлевает аренду; False, если ее уже забрал другой процесс"""
+        now = time.time()
+        conn = create_connection()
+        try:
+            cursor = conn.execute("""
+                UPDATE crawl_leases SET expires_at = ?, heartbeat_at = ?
+                WHERE name = ? AND owner = ?
+            """, (now + self.ttl, now, self.name, self.owner))
+            conn.commit()
+            if cursor.rowcount == 1:
+                self._renewed_at = now
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    def release(self) -> None:
+        """Освобождает аренду (время старта сохраняется для min_gap)"""
+        conn = create_connection()
+        try:
+            conn.execute("""
+                UPDATE crawl_leases SET owner = NULL, expires_at = 0
+                WHERE name = ? AND owner = ?
+            """, (self.name, self.owner))
+            conn.commit()
+        finally:
+            conn.close()
+        self.acquired = False
+
+    def _heartbeat_loop(self) -> None:
+        while not self._stop.wait(max(self.ttl / 3, 1)):
+            try:
+                if not self.heartbeat():
+                    self.lost = True
+                    logger.error(f"Аренда {self.name} потеряна владельцем {self.owner}")
+                    return
+            except Exception as e:
+                logger.error(f"Ошибка продления аренды {self.name}: {e}")
+                if time.time() - self._renewed_at >= self.ttl:
+                    # Аренда уже истекла и могла перейти к другому процессу
+                    self.lost = True
+                    logger.error(f"Аренда {self.name} истекла: продлить ее не удалось за {self.ttl} с")
+                    return
+
+    def __enter__(self) -> 'CrawlLease':
+        if self.acquire():
+            self._heartbeat_thread = threading.Thread(
+                target=self._heartbeat_loop, name=f"lease-{self.name}", daemon=True
+            )
+            self._heartbeat_thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._stop.set()
+        if self._heartbeat_thread:
+            self._heartbeat_thread.join()
+        if self.acquired:
+            self.release()
@@ -0,0 +1,95 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import chain, zip_longest
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.config import Config
+from core.source_runner import SourceRunner
+from parsers.registry import CrawlTask, get_sources
+
+logger = logging.getLogger(__name__)
+
+
+def vacancy_key(vacancy: Any) -> Tuple[str, str]:
+    """Ключ дедупликации: источник и id вакансии на источнике (или ссылка)"""
+    return vacancy.source, vacancy.source_id or vacancy.original_url
+
+
+def interleave(tasks: List[CrawlTask]) -> List[CrawlTask]:
+    """Чередует задачи разных источников, чтобы медленный источник не занимал весь пул подряд"""
+    by_source: Dict[str, List[CrawlTask]] = {}
+    for task in tasks:
+        by_source.setdefault(task.source, []).append(task)
+    return [task for task in chain.from_iterable(zip_longest(*by_source.values())) if task is not None]
+
+
+class CrawlPlanner:
+    """Планирует и выполняет обход зарегистрированных источников с общим пулом потоков"""
+
+    def __init__(
+        self,
+        queries: Optional[List[str]] = None,
+        sources: Optional[List[str]] = None,
+        max_workers: Optional[int] = None,
+    ):
+        self.queries = queries or Config.SEARCH_QUERIES
+        self.sources = get_sources(sources or Config.CRAWL_SOURCES)
+        self.max_workers = max_workers or Config.CRAWL_CONCURRENCY
+        self.runners: Dict[str, SourceRunner] = {}
+        # У каждого потока свои экземпляры парсеров (requests.Session не потокобезопасна)
+        self._local = threading.local()
+
+    def parser(self, source: str):
+        """Парсер источника для текущего потока"""
+        parsers = getattr(self._local, 'parsers', None)
+        if parsers is None:
+            parsers = self._local.parsers = {}
+        if source not in parsers:
+            parsers[source] = self.sources[source].create_parser()
+        return parsers[source]
+
+    def base_tasks(self) -> List[CrawlTask]:
+        """Задачи всех источников для списка запросов"""
+        now = datetime.now(timezone.utc)
+        tasks = []
+        for source in self.sources.values():
+            tasks.extend(source.base_tasks(self.queries, now))
+        return interleave(tasks)
+
+    def _expand_task(self, task: CrawlTask) -> List[CrawlTask]:
+        return self.runners[task.source].expand(self.parser(task.source), task)
+
+    def _run_task(self, task: CrawlTask) -> list:
+        return self.runners[task.source].fetch(self.parser(task.source), task)
+
+    def plan(self, executor: ThreadPoolExecutor) -> List[CrawlTask]:
+        """Строит итоговый список задач (крупные поиски HH разбиваются на окна)"""
+        tasks = []
+        for expanded in executor.map(self._expand_task, self.base_tasks()):
+            tasks.extend(expanded)
+        return interleave(tasks)
+
+    def start(self) -> None:
+        """Начинает запуск обхода: срок обхода каждого источника отсчитывается отсюда"""
+        self.runners = {name: SourceRunner(source) for name, source in self.sources.items()}
+
+    def log_summary(self) -> None:
+        for runner in self.runners.values():
+            logger.info(f"Источник {runner.summary()}")
+
+    def run(self) -> list:
+        """Выполняет все задачи и возвращает вакансии без повторов между поисками"""
+        self.start()
+        unique: Dict[Tuple[str, str], Any] = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            tasks = self.plan(executor)
+            logger.info(f"Запланировано {len(tasks)} поисковых задач")
+            for task, vacancies in zip(tasks, executor.map(self._run_task, tasks)):
+                for vacancy in vacancies:
+                    unique.setdefault(vacancy_key(vacancy), vacancy)
+                logger.info(f"Задача {task.key}: {len(vacancies)} вакансий")
+        self.log_summary()
+        logger.info(f"После дедупликации осталось {len(unique)} вакансий")
+        return list(unique.values())
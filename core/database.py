@@ -1,18 +1,32 @@
 import sqlite3
 from sqlite3 import Error
+import hashlib
 import os
-from typing import Any, List, Optional, Dict
+import re
+import tempfile
+import threading
+import zlib
+from urllib.parse import quote
+from typing import Any, Callable, List, Optional, Dict, Sequence
 from datetime import datetime
 import logging
+from core.config import Config
+from core.timeutils import to_epoch
+from core.generation import watcher
+from core.companies import CompanyDirectory
+from core.dictionary import AliasDirectory
+from core.locations import LocationDirectory
+from core import rollups
+from core.salary import parse_salary
 
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    filename='database.log'
-)
 logger = logging.getLogger(__name__)
 
+EXCERPT_LENGTH = 200
+WHITESPACE_RE = re.compile(r"\s+")
+ARCHIVE_SCHEMA = "archive"
+
+_snapshot_lock = threading.Lock()
+
 
 def get_db_path() -> str:
     """Возвращает путь к файлу базы данных"""
@@ -22,7 +36,8 @@ def get_db_path() -> str:
 def create_connection():
     """Создает соединение с базой данных"""
     try:
-        conn = sqlite3.connect(get_db_path())
+        # uri=True: обычный путь открывается как раньше, а ATTACH принимает file:...?mode=ro
+        conn = sqlite3.connect(get_db_path(), uri=True)
         conn.row_factory = sqlite3.Row
         return conn
     except sqlite3.Error as e:
@@ -30,6 +45,68 @@ def create_connection():
         raise
 
 
+def get_snapshot_path() -> str:
+    """Возвращает путь к снимку базы данных для чтения"""
+    return Config.SNAPSHOT_DATABASE_PATH or os.path.join(os.path.dirname(get_db_path()), 'vacancies_snapshot.db')
+
+
+def create_read_connection():
+    """
+    Создает соединение для чтения: со снимком БД, если воркер его уже опубликовал, иначе с основной БД.
+    Снимок не меняется после публикации, поэтому открывается с immutable=1 (без блокировок)
+    и большим mmap; новый снимок подменяет файл атомарно, и его видят следующие соединения.
+    """
+    path = get_snapshot_path()
+    if not Config.READ_FROM_SNAPSHOT or not os.path.exists(path):
+        return create_connection()
+    try:
+        conn = sqlite3.connect(f"file:{quote(os.path.abspath(path))}?mode=ro&immutable=1", uri=True)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA mmap_size={Config.SNAPSHOT_MMAP_SIZE}")
+        return conn
+    except sqlite3.Error as e:
+        logger.error(f"Ошибка при открытии снимка БД: {e}")
+        raise
+
+
+def publish_snapshot() -> bool:
+    """Публикует снимок БД для веб-процесса: копия через backup API и атомарная подмена файла"""
+    # Парсинг и архивация публикуют снимок из разных потоков планировщика: по одному за раз
+    with _snapshot_lock:
+        return _publish_snapshot()
+
+
+def _publish_snapshot() -> bool:
+    path = get_snapshot_path()
+    # Уникальный временный файл в том же каталоге: os.replace атомарен только в пределах одной ФС
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.", suffix=".tmp",
+                                    dir=os.path.dirname(os.path.abspath(path)))
+    os.close(fd)
+    try:
+        # mkstemp создает файл с правами 0600, а снимок читает веб-процесс
+        os.chmod(tmp_path, 0o644)
+        source = create_connection()
+        target = sqlite3.connect(tmp_path)
+        try:
+            # Копия согласована: backup читает основную БД в одной транзакции, не блокируя запись
+            source.backup(target)
+            # Снимок читается с immutable=1, журнал WAL ему не нужен; статистика - для планировщика запросов
+            target.execute("PRAGMA journal_mode=DELETE")
+            target.execute("ANALYZE")
+            target.commit()
+        finally:
+            target.close()
+            source.close()
+        os.replace(tmp_path, path)
+        logger.info(f"Опубликован снимок БД {path}")
+        return True
+    except Exception as e:
+        logger.error(f"Ошибка при публикации снимка БД: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+
 def migrate_add_original_url_column(conn):
     """Добавляет столбец original_url, если его нет."""
     try:
@@ -46,12 +123,359 @@ def migrate_add_original_url_column(conn):
         print(f"Ошибка миграции original_url: {e}")
 
 
+def migrate_add_source_id_column(conn):
+    """Добавляет столбец source_id (id вакансии на источнике) и индекс по нему."""
+    try:
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA table_info(vacancies)")
+        columns = [row[1] for row in cursor.fetchall()]
+        if "source_id" not in columns:
+            cursor.execute(
+                "ALTER TABLE vacancies ADD COLUMN source_id TEXT NOT NULL DEFAULT ''"
+            )
+            logger.info("Столбец source_id успешно добавлен")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_vacancies_source_id ON vacancies(source, source_id)"
+        )
+        conn.commit()
+    except Error as e:
+        logger.error(f"Ошибка миграции source_id: {e}")
+
+
+def migrate_add_published_at_ts_column(conn, batch_size: int = 1000):
+    """
+    Добавляет published_at_ts (UTC-таймстамп) с индексом и заполняет его
+    для существующих строк, в которых published_at хранится в разных форматах.
+    """
+    try:
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA table_info(vacancies)")
+        columns = [row[1] for row in cursor.fetchall()]
+        if "published_at_ts" not in columns:
+            cursor.execute("ALTER TABLE vacancies ADD COLUMN published_at_ts INTEGER")
+            logger.info("Столбец published_at_ts успешно добавлен")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_vacancies_published_at_ts ON vacancies(published_at_ts)"
+        )
+        conn.commit()
+
+        # Заполняем пачками по id, чтобы не держать длинную транзакцию
+        last_id = 0
+        filled = 0
+        while True:
+            rows = cursor.execute(
+                "SELECT id, published_at FROM vacancies "
+                "WHERE published_at_ts IS NULL AND id > ? ORDER BY id LIMIT ?",
+                (last_id, batch_size)
+            ).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            updates = [(to_epoch(row[1]), row[0]) for row in rows]
+            cursor.executemany(
+                "UPDATE vacancies SET published_at_ts = ? WHERE id = ?",
+                [update for update in updates if update[0] is not None]
+            )
+            conn.commit()
+            filled += len(updates)
+        if filled:
+            logger.info(f"published_at_ts заполнен для {filled} вакансий")
+    except Error as e:
+        logger.error(f"Ошибка миграции published_at_ts: {e}")
+
+
+def compress_description(text: str) -> bytes:
+    """Сжимает описание для хранения в vacancy_descriptions"""
+    return zlib.compress((text or "").encode("utf-8"), 6)
+
+
+def decompress_description(body: Optional[bytes]) -> str:
+    return zlib.decompress(body).decode("utf-8") if body else ""
+
+
+def make_excerpt(text: str, length: int = EXCERPT_LENGTH) -> str:
+    """Короткий отрывок описания для списков: по границе слова, с многоточием"""
+    text = WHITESPACE_RE.sub(" ", text or "").strip()
+    if len(text) <= length:
+        return text
+    cut = text.rfind(" ", 0, length)
+    return text[:cut if cut > length // 2 else length].rstrip(" ,.;:") + "…"
+
+
+def migrate_move_descriptions(conn, batch_size: int = 500):
+    """
+    Переносит описания в отдельную таблицу vacancy_descriptions (zlib) и заполняет
+    vacancies.excerpt. В основной таблице описание обнуляется, чтобы она оставалась компактной.
+    """
+    try:
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA table_info(vacancies)")
+        columns = [row[1] for row in cursor.fetchall()]
+        if "excerpt" not in columns:
+            cursor.execute("ALTER TABLE vacancies ADD COLUMN excerpt TEXT")
+            logger.info("Столбец excerpt успешно добавлен")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS vacancy_descriptions (
+                vacancy_id INTEGER PRIMARY KEY,
+                body BLOB NOT NULL
+            )
+        """)
+        conn.commit()
+
+        moved = 0
+        while True:
+            rows = cursor.execute(
+                "SELECT id, description FROM vacancies WHERE description IS NOT NULL LIMIT ?",
+                (batch_size,)
+            ).fetchall()
+            if not rows:
+                break
+            cursor.executemany(
+                "INSERT OR REPLACE INTO vacancy_descriptions (vacancy_id, body) VALUES (?, ?)",
+                [(row[0], compress_description(row[1])) for row in rows]
+            )
+            cursor.executemany(
+                "UPDATE vacancies SET description = NULL, excerpt = ? WHERE id = ?",
+                [(make_excerpt(row[1]), row[0]) for row in rows]
+            )
+            conn.commit()
+            moved += len(rows)
+        if moved:
+            # Освобождаем страницы, которые занимали описания
+            cursor.execute("VACUUM")
+            logger.info(f"Описания {moved} вакансий перенесены в vacancy_descriptions")
+    except Error as e:
+        logger.error(f"Ошибка миграции описаний: {e}")
+
+
+def migrate_add_salary_columns(conn, batch_size: int = 1000):
+    """Добавляет числовые salary_from/salary_to/salary_currency и разбирает в них текст зарплаты"""
+    try:
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA table_info(vacancies)")
+        columns = [row[1] for row in cursor.fetchall()]
+        added = False
+        for column, column_type in (("salary_from", "INTEGER"), ("salary_to", "INTEGER"),
+                                    ("salary_currency", "TEXT")):
+            if column not in columns:
+                cursor.execute(f"ALTER TABLE vacancies ADD COLUMN {column} {column_type}")
+                added = True
+        conn.commit()
+        if not added:
+            return
+
+        last_id = 0
+        while True:
+            rows = cursor.execute(
+                "SELECT id, salary FROM vacancies WHERE id > ? AND salary IS NOT NULL ORDER BY id LIMIT ?",
+                (last_id, batch_size)
+            ).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            cursor.executemany(
+                "UPDATE vacancies SET salary_from = ?, salary_to = ?, salary_currency = ? WHERE id = ?",
+                [(*parse_salary(row[1]), row[0]) for row in rows]
+            )
+            conn.commit()
+        logger.info("Числовые поля зарплаты успешно заполнены")
+    except Error as e:
+        logger.error(f"Ошибка миграции полей зарплаты: {e}")
+
+
+def migrate_add_location_id_column(conn):
+    """
+    Создает справочник городов (locations + location_aliases), добавляет vacancies.location_id
+    с индексом и проставляет его существующим вакансиям.
+    """
+    try:
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA table_info(vacancies)")
+        columns = [row[1] for row in cursor.fetchall()]
+        if "location_id" not in columns:
+            cursor.execute("ALTER TABLE vacancies ADD COLUMN location_id INTEGER")
+            logger.info("Столбец location_id успешно добавлен")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_vacancies_location_id ON vacancies(location_id)"
+        )
+        directory = LocationDirectory()
+        directory.create_schema(conn)
+
+        locations = [row[0] for row in cursor.execute(
+            "SELECT DISTINCT location FROM vacancies WHERE location_id IS NULL"
+        ).fetchall()]
+        if locations:
+            location_ids = directory.get_or_create_many(conn, locations)
+            cursor.executemany(
+                "UPDATE vacancies SET location_id = ? WHERE location = ? AND location_id IS NULL",
+                [(location_id, location) for location, location_id in location_ids.items()]
+            )
+            logger.info(f"location_id проставлен для {len(locations)} вариантов написания городов")
+        conn.commit()
+    except Error as e:
+        logger.error(f"Ошибка миграции location_id: {e}")
+
+
+def migrate_add_company_id_column(conn):
+    """
+    Создает справочник компаний (companies + company_aliases), добавляет vacancies.company_id
+    с индексом и проставляет его существующим вакансиям.
+    """
+    try:
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA table_info(vacancies)")
+        columns = [row[1] for row in cursor.fetchall()]
+        if "company_id" not in columns:
+            cursor.execute("ALTER TABLE vacancies ADD COLUMN company_id INTEGER")
+            logger.info("Столбец company_id успешно добавлен")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_vacancies_company_id ON vacancies(company_id)"
+        )
+        directory = CompanyDirectory()
+        directory.create_schema(conn)
+
+        companies = [row[0] for row in cursor.execute(
+            "SELECT DISTINCT company FROM vacancies WHERE company_id IS NULL"
+        ).fetchall()]
+        if companies:
+            company_ids = directory.get_or_create_many(conn, companies)
+            cursor.executemany(
+                "UPDATE vacancies SET company_id = ? WHERE company = ? AND company_id IS NULL",
+                [(company_id, company) for company, company_id in company_ids.items()]
+            )
+            logger.info(f"company_id проставлен для {len(companies)} вариантов написания компаний")
+        conn.commit()
+    except Error as e:
+        logger.error(f"Ошибка миграции company_id: {e}")
+
+
+def migrate_fill_rollups(conn):
+    """Первый расчет дневных агрегатов для уже загруженных вакансий"""
+    try:
+        if conn.execute("SELECT 1 FROM daily_rollups LIMIT 1").fetchone():
+            return
+        if conn.execute("SELECT 1 FROM vacancies LIMIT 1").fetchone() or os.path.exists(get_archive_path()):
+            rebuild_rollups()
+    except Error as e:
+        logger.error(f"Ошибка расчета дневных агрегатов: {e}")
+
+
+def migrate_add_content_hash_column(conn):
+    """
+    Добавляет vacancies.content_hash и заполняет пустые source_id ссылкой на вакансию,
+    чтобы у каждой строки был ключ (source, source_id) для обновления при повторном обходе.
+    Хэш старых строк пуст: при первом обходе они один раз перезапишутся актуальными данными.
+    """
+    try:
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA table_info(vacancies)")
+        columns = [row[1] for row in cursor.fetchall()]
+        if "content_hash" in columns:
+            return
+        cursor.execute("ALTER TABLE vacancies ADD COLUMN content_hash TEXT")
+        cursor.execute("UPDATE vacancies SET source_id = original_url WHERE source_id = ''")
+        conn.commit()
+        logger.info("Столбец content_hash успешно добавлен")
+    except Error as e:
+        logger.error(f"Ошибка миграции content_hash: {e}")
+
+
+def migrate_add_description_partial_column(conn, batch_size: int = 500):
+    """
+    Добавляет vacancy_descriptions.partial: 1 - сохранен сниппет HH, а не полное описание карточки.
+    У старых строк HH сниппетом считается однострочное описание (полное собирается по строкам).
+    """
+    try:
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA table_info(vacancy_descriptions)")
+        columns = [row[1] for row in cursor.fetchall()]
+        if "partial" in columns:
+            return
+        cursor.execute("ALTER TABLE vacancy_descriptions ADD COLUMN partial INTEGER NOT NULL DEFAULT 0")
+        last_id = 0
+        while True:
+            rows = cursor.execute("""
+                SELECT d.vacancy_id, d.body FROM vacancy_descriptions d JOIN vacancies v ON v.id = d.vacancy_id
+                WHERE v.source = 'hh.ru' AND d.vacancy_id > ? ORDER BY d.vacancy_id LIMIT ?
+            """, (last_id, batch_size)).fetchall()
+            if not rows:
+                break
+            cursor.executemany(
+                "UPDATE vacancy_descriptions SET partial = 1 WHERE vacancy_id = ?",
+                [(row[0],) for row in rows if "\n" not in decompress_description(row[1])]
+            )
+            last_id = rows[-1][0]
+        conn.commit()
+        logger.info("Столбец partial успешно добавлен")
+    except Error as e:
+        logger.error(f"Ошибка миграции partial: {e}")
+
+
+# Журнал изменений значений подсказок (core/suggest.py): триггеры на vacancies пишут +1/-1 для названия,
+# компании и города с поколением данных, при котором изменение сделано. Триггеры ловят любую запись -
+# upsert, удаление дубликатов, перенос в архив, миграции, - и веб-процесс обновляет индексы по журналу.
+SUGGEST_VALUES_SQL = """
+    SELECT 'title' AS kind, {row}.title AS value
+    UNION ALL SELECT 'company', {row}.company
+    UNION ALL SELECT 'location', (SELECT name FROM locations WHERE id = {row}.location_id)
+"""
+
+SUGGEST_CHANGE_SQL = """
+    INSERT INTO suggest_changes (generation, kind, value, delta)
+    SELECT (SELECT generation FROM data_generation WHERE id = 1), kind, value, {delta}
+    FROM ({values}) WHERE value IS NOT NULL AND ({condition});
+"""
+
+SUGGEST_CHANGED_CONDITION = (
+    "(kind = 'title' AND OLD.title IS NOT NEW.title)"
+    " OR (kind = 'company' AND OLD.company IS NOT NEW.company)"
+    " OR (kind = 'location' AND OLD.location_id IS NOT NEW.location_id)"
+)
+
+
+def create_suggest_change_log(conn) -> None:
+    """Создает журнал изменений подсказок и триггеры, которые его заполняют"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS suggest_changes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            generation INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            value TEXT NOT NULL,
+            delta INTEGER NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_suggest_changes_generation ON suggest_changes(generation)")
+    old_values = SUGGEST_VALUES_SQL.format(row="OLD")
+    new_values = SUGGEST_VALUES_SQL.format(row="NEW")
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS suggest_vacancy_insert AFTER INSERT ON vacancies BEGIN
+            {SUGGEST_CHANGE_SQL.format(delta=1, values=new_values, condition=1)}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS suggest_vacancy_update AFTER UPDATE OF title, company, location_id
+        ON vacancies BEGIN
+            {SUGGEST_CHANGE_SQL.format(delta=-1, values=old_values, condition=SUGGEST_CHANGED_CONDITION)}
+            {SUGGEST_CHANGE_SQL.format(delta=1, values=new_values, condition=SUGGEST_CHANGED_CONDITION)}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS suggest_vacancy_delete AFTER DELETE ON vacancies BEGIN
+            {SUGGEST_CHANGE_SQL.format(delta=-1, values=old_values, condition=1)}
+        END
+    """)
+    conn.commit()
+
+
 def initialize_database():
     """Инициализирует базу данных"""
     try:
         conn = create_connection()
         cursor = conn.cursor()
 
+        # WAL: веб-процесс читает, пока воркер пишет
+        cursor.execute("PRAGMA journal_mode=WAL")
+
         # Создаем таблицу вакансий
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS vacancies (
@@ -64,11 +488,137 @@ def initialize_database():
                 published_at DATETIME NOT NULL,
                 source TEXT NOT NULL,
                 original_url TEXT NOT NULL,
+                source_id TEXT NOT NULL DEFAULT '',
+                published_at_ts INTEGER,
+                location_id INTEGER,
+                excerpt TEXT,
+                salary_from INTEGER,
+                salary_to INTEGER,
+                salary_currency TEXT,
+                content_hash TEXT,
+                company_id INTEGER,
                 UNIQUE(title, company, published_at)
             )
         """)
 
+        # Аренда обхода: только один процесс парсит вакансии за интервал
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS crawl_leases (
+                name TEXT PRIMARY KEY,
+                owner TEXT,
+                expires_at REAL NOT NULL DEFAULT 0,
+                heartbeat_at REAL,
+                last_started_at REAL
+            )
+        """)
+
+        # Счетчик поколений данных: воркер увеличивает после каждой записи,
+        # веб-процесс по нему сбрасывает свои кэши
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS data_generation (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                generation INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        cursor.execute(
+            "INSERT OR IGNORE INTO data_generation (id, generation, updated_at) VALUES (1, 0, 0)"
+        )
+
+        # Контрольные точки обхода: план задач запуска и число записанных страниц каждой задачи,
+        # чтобы прерванный обход продолжился с места остановки
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS crawl_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at REAL NOT NULL,
+                finished_at REAL
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS crawl_checkpoints (
+                run_id INTEGER NOT NULL,
+                task_key TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                source TEXT NOT NULL,
+                query TEXT NOT NULL,
+                region INTEGER,
+                date_from TEXT,
+                date_to TEXT,
+                pages_done INTEGER NOT NULL DEFAULT 0,
+                done INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL,
+                PRIMARY KEY (run_id, task_key)
+            )
+        """)
+
+        # Теги технологий вакансий (services/skill_tagger.py); ключ (tag, vacancy_id) - индекс фильтра tag=
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS vacancy_tags (
+                tag TEXT NOT NULL,
+                vacancy_id INTEGER NOT NULL,
+                PRIMARY KEY (tag, vacancy_id)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_vacancy_tags_vacancy_id ON vacancy_tags(vacancy_id)"
+        )
+
+        # Дневные агрегаты для дашбордов (core/rollups.py): день, источник, город
+        cursor.execute(rollups.CREATE_ROLLUPS_SQL)
+
+        # Сохраненные поиски пользователей и уведомления о новых вакансиях по ним (services/notifier.py)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS saved_searches (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                query TEXT NOT NULL DEFAULT '',
+                source TEXT NOT NULL DEFAULT '',
+                location TEXT NOT NULL DEFAULT '',
+                salary_min INTEGER,
+                created_at REAL NOT NULL
+            )
+        """)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_saved_searches_user_id ON saved_searches(user_id)"
+        )
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS notifications (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                vacancy_id INTEGER NOT NULL,
+                saved_search_id INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                sent_at REAL,
+                UNIQUE(user_id, vacancy_id)
+            )
+        """)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_notifications_pending ON notifications(sent_at, id)"
+        )
+        # Последняя вакансия, уже сверенная с сохраненными поисками
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS notifier_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                last_vacancy_id INTEGER NOT NULL
+            )
+        """)
+
         conn.commit()
+        migrate_add_original_url_column(conn)
+        migrate_add_source_id_column(conn)
+        migrate_add_published_at_ts_column(conn)
+        migrate_add_location_id_column(conn)
+        migrate_move_descriptions(conn)
+        migrate_add_salary_columns(conn)
+        migrate_add_content_hash_column(conn)
+        migrate_add_company_id_column(conn)
+        migrate_add_description_partial_column(conn)
+        migrate_fill_rollups(conn)
+        # Триггеры журнала подсказок - после миграций: массовое заполнение старых строк в журнал не попадает
+        create_suggest_change_log(conn)
+        # Схема архива - только в воркере: колонки, добавленные миграциями, появляются и в архиве
+        if os.path.exists(get_archive_path()):
+            attach_archive(conn)
         conn.close()
         logger.info("База данных успешно инициализирована")
     except Exception as e:
@@ -92,6 +642,15 @@ def create_table(conn) -> None:
                 published_at DATETIME NOT NULL,
                 source TEXT NOT NULL,
                 original_url TEXT NOT NULL,
+                source_id TEXT NOT NULL DEFAULT '',
+                published_at_ts INTEGER,
+                location_id INTEGER,
+                excerpt TEXT,
+                salary_from INTEGER,
+                salary_to INTEGER,
+                salary_currency TEXT,
+                content_hash TEXT,
+                company_id INTEGER,
                 UNIQUE(title, company, published_at)
             )
             """
@@ -101,40 +660,433 @@ def create_table(conn) -> None:
         print(f"Error of creating table: {e}")
 
 
-def insert_vacancy(vacancy: Dict[str, Any]) -> bool:
-    """Добавляет вакансию в базу данных"""
+VACANCY_COLUMNS = (
+    "title", "company", "location", "salary", "excerpt", "published_at", "source", "original_url",
+    "source_id", "published_at_ts", "location_id", "salary_from", "salary_to", "salary_currency",
+    "content_hash", "company_id"
+)
+
+INSERT_VACANCY_SQL = (
+    f"INSERT OR IGNORE INTO vacancies ({', '.join(VACANCY_COLUMNS)}) "
+    f"VALUES ({', '.join(':' + column for column in VACANCY_COLUMNS)})"
+)
+
+# source и source_id - ключ вакансии, при обновлении не меняются
+UPDATE_VACANCY_SQL = (
+    f"UPDATE OR IGNORE vacancies SET "
+    f"{', '.join(f'{column} = :{column}' for column in VACANCY_COLUMNS if column not in ('source', 'source_id'))} "
+    f"WHERE id = :id"
+)
+
+HASHED_FIELDS = ("title", "company", "location", "salary", "description", "published_at", "original_url")
+
+
+def content_hash(vacancy: Dict[str, Any]) -> str:
+    """Хэш содержимого вакансии: по нему повторный обход понимает, изменилась ли она"""
+    digest = hashlib.blake2b(digest_size=16)
+    for field in HASHED_FIELDS:
+        value = vacancy.get(field)
+        digest.update(("" if value is None else str(value)).encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+def prepare_vacancy(vacancy: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Готовит строку для записи: выдержка, сжатое описание, таймстамп, разобранная зарплата и хэш содержимого.
+    Вся работа на CPU делается здесь, до транзакции записи.
+    """
+    description = vacancy.get('description', '')
+    salary_from, salary_to, salary_currency = parse_salary(vacancy.get('salary'))
+    return {
+        'title': vacancy['title'],
+        'company': vacancy['company'],
+        'location': vacancy['location'],
+        'salary': vacancy.get('salary'),
+        'excerpt': make_excerpt(description),
+        'published_at': vacancy['published_at'],
+        'source': vacancy['source'],
+        'original_url': vacancy['original_url'],
+        # Ключ вакансии на источнике: id, а если его нет - ссылка
+        'source_id': vacancy.get('source_id') or vacancy['original_url'],
+        'published_at_ts': to_epoch(vacancy['published_at']),
+        'location_id': vacancy.get('location_id'),
+        'salary_from': salary_from,
+        'salary_to': salary_to,
+        'salary_currency': salary_currency,
+        'content_hash': content_hash(vacancy),
+        'company_id': vacancy.get('company_id'),
+        'body': compress_description(description),
+        # Теги технологий, если их извлек конвейер загрузки (None - не трогать сохраненные)
+        'tags': vacancy.get('tags'),
+        # Описание неполное (сниппет): сохраненное полное описание не заменяется
+        'description_partial': bool(vacancy.get('description_partial'))
+    }
+
+
+def get_stored_hashes(cursor, rows: List[Dict[str, Any]]) -> Dict[tuple, tuple]:
+    """(source, source_id) -> (id, content_hash) уже сохраненных вакансий из пачки"""
+    keys_by_source: Dict[str, List[str]] = {}
+    for row in rows:
+        keys_by_source.setdefault(row['source'], []).append(row['source_id'])
+    stored = {}
+    for source, source_ids in keys_by_source.items():
+        # SQLite ограничивает число параметров запроса, поэтому идем пачками
+        for start in range(0, len(source_ids), 500):
+            chunk = source_ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            cursor.execute(
+                f"SELECT source_id, id, content_hash FROM vacancies "
+                f"WHERE source = ? AND source_id IN ({placeholders})",
+                [source, *chunk]
+            )
+            stored.update(((source, row[0]), (row[1], row[2])) for row in cursor.fetchall())
+    return stored
+
+
+def get_stored_descriptions(source: str, source_ids: List[str]) -> Dict[str, tuple]:
+    """
+    source_id -> (published_at_ts, описание) сохраненных вакансий источника с полным описанием
+    (строки, где сохранен только сниппет, не возвращаются)
+    """
+    stored = {}
+    conn = create_connection()
+    try:
+        for start in range(0, len(source_ids), 500):
+            chunk = source_ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(f"""
+                SELECT v.source_id, v.published_at_ts, d.body
+                FROM vacancies v JOIN vacancy_descriptions d ON d.vacancy_id = v.id
+                WHERE v.source = ? AND v.source_id IN ({placeholders}) AND d.partial = 0
+            """, [source, *chunk])
+            stored.update((row[0], (row[1], decompress_description(row[2]))) for row in rows)
+        return stored
+    finally:
+        conn.close()
+
+
+def replace_vacancy_tags(cursor, vacancy_id: int, tags: List[str]) -> None:
+    """Заменяет теги вакансии (теги выводятся из содержимого и меняются вместе с ним)"""
+    cursor.execute("DELETE FROM vacancy_tags WHERE vacancy_id = ?", (vacancy_id,))
+    cursor.executemany(
+        "INSERT OR IGNORE INTO vacancy_tags (tag, vacancy_id) VALUES (?, ?)",
+        [(tag, vacancy_id) for tag in tags]
+    )
+
+
+def keep_stored_description(cursor, row: Dict[str, Any], vacancy_id: int) -> Dict[str, Any]:
+    """
+    Строка со сниппетом вместо полного описания (карточку HH загрузить не удалось): остальные поля
+    сравниваются и обновляются, а сохраненные описание, выдержка и теги остаются прежними.
+    """
+    stored = cursor.execute("""
+        SELECT v.excerpt, d.body FROM vacancies v LEFT JOIN vacancy_descriptions d ON d.vacancy_id = v.id
+        WHERE v.id = ?
+    """, (vacancy_id,)).fetchone()
+    if stored is None or stored[1] is None:
+        return row
+    return {
+        **row,
+        'excerpt': stored[0],
+        'content_hash': content_hash({**row, 'description': decompress_description(stored[1])}),
+        'body': None,
+        'tags': None,
+    }
+
+
+def upsert_prepared_vacancies(rows: List[Dict[str, Any]],
+                              in_transaction: Optional[Callable[[sqlite3.Cursor], None]] = None) -> Dict[str, int]:
+    """
+    Записывает подготовленные строки одной транзакцией по ключу (source, source_id):
+    новые добавляет, изменившиеся (другой хэш содержимого) обновляет, неизменные не трогает.
+    Дневные агрегаты (core/rollups.py) обновляются в той же транзакции.
+    in_transaction дописывает свои данные в ту же транзакцию (например, контрольную точку обхода).
+    Возвращает счетчики new / changed / unchanged.
+    """
+    counts = {'new': 0, 'changed': 0, 'unchanged': 0}
+    delta = rollups.RollupDelta()
+    conn = create_connection()
     try:
-        conn = create_connection()
         cursor = conn.cursor()
-        cursor.execute("""
-            INSERT OR IGNORE INTO vacancies (
-                title, company, location, salary, 
-                description, published_at, source, original_url
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            vacancy['title'],
-            vacancy['company'],
-            vacancy['location'],
-            vacancy.get('salary'),
-            vacancy.get('description', ''),
-            vacancy['published_at'],
-            vacancy['source'],
-            vacancy['original_url']
-        ))
+        stored = get_stored_hashes(cursor, rows)
+        for row in rows:
+            existing = stored.get((row['source'], row['source_id']))
+            if existing is not None and row['description_partial'] and existing[1] != row['content_hash']:
+                row = keep_stored_description(cursor, row, existing[0])
+            if existing is None:
+                cursor.execute(INSERT_VACANCY_SQL, row)
+                if cursor.rowcount != 1:
+                    # Та же вакансия под другим ключом (title, company, published_at)
+                    counts['unchanged'] += 1
+                    continue
+                vacancy_id = cursor.lastrowid
+                # Повтор ключа внутри пачки обновит только что добавленную строку
+                stored[(row['source'], row['source_id'])] = (vacancy_id, row['content_hash'])
+                counts['new'] += 1
+            elif existing[1] == row['content_hash']:
+                counts['unchanged'] += 1
+                continue
+            else:
+                vacancy_id = existing[0]
+                previous = rollups.fetch_rollup_row(cursor, vacancy_id)
+                cursor.execute(UPDATE_VACANCY_SQL, {**row, 'id': vacancy_id})
+                if cursor.rowcount != 1:
+                    counts['unchanged'] += 1
+                    continue
+                if previous is not None:
+                    delta.add(previous, -1)
+                stored[(row['source'], row['source_id'])] = (vacancy_id, row['content_hash'])
+                counts['changed'] += 1
+            if row['body'] is not None:
+                cursor.execute(
+                    "INSERT OR REPLACE INTO vacancy_descriptions (vacancy_id, body, partial) VALUES (?, ?, ?)",
+                    (vacancy_id, row['body'], int(row['description_partial']))
+                )
+            if row.get('tags') is not None:
+                replace_vacancy_tags(cursor, vacancy_id, row['tags'])
+            delta.add(row)
+        delta.apply(cursor)
+        if in_transaction is not None:
+            in_transaction(cursor)
         conn.commit()
+        return counts
+    finally:
         conn.close()
+
+
+def insert_vacancy(vacancy: Dict[str, Any]) -> bool:
+    """
+    Добавляет или обновляет вакансию (описание - сжатым в vacancy_descriptions).
+    Город и компания сопоставляются со справочниками, как в конвейере загрузки: фильтры location=
+    и company= идут по location_id и company_id.
+    """
+    try:
+        vacancy = dict(vacancy)
+        if vacancy.get('location_id') is None and vacancy.get('location'):
+            vacancy['location_id'] = resolve_location_ids([vacancy['location']])[vacancy['location']]
+        if vacancy.get('company_id') is None and vacancy.get('company'):
+            vacancy['company_id'] = resolve_company_ids([vacancy['company']])[vacancy['company']]
+        upsert_prepared_vacancies([prepare_vacancy(vacancy)])
         return True
     except Exception as e:
         logger.error(f"Ошибка при добавлении вакансии: {e}")
         return False
 
 
+def bump_data_generation() -> None:
+    """Сообщает читателям, что данные изменились"""
+    try:
+        conn = create_connection()
+        conn.execute(
+            "UPDATE data_generation SET generation = generation + 1, updated_at = ? WHERE id = 1",
+            (datetime.now().timestamp(),)
+        )
+        # Старые изменения подсказок больше не нужны: отставший читатель перестроит индекс целиком
+        conn.execute(
+            "DELETE FROM suggest_changes WHERE generation < "
+            "(SELECT generation FROM data_generation WHERE id = 1) - ?",
+            (Config.SUGGEST_CHANGE_LOG_GENERATIONS,)
+        )
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        logger.error(f"Ошибка при обновлении поколения данных: {e}")
+
+
+def get_data_generation() -> int:
+    """Текущее поколение данных (дешевый сигнал об изменениях)"""
+    try:
+        conn = create_read_connection()
+        row = conn.execute("SELECT generation FROM data_generation WHERE id = 1").fetchone()
+        conn.close()
+        return row[0] if row else 0
+    except Exception as e:
+        logger.error(f"Ошибка при получении поколения данных: {e}")
+        return 0
+
+
+_directories: Dict[type, tuple] = {}
+
+
+def _get_directory(directory_cls: type) -> AliasDirectory:
+    """Справочник в памяти; перечитывается при смене поколения данных"""
+    generation = watcher.current()
+    cached = _directories.get(directory_cls)
+    if cached is None or cached[0] != generation:
+        conn = create_read_connection()
+        try:
+            cached = (generation, directory_cls().load(conn))
+            _directories[directory_cls] = cached
+        finally:
+            conn.close()
+    return cached[1]
+
+
+def get_location_directory() -> LocationDirectory:
+    """Справочник городов в памяти; перечитывается при смене поколения данных"""
+    return _get_directory(LocationDirectory)
+
+
+def get_company_directory() -> CompanyDirectory:
+    """Справочник компаний в памяти; перечитывается при смене поколения данных"""
+    return _get_directory(CompanyDirectory)
+
+
+def _resolve_ids(directory_cls: type, values: List[str],
+                 directory: Optional[AliasDirectory]) -> Dict[str, Optional[int]]:
+    if directory is not None:
+        known = {value: directory.resolve(value) for value in set(values)}
+        if all(entity_id is not None or not directory.normalize(value)
+               for value, entity_id in known.items()):
+            return known
+    conn = create_connection()
+    try:
+        if directory is None:
+            directory = directory_cls().load(conn)
+        return directory.get_or_create_many(conn, values)
+    finally:
+        conn.close()
+
+
+def resolve_location_ids(locations: List[str],
+                         directory: Optional[LocationDirectory] = None) -> Dict[str, Optional[int]]:
+    """
+    Сопоставляет названия городов с id справочника, добавляя новые города.
+    directory - уже загруженный справочник, который переиспользуется между вызовами.
+    """
+    return _resolve_ids(LocationDirectory, locations, directory)
+
+
+def resolve_company_ids(companies: List[str],
+                        directory: Optional[CompanyDirectory] = None) -> Dict[str, Optional[int]]:
+    """Сопоставляет названия компаний с id справочника, добавляя новые компании"""
+    return _resolve_ids(CompanyDirectory, companies, directory)
+
+
+def get_archive_path() -> str:
+    """Возвращает путь к файлу архивной базы данных"""
+    return Config.ARCHIVE_DATABASE_PATH or os.path.join(os.path.dirname(get_db_path()), 'vacancies_archive.db')
+
+
+def attach_archive_readonly(conn) -> bool:
+    """
+    Подключает архивную БД только для чтения (для веб-процесса): без создания файла и схемы.
+    Возвращает False, если архива еще нет - тогда искать в нем нечего.
+    """
+    if any(row[1] == ARCHIVE_SCHEMA for row in conn.execute("PRAGMA database_list")):
+        return True
+    path = get_archive_path()
+    if not os.path.exists(path):
+        return False
+    conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (f"file:{quote(os.path.abspath(path))}?mode=ro",))
+    return True
+
+
+def attach_archive(conn) -> None:
+    """Подключает архивную БД к соединению как схему archive и создает в ней таблицы (только воркер)"""
+    if any(row[1] == ARCHIVE_SCHEMA for row in conn.execute("PRAGMA database_list")):
+        return
+    conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (get_archive_path(),))
+    conn.execute(f"PRAGMA {ARCHIVE_SCHEMA}.journal_mode=WAL")
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.vacancies (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL,
+            company TEXT NOT NULL,
+            published_at DATETIME NOT NULL,
+            UNIQUE(title, company, published_at)
+        )
+    """)
+    # Остальные колонки повторяют основную таблицу, включая добавленные миграциями
+    archived = {row[1] for row in conn.execute(f"PRAGMA {ARCHIVE_SCHEMA}.table_info(vacancies)")}
+    for row in conn.execute("PRAGMA main.table_info(vacancies)").fetchall():
+        if row[1] not in archived:
+            default = f" DEFAULT {row[4]}" if row[4] is not None else ""
+            conn.execute(f"ALTER TABLE {ARCHIVE_SCHEMA}.vacancies ADD COLUMN {row[1]} {row[2]}{default}")
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.vacancy_descriptions (
+            vacancy_id INTEGER PRIMARY KEY,
+            body BLOB NOT NULL
+        )
+    """)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.vacancy_tags (
+            tag TEXT NOT NULL,
+            vacancy_id INTEGER NOT NULL,
+            PRIMARY KEY (tag, vacancy_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_vacancies_published_at_ts ON vacancies(published_at_ts)"
+    )
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_vacancies_location_id ON vacancies(location_id)"
+    )
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_vacancies_company_id ON vacancies(company_id)"
+    )
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_vacancies_source_id ON vacancies(source, source_id)"
+    )
+    conn.commit()
+
+
+def archive_old_vacancies(max_age_days: Optional[int] = None, batch_size: Optional[int] = None) -> int:
+    """Переносит вакансии старше max_age_days дней в архивную БД пачками; возвращает число перенесенных"""
+    max_age_days = max_age_days if max_age_days is not None else Config.ARCHIVE_AFTER_DAYS
+    batch_size = batch_size or Config.ARCHIVE_BATCH_SIZE
+    cutoff = int(datetime.now().timestamp()) - max_age_days * 86400
+    moved = 0
+    try:
+        conn = create_connection()
+        try:
+            attach_archive(conn)
+            columns = ", ".join(row[1] for row in conn.execute("PRAGMA main.table_info(vacancies)"))
+            while True:
+                ids = [row[0] for row in conn.execute(
+                    "SELECT id FROM main.vacancies WHERE published_at_ts < ? ORDER BY published_at_ts LIMIT ?",
+                    (cutoff, batch_size)
+                )]
+                if not ids:
+                    break
+                placeholders = ",".join("?" * len(ids))
+                # Пачка переносится одной транзакцией, блокировка записи держится недолго.
+                # В режиме WAL транзакция над двумя файлами не атомарна целиком, поэтому
+                # копирование идемпотентно: после сбоя пачка просто переносится повторно
+                with conn:
+                    conn.execute(f"""
+                        INSERT OR IGNORE INTO {ARCHIVE_SCHEMA}.vacancies ({columns})
+                        SELECT {columns} FROM main.vacancies WHERE id IN ({placeholders})
+                    """, ids)
+                    conn.execute(f"""
+                        INSERT OR REPLACE INTO {ARCHIVE_SCHEMA}.vacancy_descriptions (vacancy_id, body)
+                        SELECT vacancy_id, body FROM main.vacancy_descriptions
+                        WHERE vacancy_id IN (SELECT id FROM {ARCHIVE_SCHEMA}.vacancies WHERE id IN ({placeholders}))
+                    """, ids)
+                    conn.execute(f"""
+                        INSERT OR IGNORE INTO {ARCHIVE_SCHEMA}.vacancy_tags (tag, vacancy_id)
+                        SELECT tag, vacancy_id FROM main.vacancy_tags
+                        WHERE vacancy_id IN (SELECT id FROM {ARCHIVE_SCHEMA}.vacancies WHERE id IN ({placeholders}))
+                    """, ids)
+                    conn.execute(f"DELETE FROM main.vacancy_descriptions WHERE vacancy_id IN ({placeholders})", ids)
+                    conn.execute(f"DELETE FROM main.vacancy_tags WHERE vacancy_id IN ({placeholders})", ids)
+                    conn.execute(f"DELETE FROM main.vacancies WHERE id IN ({placeholders})", ids)
+                moved += len(ids)
+        finally:
+            conn.close()
+        logger.info(f"В архив перенесено {moved} вакансий старше {max_age_days} дней")
+    except Exception as e:
+        logger.error(f"Ошибка при архивации вакансий: {e}")
+    return moved
+
+
 def get_all_vacancies() -> List[Dict[str, Any]]:
     """Получает все вакансии из базы данных"""
     try:
-        conn = create_connection()
+        conn = create_read_connection()
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM vacancies ORDER BY published_at DESC")
+        cursor.execute("SELECT * FROM vacancies ORDER BY published_at_ts DESC")
         vacancies = [dict(row) for row in cursor.fetchall()]
         conn.close()
         return vacancies
@@ -146,15 +1098,15 @@ def get_all_vacancies() -> List[Dict[str, Any]]:
 def search_vacancies(query: str) -> List[Dict[str, Any]]:
     """Поиск вакансий по запросу"""
     try:
-        conn = create_connection()
+        conn = create_read_connection()
         cursor = conn.cursor()
         search_pattern = f"%{query}%"
         cursor.execute("""
             SELECT * FROM vacancies 
             WHERE title LIKE ? 
             OR company LIKE ? 
-            OR description LIKE ?
-            ORDER BY published_at DESC
+            OR excerpt LIKE ?
+            ORDER BY published_at_ts DESC
         """, (search_pattern, search_pattern, search_pattern))
         vacancies = [dict(row) for row in cursor.fetchall()]
         conn.close()
@@ -164,6 +1116,60 @@ def search_vacancies(query: str) -> List[Dict[str, Any]]:
         return []
 
 
+# Допустимые поля сортировки: дата сортируется по индексированному таймстампу
+ORDER_BY_COLUMNS = {
+    "id": "id",
+    "published_at": "published_at_ts",
+    "title": "title",
+    "company": "company",
+    "location": "location",
+    "source": "source",
+}
+
+
+def _build_filters(query="", location="", company="", since=None, until=None, tag="", schema="main"):
+    """
+    Собирает условие WHERE и параметры для фильтров списка вакансий.
+    schema - схема, в которой искать теги (main или archive для второй части UNION ALL).
+    """
+    sql = " WHERE 1=1"
+    params = []
+    if schema != "main":
+        # Вакансия, уже перенесенная в архив, но еще видная в снимке, не считается дважды
+        sql += " AND id NOT IN (SELECT id FROM main.vacancies)"
+    if query:
+        sql += " AND (title LIKE ? OR company LIKE ? OR location LIKE ? OR excerpt LIKE ?)"
+        params.extend(["%" + query + "%"] * 4)
+    if location:
+        # Город сопоставляется со справочником в памяти, а фильтр идет по индексу location_id
+        location_ids = get_location_directory().match_ids(location)
+        if location_ids:
+            sql += f" AND location_id IN ({','.join('?' * len(location_ids))})"
+            params.extend(location_ids)
+        else:
+            sql += " AND 0"
+    if company:
+        # Компания тоже ищется по справочнику («Яндекс», «ООО Яндекс», «yandex» - одна запись)
+        company_ids = get_company_directory().match_ids(company)
+        if company_ids:
+            sql += f" AND company_id IN ({','.join('?' * len(company_ids))})"
+            params.extend(company_ids)
+        else:
+            sql += " AND 0"
+    # Диапазон по времени публикации использует индекс idx_vacancies_published_at_ts
+    if since is not None:
+        sql += " AND published_at_ts >= ?"
+        params.append(since)
+    if until is not None:
+        sql += " AND published_at_ts < ?"
+        params.append(until)
+    if tag:
+        # Поиск по первичному ключу (tag, vacancy_id) вместо LIKE по описаниям
+        sql += f" AND id IN (SELECT vacancy_id FROM {schema}.vacancy_tags WHERE tag = ?)"
+        params.append(tag)
+    return sql, params
+
+
 def get_filtered_vacancies(
         query="",
         location="",
@@ -172,30 +1178,37 @@ def get_filtered_vacancies(
         per_page=50,
         order_by="id",
         order_direction="DESC",
+        since=None,
+        until=None,
+        include_archived=False,
+        tag="",
 ) -> list:
     """
     Получает отфильтрованные вакансии из базы данных с поддержкой пагинации.
     Фильтрация выполняется на уровне SQL запроса для повышения производительности.
+    since/until - границы published_at_ts (UTC-таймстамп).
+    include_archived - искать также в архивной БД.
+    tag - тег технологии (каноническое имя из services/skill_tagger.py).
     """
-    conn = create_connection()
+    conn = create_read_connection()
     vacancies = []
     try:
         cursor = conn.cursor()
         # Базовый SQL запрос
-        sql = "SELECT id, title, company, location, salary, description, published_at, source, original_url FROM vacancies WHERE 1=1"
-        params = []
-        # Добавляем условия для фильтрации
-        if query:
-            sql += " AND (title LIKE ? OR company LIKE ? OR location LIKE ? OR description LIKE ?)"
-            params.extend(["%" + query + "%"] * 4)
-        if location:
-            sql += " AND location LIKE ?"
-            params.append("%" + location + "%")
-        if company:
-            sql += " AND company LIKE ?"
-            params.append("%" + company + "%")
-        # Добавляем сортировку и пагинацию
-        sql += f" ORDER BY {order_by} {order_direction} LIMIT ? OFFSET ?"
+        columns = "id, title, company, location, salary, excerpt, published_at, source, original_url, published_at_ts"
+        where, params = _build_filters(query, location, company, since, until, tag)
+        if include_archived and attach_archive_readonly(conn):
+            # Каждая часть UNION ALL фильтруется по индексам своей таблицы
+            archive_where, _ = _build_filters(query, location, company, since, until, tag, ARCHIVE_SCHEMA)
+            sql = (f"SELECT {columns} FROM main.vacancies{where} "
+                   f"UNION ALL SELECT {columns} FROM {ARCHIVE_SCHEMA}.vacancies{archive_where}")
+            params = params * 2
+        else:
+            sql = f"SELECT {columns} FROM vacancies{where}"
+        # Добавляем сортировку и пагинацию (только по разрешенным полям)
+        column = ORDER_BY_COLUMNS.get(order_by, "id")
+        direction = "ASC" if str(order_direction).upper() == "ASC" else "DESC"
+        sql += f" ORDER BY {column} {direction} LIMIT ? OFFSET ?"
         offset = (page - 1) * per_page
         params.extend([per_page, offset])
         # Выполняем запрос
@@ -209,7 +1222,7 @@ def get_filtered_vacancies(
                 "company": row[2],
                 "location": row[3],
                 "salary": row[4],
-                "description": row[5],
+                "excerpt": row[5],
                 "published_at": row[6],
                 "source": row[7],
                 "original_url": row[8],
@@ -222,31 +1235,45 @@ def get_filtered_vacancies(
     return vacancies
 
 
-def get_total_vacancies_count(query="", location="", company="") -> int:
-    """Возвращает общее количество вакансий"""
+def get_descriptions(vacancy_ids: List[int], include_archived: bool = False) -> Dict[int, str]:
+    """Полные описания для набора вакансий (загружаются только по запросу)"""
+    if not vacancy_ids:
+        return {}
     try:
-        conn = create_connection()
-        cursor = conn.cursor()
-
-        # Базовый SQL запрос
-        sql = "SELECT COUNT(*) FROM vacancies WHERE 1=1"
-        params = []
-
-        # Добавляем условия фильтрации
-        if query:
-            sql += " AND (title LIKE ? OR company LIKE ? OR description LIKE ?)"
-            search_pattern = f"%{query}%"
-            params.extend([search_pattern] * 3)
+        conn = create_read_connection()
+        placeholders = ",".join("?" * len(vacancy_ids))
+        sql = f"SELECT vacancy_id, body FROM main.vacancy_descriptions WHERE vacancy_id IN ({placeholders})"
+        params = list(vacancy_ids)
+        if include_archived and attach_archive_readonly(conn):
+            sql += (f" UNION ALL SELECT vacancy_id, body FROM {ARCHIVE_SCHEMA}.vacancy_descriptions"
+                    f" WHERE vacancy_id IN ({placeholders})")
+            params = params * 2
+        rows = conn.execute(sql, params).fetchall()
+        conn.close()
+        return {row[0]: decompress_description(row[1]) for row in rows}
+    except Exception as e:
+        logger.error(f"Ошибка при получении описаний вакансий: {e}")
+        return {}
 
-        if location:
-            sql += " AND location LIKE ?"
-            params.append(f"%{location}%")
 
-        if company:
-            sql += " AND company LIKE ?"
-            params.append(f"%{company}%")
+def get_total_vacancies_count(query="", location="", company="", since=None, until=None,
+                              include_archived=False, tag="") -> int:
+    """Возвращает общее количество вакансий"""
+    try:
+        conn = create_read_connection()
+        cursor = conn.cursor()
 
-        cursor.execute(sql, params)
+        # Те же условия фильтрации, что и у списка вакансий
+        where, params = _build_filters(query, location, company, since, until, tag)
+        if include_archived and attach_archive_readonly(conn):
+            archive_where, _ = _build_filters(query, location, company, since, until, tag, ARCHIVE_SCHEMA)
+            cursor.execute(
+                f"SELECT (SELECT COUNT(*) FROM main.vacancies{where})"
+                f" + (SELECT COUNT(*) FROM {ARCHIVE_SCHEMA}.vacancies{archive_where})",
+                params * 2
+            )
+        else:
+            cursor.execute("SELECT COUNT(*) FROM vacancies" + where, params)
         count = cursor.fetchone()[0]
         conn.close()
         return count
@@ -269,6 +1296,15 @@ def remove_duplicates() -> None:
             GROUP BY title, company, published_at
         """)
 
+        # Вклад удаляемых вакансий вычитается из дневных агрегатов
+        delta = rollups.RollupDelta()
+        for row in cursor.execute(f"""
+            SELECT {', '.join(rollups.ROLLUP_COLUMNS)} FROM vacancies
+            WHERE id NOT IN (SELECT id FROM temp_vacancies)
+        """).fetchall():
+            delta.add(row, -1)
+        delta.apply(cursor)
+
         # Удаляем все вакансии, кроме тех, что в временной таблице
         cursor.execute("""
             DELETE FROM vacancies
@@ -278,6 +1314,16 @@ def remove_duplicates() -> None:
         # Удаляем временную таблицу
         cursor.execute("DROP TABLE temp_vacancies")
 
+        # Описания и теги удаленных вакансий больше не нужны
+        cursor.execute("""
+            DELETE FROM vacancy_descriptions
+            WHERE vacancy_id NOT IN (SELECT id FROM vacancies)
+        """)
+        cursor.execute("""
+            DELETE FROM vacancy_tags
+            WHERE vacancy_id NOT IN (SELECT id FROM vacancies)
+        """)
+
         conn.commit()
         conn.close()
         logger.info("Дубликаты вакансий успешно удалены")
@@ -288,7 +1334,7 @@ def remove_duplicates() -> None:
 def get_unique_sources() -> list:
     """Получает список уникальных источников вакансий"""
     try:
-        conn = create_connection()
+        conn = create_read_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT DISTINCT source FROM vacancies")
         sources = [row[0] for row in cursor.fetchall()]
@@ -300,25 +1346,88 @@ def get_unique_sources() -> list:
 
 
 def get_unique_cities() -> list:
-    """Получает список уникальных городов"""
+    """Получает список уникальных городов (канонические имена из справочника)"""
     try:
-        conn = create_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT DISTINCT location FROM vacancies")
-        cities = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        return cities
+        return get_location_directory().names()
     except Exception as e:
         logger.error(f"Ошибка при получении списка городов: {e}")
         return []
 
 
+def get_company_counts(limit: int = 50) -> List[Dict[str, Any]]:
+    """Компании с числом вакансий, от самых крупных (группировка по индексу company_id)"""
+    try:
+        conn = create_read_connection()
+        rows = conn.execute("""
+            SELECT company_id, COUNT(*) FROM vacancies
+            WHERE company_id IS NOT NULL
+            GROUP BY company_id
+            ORDER BY COUNT(*) DESC, company_id
+            LIMIT ?
+        """, (limit,)).fetchall()
+        conn.close()
+        directory = get_company_directory()
+        return [{'id': company_id, 'name': directory.name(company_id), 'count': count}
+                for company_id, count in rows]
+    except Exception as e:
+        logger.error(f"Ошибка при получении числа вакансий по компаниям: {e}")
+        return []
+
+
+def rebuild_rollups() -> int:
+    """Пересчитывает дневные агрегаты по основной БД и архиву; возвращает число строк агрегатов"""
+    conn = create_connection()
+    try:
+        attach_archive(conn)
+        count = rollups.rebuild(conn, ARCHIVE_SCHEMA)
+        logger.info(f"Дневные агрегаты пересчитаны: {count} строк")
+        return count
+    finally:
+        conn.close()
+
+
+def get_rollup_summary() -> Dict[str, Any]:
+    """Итоги для главной страницы из дневных агрегатов (без прохода по вакансиям)"""
+    try:
+        conn = create_read_connection()
+        try:
+            return rollups.summary(conn)
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.error(f"Ошибка при получении итогов: {e}")
+        return {"total_vacancies": 0, "sources_count": 0, "salary_percent": 0}
+
+
+def get_daily_stats(days: int = 30, source: str = "",
+                    location_ids: Optional[Sequence[int]] = None) -> List[Dict[str, Any]]:
+    """Вакансии и зарплаты по дням и источникам за последние days дней (из дневных агрегатов)"""
+    since_day = rollups.rollup_day(int(datetime.now().timestamp()) - (days - 1) * 86400)
+    conn = create_read_connection()
+    try:
+        return rollups.daily(conn, since_day, source, location_ids)
+    finally:
+        conn.close()
+
+
+def get_unique_tags() -> list:
+    """Теги технологий, встречающиеся в вакансиях, от самых частых"""
+    try:
+        conn = create_read_connection()
+        rows = conn.execute("SELECT tag FROM vacancy_tags GROUP BY tag ORDER BY COUNT(*) DESC, tag").fetchall()
+        conn.close()
+        return [row[0] for row in rows]
+    except Exception as e:
+        logger.error(f"Ошибка при получении списка тегов: {e}")
+        return []
+
+
 def get_vacancies(limit: int = 50) -> List[Dict[str, Any]]:
     """Получает список вакансий с ограничением по количеству"""
     try:
-        conn = create_connection()
+        conn = create_read_connection()
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM vacancies ORDER BY published_at DESC LIMIT ?", (limit,))
+        cursor.execute("SELECT * FROM vacancies ORDER BY published_at_ts DESC LIMIT ?", (limit,))
         vacancies = [dict(row) for row in cursor.fetchall()]
         conn.close()
         return vacancies
@@ -328,14 +1437,31 @@ def get_vacancies(limit: int = 50) -> List[Dict[str, Any]]:
 
 
 def get_vacancy_by_id(vacancy_id: int) -> Optional[Dict[str, Any]]:
-    """Получает вакансию по ID"""
+    """Получает вакансию по ID (если ее уже нет в основной таблице - из архива)"""
     try:
-        conn = create_connection()
+        conn = create_read_connection()
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM vacancies WHERE id = ?", (vacancy_id,))
+        cursor.execute("""
+            SELECT v.*, d.body AS description_body
+            FROM vacancies v LEFT JOIN vacancy_descriptions d ON d.vacancy_id = v.id
+            WHERE v.id = ?
+        """, (vacancy_id,))
         row = cursor.fetchone()
+        if not row and attach_archive_readonly(conn):
+            # id не переиспользуются (AUTOINCREMENT), поэтому в архиве это та же вакансия
+            cursor.execute(f"""
+                SELECT v.*, d.body AS description_body
+                FROM {ARCHIVE_SCHEMA}.vacancies v
+                LEFT JOIN {ARCHIVE_SCHEMA}.vacancy_descriptions d ON d.vacancy_id = v.id
+                WHERE v.id = ?
+            """, (vacancy_id,))
+            row = cursor.fetchone()
         conn.close()
-        return dict(row) if row else None
+        if not row:
+            return None
+        vacancy = dict(row)
+        vacancy['description'] = decompress_description(vacancy.pop('description_body'))
+        return vacancy
     except Exception as e:
         logger.error(f"Ошибка при получении вакансии по ID {vacancy_id}: {e}")
         return None
@@ -344,9 +1470,9 @@ def get_vacancy_by_id(vacancy_id: int) -> Optional[Dict[str, Any]]:
 def get_vacancies_by_source(source: str) -> List[Dict[str, Any]]:
     """Получает вакансии по источнику"""
     try:
-        conn = create_connection()
+        conn = create_read_connection()
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM vacancies WHERE source = ? ORDER BY published_at DESC", (source,))
+        cursor.execute("SELECT * FROM vacancies WHERE source = ? ORDER BY published_at_ts DESC", (source,))
         vacancies = [dict(row) for row in cursor.fetchall()]
         conn.close()
         return vacancies
@@ -0,0 +1,134 @@
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SPACES_RE = re.compile(r"\s+")
+
+
+class AliasDirectory:
+    """
+    Справочник вида «каноническое имя + варианты написания» в двух таблицах:
+    <table>(id, name) и <alias_table>(alias, <ref_column>).
+    Все сопоставления держатся в памяти; таблицы нужны для id и для загрузки при старте.
+    """
+    table = ""
+    alias_table = ""
+    ref_column = ""
+    # Канонические имена и их варианты, которые добавляются при создании схемы
+    seeds: Dict[str, List[str]] = {}
+
+    def __init__(self):
+        self._by_alias: Dict[str, int] = {}
+        self._names: Dict[int, str] = {}
+        self._match_cache: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def normalize(self, value: str) -> str:
+        """Ключ сравнения: нижний регистр, ё -> е, схлопнутые пробелы"""
+        value = (value or "").lower().replace("ё", "е")
+        return SPACES_RE.sub(" ", value).strip()
+
+    def display_name(self, value: str) -> str:
+        """Имя новой записи справочника, если вариант написания встретился впервые"""
+        return SPACES_RE.sub(" ", value or "").strip()
+
+    def create_schema(self, conn: sqlite3.Connection) -> None:
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE
+            )
+        """)
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.alias_table} (
+                alias TEXT PRIMARY KEY,
+                {self.ref_column} INTEGER NOT NULL REFERENCES {self.table}(id)
+            )
+        """)
+        self.load(conn)
+        for name, aliases in self.seeds.items():
+            entity_id = self._get_or_create(conn, name)
+            for alias in aliases:
+                self._add_alias(conn, alias, entity_id)
+        conn.commit()
+
+    def load(self, conn: sqlite3.Connection) -> 'AliasDirectory':
+        """Загружает справочник целиком в память"""
+        names = dict(conn.execute(f"SELECT id, name FROM {self.table}").fetchall())
+        by_alias = dict(conn.execute(
+            f"SELECT alias, {self.ref_column} FROM {self.alias_table}"
+        ).fetchall())
+        with self._lock:
+            self._names = names
+            self._by_alias = by_alias
+            self._match_cache = {}
+        return self
+
+    def _add_alias(self, conn: sqlite3.Connection, alias: str, entity_id: int) -> None:
+        key = self.normalize(alias)
+        if key and key not in self._by_alias:
+            conn.execute(
+                f"INSERT OR IGNORE INTO {self.alias_table} (alias, {self.ref_column}) VALUES (?, ?)",
+                (key, entity_id)
+            )
+            self._by_alias[key] = entity_id
+
+    def _get_or_create(self, conn: sqlite3.Connection, value: str) -> Optional[int]:
+        key = self.normalize(value)
+        if not key:
+            return None
+        entity_id = self._by_alias.get(key)
+        if entity_id is not None:
+            return entity_id
+        name = self.display_name(value)
+        conn.execute(f"INSERT OR IGNORE INTO {self.table} (name) VALUES (?)", (name,))
+        entity_id = conn.execute(f"SELECT id FROM {self.table} WHERE name = ?", (name,)).fetchone()[0]
+        self._names[entity_id] = name
+        self._add_alias(conn, value, entity_id)
+        self._match_cache = {}
+        return entity_id
+
+    def get_or_create_many(self, conn: sqlite3.Connection, values: Iterable[str]) -> Dict[str, Optional[int]]:
+        """Сопоставляет исходные строки с id справочника, добавляя новые записи (для загрузки данных)"""
+        with self._lock:
+            result = {value: self._get_or_create(conn, value) for value in set(values)}
+        conn.commit()
+        return result
+
+    def resolve(self, value: str) -> Optional[int]:
+        """Точное сопоставление по варианту написания"""
+        return self._by_alias.get(self.normalize(value))
+
+    def match_ids(self, value: str) -> List[int]:
+        """
+        id записей для фильтра: точное совпадение варианта написания,
+        иначе записи, у которых какое-либо слово варианта начинается с введенного текста.
+        """
+        key = self.normalize(value)
+        if not key:
+            return []
+        cached = self._match_cache.get(key)
+        if cached is not None:
+            return cached
+        exact = self._by_alias.get(key)
+        if exact is not None:
+            ids = [exact]
+        else:
+            ids = sorted({
+                entity_id for alias, entity_id in self._by_alias.items()
+                if alias.startswith(key) or f" {key}" in alias or f"-{key}" in alias
+            })
+        if len(self._match_cache) > 1024:
+            self._match_cache = {}
+        self._match_cache[key] = ids
+        return ids
+
+    def name(self, entity_id: int) -> Optional[str]:
+        return self._names.get(entity_id)
+
+    def names(self) -> List[str]:
+        return sorted(self._names.values())
+
+    def items(self) -> List[Tuple[int, str]]:
+        return sorted(self._names.items(), key=lambda item: item[1])
@@ -0,0 +1,64 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Optional
+
+from core.config import Config
+
+
+class GenerationWatcher:
+    """Опрашивает счетчик поколений данных не чаще раза в poll_interval секунд"""
+
+    def __init__(self, poll_interval: Optional[float] = None):
+        self.poll_interval = Config.GENERATION_POLL_INTERVAL if poll_interval is None else poll_interval
+        self._generation = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self) -> int:
+        now = time.monotonic()
+        if self._generation is None or now - self._checked_at >= self.poll_interval:
+            with self._lock:
+                if self._generation is None or now - self._checked_at >= self.poll_interval:
+                    # Импорт здесь: core.database сам использует watcher для своих кэшей
+                    from core.database import get_data_generation
+                    self._generation = get_data_generation()
+                    self._checked_at = now
+        return self._generation
+
+
+watcher = GenerationWatcher()
+
+
+def generation_cached(func: Optional[Callable] = None, *, maxsize: int = 256):
+    """Кэширует результат функции до смены поколения данных"""
+
+    def decorator(func: Callable) -> Callable:
+        cache = OrderedDict()
+        state = {'generation': None}
+        lock = threading.Lock()
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            generation = watcher.current()
+            key = (args, tuple(sorted(kwargs.items())))
+            with lock:
+                if state['generation'] != generation:
+                    cache.clear()
+                    state['generation'] = generation
+                elif key in cache:
+                    cache.move_to_end(key)
+                    return cache[key]
+            result = func(*args, **kwargs)
+            with lock:
+                if state['generation'] == generation:
+                    cache[key] = result
+                    if len(cache) > maxsize:
+                        cache.popitem(last=False)
+            return result
+
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorator(func) if func else decorator
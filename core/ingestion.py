@@ -0,0 +1,269 @@
+import itertools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core.config import Config
+from core.crawl_checkpoint import CrawlCheckpoint
+from core.crawl_planner import CrawlPlanner, vacancy_key
+from core.companies import CompanyDirectory
+from core.database import (create_connection, prepare_vacancy, resolve_company_ids, resolve_location_ids,
+                           upsert_prepared_vacancies)
+from core.locations import LocationDirectory
+from core.pipeline import Pipeline, Stage
+from core.profiling import profiled
+from parsers.registry import CrawlTask
+from services.data_cleaner import DataCleaner
+from services.hh_enrichment import HHDescriptionEnricher
+from services.skill_tagger import get_skill_tagger
+
+logger = logging.getLogger(__name__)
+
+
+def vacancy_to_dict(vacancy: Any, location_id: Optional[int] = None, tags: Optional[List[str]] = None,
+                    company_id: Optional[int] = None) -> Dict[str, Any]:
+    """Вакансия парсера в словарь для записи в БД"""
+    return {
+        'title': vacancy.title,
+        'company': vacancy.company,
+        'location': vacancy.location,
+        'salary': vacancy.salary,
+        'description': vacancy.description,
+        'published_at': vacancy.published_at,
+        'source': vacancy.source,
+        'original_url': vacancy.original_url,
+        'source_id': vacancy.source_id,
+        'location_id': location_id,
+        'company_id': company_id,
+        'tags': tags,
+        'description_partial': getattr(vacancy, 'description_partial', False)
+    }
+
+
+def item_source(item: Any) -> str:
+    """Источник элемента конвейера: задачи (task, start_page) на входе fetch или страницы PageItem"""
+    return item[0].source if isinstance(item, tuple) else item.source
+
+
+@dataclass
+class PageItem:
+    """Страница задачи на конвейере: payload - сырая страница, затем вакансии, затем строки для записи"""
+    task_key: str
+    source: str
+    index: int
+    payload: Any
+    # Теги технологий для каждой вакансии payload (стадия tag)
+    tags: List[List[str]] = field(default_factory=list)
+
+
+class BatchWriter:
+    """
+    Копит подготовленные строки и пишет их пачками, одна транзакция на пачку (у каждого потока своя).
+    В той же транзакции сохраняются контрольные точки страниц пачки. Считает новые,
+    изменившиеся и неизменные вакансии.
+    """
+
+    def __init__(self, batch_size: int, checkpoint: CrawlCheckpoint,
+                 should_stop: Optional[Callable[[], bool]] = None):
+        self.batch_size = batch_size
+        self.checkpoint = checkpoint
+        self.should_stop = should_stop
+        self.written = 0
+        self.dropped = 0
+        self.counts = {'new': 0, 'changed': 0, 'unchanged': 0}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _buffer(self) -> Tuple[list, list]:
+        if not hasattr(self._local, 'rows'):
+            self._local.rows = []
+            self._local.pages = []
+        return self._local.rows, self._local.pages
+
+    def _write(self, rows: list, pages: list) -> None:
+        if self.should_stop is not None and self.should_stop():
+            # Аренда обхода потеряна: пишет уже другой процесс, пачка отбрасывается
+            with self._lock:
+                self.dropped += len(rows)
+            rows.clear()
+            pages.clear()
+            return
+        try:
+            counts = self.checkpoint.commit_pages(
+                pages, lambda in_transaction: upsert_prepared_vacancies(rows, in_transaction)
+            )
+        except Exception as e:
+            logger.error(f"Ошибка при пакетной записи вакансий: {e}")
+            counts = {}
+        with self._lock:
+            self.written += len(rows)
+            for key, value in counts.items():
+                self.counts[key] += value
+        rows.clear()
+        pages.clear()
+
+    def __call__(self, item: PageItem) -> None:
+        rows, pages = self._buffer()
+        rows.extend(item.payload)
+        pages.append((item.task_key, item.index))
+        if len(rows) >= self.batch_size:
+            self._write(rows, pages)
+
+    def flush(self) -> None:
+        rows, pages = self._buffer()
+        if pages:
+            self._write(rows, pages)
+
+
+class IngestionPipeline:
+    """
+    Обход источников конвейером: fetch (сеть) → parse (разбор страниц) → enrich (полные описания HH)
+    → clean (очистка текста) → tag (теги технологий) → normalize (дедупликация, города и компании,
+    подготовка строк) → write (пакетная запись).
+    Между стадиями ограниченные очереди, у каждой стадии свое число потоков.
+    Каждая страница доходит до записи (даже пустая), чтобы контрольная точка задачи двигалась;
+    прерванный обход следующий запуск продолжает с последней записанной страницы.
+    profiler - сеанс core.profiling: стадии профилируются под источником элемента.
+    should_stop - проверка, что обход надо прервать: задачи и страницы перестают подаваться,
+    пачки не пишутся.
+    """
+
+    def __init__(self, planner: Optional[CrawlPlanner] = None, workers: Optional[Dict[str, int]] = None,
+                 queue_size: Optional[int] = None, batch_size: Optional[int] = None, profiler: Any = None,
+                 should_stop: Optional[Callable[[], bool]] = None):
+        self.planner = planner or CrawlPlanner()
+        self.workers = {**Config.PIPELINE_WORKERS, **(workers or {})}
+        self.queue_size = queue_size or Config.PIPELINE_QUEUE_SIZE
+        self.checkpoint = CrawlCheckpoint()
+        self.should_stop = should_stop or (lambda: False)
+        self.writer = BatchWriter(batch_size or Config.PIPELINE_BATCH_SIZE, self.checkpoint, self.should_stop)
+        # Стадия enrich сама масштабируется потоками, поэтому внутри вызова карточки грузятся по одной
+        self.enricher = HHDescriptionEnricher(max_workers=1)
+        self.cleaner = DataCleaner()
+        self.tagger = get_skill_tagger()
+        self.locations: Optional[LocationDirectory] = None
+        self.companies: Optional[CompanyDirectory] = None
+        self._seen = set()
+        self._seen_lock = threading.Lock()
+        self.profiler = profiler
+
+    def _fetch(self, item: Tuple[CrawlTask, int]):
+        task, start_page = item
+        runner = self.planner.runners[task.source]
+        pages = runner.fetch_pages(self.planner.parser(task.source), task, start_page)
+        index = start_page
+        try:
+            while not self.should_stop():
+                try:
+                    page = next(pages)
+                except StopIteration as stop:
+                    # Задача пройдена до конца: завершится, когда будут записаны все ее страницы
+                    if stop.value:
+                        self.checkpoint.finish_task(task.key, index)
+                    return
+                yield PageItem(task.key, task.source, index, page)
+                index += 1
+        finally:
+            # Недочитанный поток страниц закрывается сразу, а не сборщиком мусора
+            pages.close()
+
+    def _parse(self, item: PageItem) -> list:
+        item.payload = self.planner.sources[item.source].parse_page(self.planner.parser(item.source), item.payload)
+        return [item]
+
+    def _enrich(self, item: PageItem) -> list:
+        if item.payload:
+            self.enricher.enrich(item.payload)
+        return [item]
+
+    def _clean(self, item: PageItem) -> list:
+        self.cleaner.clean_batch(item.payload)
+        return [item]
+
+    def _tag(self, item: PageItem) -> list:
+        item.tags = [self.tagger.extract(vacancy.title, vacancy.description) for vacancy in item.payload]
+        return [item]
+
+    def _normalize(self, item: PageItem) -> list:
+        unique = []
+        with self._seen_lock:
+            for vacancy, tags in zip(item.payload, item.tags):
+                key = vacancy_key(vacancy)
+                if key not in self._seen:
+                    self._seen.add(key)
+                    unique.append((vacancy, tags))
+        location_ids, company_ids = {}, {}
+        if unique:
+            location_ids = resolve_location_ids([vacancy.location for vacancy, _ in unique], self.locations)
+            company_ids = resolve_company_ids([vacancy.company for vacancy, _ in unique], self.companies)
+        item.payload = [
+            prepare_vacancy(vacancy_to_dict(vacancy, location_ids.get(vacancy.location), tags,
+                                            company_ids.get(vacancy.company)))
+            for vacancy, tags in unique
+        ]
+        return [item]
+
+    def stages(self) -> List[Stage]:
+        stages = [
+            Stage('fetch', self._fetch, self.workers['fetch'], self.queue_size),
+            Stage('parse', self._parse, self.workers['parse'], self.queue_size),
+            Stage('enrich', self._enrich, self.workers['enrich'], self.queue_size),
+            Stage('clean', self._clean, self.workers['clean'], self.queue_size),
+            Stage('tag', self._tag, self.workers['tag'], self.queue_size),
+            Stage('normalize', self._normalize, self.workers['normalize'], self.queue_size),
+            Stage('write', self.writer, self.workers['write'], self.queue_size, flush=self.writer.flush),
+        ]
+        if self.profiler is not None:
+            for stage in stages:
+                stage.func = profiled(self.profiler, stage.func, item_source)
+        return stages
+
+    def run(self) -> Dict[str, int]:
+        """Выполняет обход и запись, возвращает счетчики new / changed / unchanged"""
+        conn = create_connection()
+        try:
+            # Справочники городов и компаний загружаются один раз, новые записи добавляются в них по ходу
+            self.locations = LocationDirectory().load(conn)
+            self.companies = CompanyDirectory().load(conn)
+        finally:
+            conn.close()
+
+        self.planner.start()
+        hh_runner = self.planner.runners.get('hh.ru')
+        if hh_runner is not None:
+            # Карточки HH загружаются в пределах того же срока обхода, что и поиск
+            self.enricher.deadline = hh_runner.deadline_at
+            self.enricher.timeout = hh_runner.request_timeout
+        if self.checkpoint.begin():
+            # Продолжение прерванного запуска: план уже сохранен, записанные страницы пропускаются
+            tasks = self.checkpoint.pending()
+            logger.info(f"Продолжение прерванного обхода: осталось {len(tasks)} поисковых задач")
+        else:
+            with ThreadPoolExecutor(max_workers=self.planner.max_workers) as executor:
+                planned = self.planner.plan(executor)
+            self.checkpoint.save_plan(planned)
+            tasks = [(task, 0) for task in planned]
+            logger.info(f"Запланировано {len(tasks)} поисковых задач")
+
+        # Задачи подаются, пока обход не нужно прервать (например, потеряна аренда)
+        Pipeline(self.stages(), Config.PIPELINE_REPORT_INTERVAL).run(
+            itertools.takewhile(lambda _: not self.should_stop(), tasks)
+        )
+        if self.should_stop():
+            # План остается незавершенным; записанные страницы учтены в контрольных точках
+            logger.warning(f"Обход прерван, не записано {self.writer.dropped} вакансий")
+        else:
+            unfinished = self.checkpoint.unfinished()
+            if unfinished:
+                # Следующий запуск продолжит эти задачи с первой незаписанной страницы
+                logger.warning(f"Не пройдено до конца поисковых задач: {unfinished}, план сохранен")
+            else:
+                self.checkpoint.finish()
+
+        self.planner.log_summary()
+        counts = self.writer.counts
+        logger.info(f"Уникальных вакансий {len(self._seen)}, обработано {self.writer.written}: "
+                    f"новых {counts['new']}, изменившихся {counts['changed']}, без изменений {counts['unchanged']}")
+        return dict(counts)
@@ -0,0 +1,50 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # orjson не обязателен: без него используется стандартный json
+    orjson = None
+
+# Какой модуль кодирует JSON (видно в логах и в бенчмарке)
+BACKEND = "orjson" if orjson is not None else "json"
+
+if orjson is not None:
+    # Ключи-числа (например, id в словарях) кодируются как у стандартного json
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    """Типы, которых нет в JSON: даты - в ISO 8601, Decimal - в число, множества - в список"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, "keys"):  # sqlite3.Row
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def loads(data: Union[bytes, bytearray, str]) -> Any:
+    """Разбирает JSON из байтов ответа (response.content) или строки"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_bytes(value: Any) -> bytes:
+    """Кодирует в компактный JSON в UTF-8; datetime - в ISO 8601"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=_ORJSON_OPTIONS)
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(value: Any) -> str:
+    """Кодирует в компактный JSON-строку; datetime - в ISO 8601"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=_ORJSON_OPTIONS).decode("utf-8")
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":"))
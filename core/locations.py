@@ -0,0 +1,24 @@
+import re
+
+from core.dictionary import AliasDirectory
+
+CITY_PREFIX_RE = re.compile(r"^(г\.|г |город )\s*")
+PUNCTUATION_RE = re.compile(r"[\"'«»()]")
+
+
+class LocationDirectory(AliasDirectory):
+    """Справочник городов: один и тот же город с hh.ru, superjob.ru и fl.ru получает один id"""
+    table = "locations"
+    alias_table = "location_aliases"
+    ref_column = "location_id"
+    seeds = {
+        "Удалённая работа": ["удаленная работа", "удаленно", "можно удаленно", "удаленка", "remote"],
+        "Москва": ["москва", "г. москва", "moscow", "мск"],
+        "Санкт-Петербург": ["санкт-петербург", "санкт петербург", "спб", "питер",
+                            "saint petersburg", "st. petersburg"],
+    }
+
+    def normalize(self, value: str) -> str:
+        key = super().normalize(value)
+        key = PUNCTUATION_RE.sub("", key)
+        return CITY_PREFIX_RE.sub("", key).strip()
@@ -0,0 +1,144 @@
+import logging
+import queue
+import threading
+from time import perf_counter
+from typing import Any, Callable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class Stage:
+    """
+    Стадия конвейера: потоки читают элементы из ограниченной очереди и передают результаты дальше.
+    func возвращает итерируемое число результатов (в том числе генератор) - от нуля до многих.
+    Если очередь следующей стадии заполнена, поток ждет (обратное давление), поэтому
+    в памяти одновременно не больше queue_size элементов на стадию.
+    """
+
+    def __init__(self, name: str, func: Callable[[Any], Optional[Iterable]], workers: int = 1,
+                 queue_size: int = 100, flush: Optional[Callable[[], Optional[Iterable]]] = None):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        # Вызывается каждым потоком после конца входа, например чтобы дописать неполную пачку
+        self.flush = flush
+        self.next: Optional['Stage'] = None
+        self.items_in = 0
+        self.items_out = 0
+        self.errors = 0
+        self.busy = 0.0  # время обработки
+        self.blocked = 0.0  # время ожидания места в очереди следующей стадии
+        self.max_depth = 0
+        self.started_at = 0.0
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    def put(self, item: Any) -> None:
+        self.queue.put(item)
+        depth = self.queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def _emit(self, outputs: Optional[Iterable]) -> float:
+        """Передает результаты дальше, возвращает время ожидания следующей стадии"""
+        blocked = 0.0
+        for output in outputs or ():
+            with self._lock:
+                self.items_out += 1
+            if self.next is not None:
+                started = perf_counter()
+                self.next.put(output)
+                blocked += perf_counter() - started
+        return blocked
+
+    def _process(self, func: Callable, *args) -> None:
+        started = perf_counter()
+        blocked = 0.0
+        try:
+            blocked = self._emit(func(*args))
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            logger.error(f"Ошибка на стадии {self.name}: {e}")
+        elapsed = perf_counter() - started
+        with self._lock:
+            self.busy += elapsed - blocked
+            self.blocked += blocked
+
+    def _work(self) -> None:
+        while True:
+            item = self.queue.get()
+            if item is _DONE:
+                break
+            self._process(self.func, item)
+            with self._lock:
+                self.items_in += 1
+        if self.flush is not None:
+            self._process(self.flush)
+
+    def start(self) -> None:
+        self.started_at = perf_counter()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"{self.name}-{index}", daemon=True)
+            for index in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def close(self) -> None:
+        """Дожидается обработки всей очереди и останавливает потоки"""
+        for _ in self._threads:
+            self.queue.put(_DONE)
+        for thread in self._threads:
+            thread.join()
+
+    def report(self) -> str:
+        elapsed = max(perf_counter() - self.started_at, 1e-9)
+        return (f"{self.name}: вход {self.items_in} ({self.items_in / elapsed:.1f}/с), выход {self.items_out}, "
+                f"очередь {self.queue.qsize()}/{self.queue.maxsize} (макс {self.max_depth}), "
+                f"потоков {self.workers}, работа {self.busy:.1f} с, ожидание следующей стадии {self.blocked:.1f} с, "
+                f"ошибок {self.errors}")
+
+
+class Pipeline:
+    """
+    Цепочка стадий, связанных ограниченными очередями. Каждая стадия масштабируется своим числом потоков;
+    по отчету видно узкое место - стадию с полной входной очередью и без ожидания следующей.
+    """
+
+    def __init__(self, stages: List[Stage], report_interval: float = 30):
+        self.stages = stages
+        self.report_interval = report_interval
+        for stage, next_stage in zip(stages, stages[1:]):
+            stage.next = next_stage
+        self._stop = threading.Event()
+
+    def _monitor(self) -> None:
+        while not self._stop.wait(self.report_interval):
+            self.log_report()
+
+    def log_report(self) -> None:
+        for stage in self.stages:
+            logger.info(f"Конвейер, {stage.report()}")
+
+    def run(self, items: Iterable) -> None:
+        """Прогоняет элементы через все стадии и ждет окончания"""
+        for stage in self.stages:
+            stage.start()
+        monitor = threading.Thread(target=self._monitor, name="pipeline-monitor", daemon=True)
+        monitor.start()
+        try:
+            first = self.stages[0]
+            for item in items:
+                first.put(item)
+        finally:
+            # Стадии закрываются по порядку: следующая получает конец входа,
+            # когда предыдущая уже передала ей все результаты
+            for stage in self.stages:
+                stage.close()
+            self._stop.set()
+            monitor.join()
+        self.log_report()
@@ -0,0 +1,253 @@
+"""
+Профилирование по запросу: отдельный запрос веб-приложения (заголовок X-Profile с PROFILE_TOKEN)
+или обход воркера (PROFILE_CRAWL или разовый запрос: python worker.py --profile-next-crawl sample).
+
+Режимы: cprofile - детерминированный профиль, файл .pstats (python -m pstats, snakeviz);
+sample - выборка стеков раз в PROFILE_SAMPLE_INTERVAL секунд, файл .collapsed
+(строки «кадр;кадр;... число», формат flamegraph.pl и speedscope).
+Профили пишутся в PROFILE_DIR, в имени файла - маршрут или источник. Когда профилирование
+не включено, хуки не устанавливаются и код запросов и обхода выполняется как обычно.
+"""
+import cProfile
+import itertools
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from core.config import Config
+from core.database import get_db_path
+
+logger = logging.getLogger(__name__)
+
+MODES = ('cprofile', 'sample')
+TRIGGER_FILE = 'next_crawl'
+UNSAFE_CHARS_RE = re.compile(r'[^\w.-]+')
+THREAD_INDEX_RE = re.compile(r'-\d+$')
+
+_sequence = itertools.count(1)
+_SKIPPED = object()
+
+
+def get_profile_dir() -> str:
+    """Каталог профилей (по умолчанию profiles рядом с основной БД)"""
+    return Config.PROFILE_DIR or os.path.join(os.path.dirname(get_db_path()), 'profiles')
+
+
+def profile_path(kind: str, tag: str, mode: str) -> str:
+    """Путь нового файла профиля: вид, тег (маршрут или источник), время, pid и номер"""
+    directory = get_profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    tag = UNSAFE_CHARS_RE.sub('_', tag).strip('_') or 'none'
+    extension = 'pstats' if mode == 'cprofile' else 'collapsed'
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    return os.path.join(directory, f"{kind}-{tag}-{stamp}-{os.getpid()}-{next(_sequence)}.{extension}")
+
+
+class CProfileSession:
+    """
+    cProfile по тегам. В CPython до 3.12 профиль действует только в своем потоке, поэтому у каждого
+    потока свой профиль на тег; при записи профили одного тега складываются в один файл.
+    """
+    mode = 'cprofile'
+
+    def __init__(self):
+        self._profiles: Dict[str, List[cProfile.Profile]] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def enter(self, tag: str) -> Any:
+        """Включает профиль тега в текущем потоке; возвращает то, что нужно передать в exit"""
+        profiles = getattr(self._local, 'profiles', None)
+        if profiles is None:
+            profiles = self._local.profiles = {}
+        profile = profiles.get(tag)
+        if profile is None:
+            profile = profiles[tag] = cProfile.Profile()
+            with self._lock:
+                self._profiles.setdefault(tag, []).append(profile)
+        previous = getattr(self._local, 'active', None)
+        if previous is not None:
+            previous.disable()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Уже работает другой профилировщик (с 3.12 cProfile общий для всех потоков):
+            # поток остается без профиля, а не падает
+            if previous is not None:
+                previous.enable()
+            logger.warning(f"Профиль {tag} не включен: {e}")
+            return _SKIPPED
+        self._local.active = profile
+        return previous
+
+    def exit(self, previous: Any) -> None:
+        if previous is _SKIPPED:
+            return
+        self._local.active.disable()
+        self._local.active = previous
+        if previous is not None:
+            previous.enable()
+
+    def dump(self, kind: str) -> List[str]:
+        paths = []
+        with self._lock:
+            profiles = dict(self._profiles)
+        for tag, tag_profiles in profiles.items():
+            path = profile_path(kind, tag, self.mode)
+            pstats.Stats(*tag_profiles).dump_stats(path)
+            paths.append(path)
+        return paths
+
+
+class SamplingSession:
+    """
+    Выборка стеков: фоновый поток раз в interval секунд снимает стеки потоков (всех или thread_ids)
+    и считает одинаковые. Корень стека - тег потока (источник) и имя потока без номера (стадия).
+    Накладные расходы не зависят от числа вызовов функций, поэтому режим подходит для всего обхода.
+    """
+    mode = 'sample'
+
+    def __init__(self, interval: Optional[float] = None, thread_ids: Optional[Set[int]] = None):
+        self.interval = interval or Config.PROFILE_SAMPLE_INTERVAL
+        self.thread_ids = thread_ids
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._tags: Dict[int, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def enter(self, tag: str) -> Any:
+        ident = threading.get_ident()
+        previous = self._tags.get(ident)
+        self._tags[ident] = tag
+        return previous
+
+    def exit(self, previous: Any) -> None:
+        ident = threading.get_ident()
+        if previous is None:
+            self._tags.pop(ident, None)
+        else:
+            self._tags[ident] = previous
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (self.thread_ids is not None and ident not in self.thread_ids):
+                    continue
+                thread = THREAD_INDEX_RE.sub('', names.get(ident, 'thread'))
+                self._stacks[(self._tags.get(ident, ''), thread, collapse_stack(frame))] += 1
+            self.samples += 1
+
+    def dump(self, kind: str) -> List[str]:
+        if not self._stacks:
+            logger.warning(f"Профиль {kind} пуст: выполнение короче интервала выборки {self.interval} с")
+            return []
+        # Потоки без тега (планирование обхода, монитор) - в отдельном файле с тегом run
+        by_tag: Dict[str, List[str]] = {}
+        for (tag, thread, stack), count in sorted(self._stacks.items()):
+            root = f"{tag};{thread}" if tag else thread
+            by_tag.setdefault(tag or 'run', []).append(f"{root};{stack} {count}\n")
+        paths = []
+        for tag, lines in by_tag.items():
+            path = profile_path(kind, tag, self.mode)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.writelines(lines)
+            paths.append(path)
+        return paths
+
+
+def collapse_stack(frame) -> str:
+    """Стек от корня к текущему кадру: «функция (файл:строка);...»"""
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ';'.join(reversed(frames))
+
+
+def create_session(mode: str, thread_ids: Optional[Set[int]] = None):
+    if mode == 'sample':
+        return SamplingSession(thread_ids=thread_ids)
+    return CProfileSession()
+
+
+def finish_session(session, token: Any, kind: str) -> List[str]:
+    """Останавливает сеанс и пишет профили; ошибка записи не ломает запрос или обход"""
+    session.exit(token)
+    session.stop()
+    try:
+        paths = session.dump(kind)
+    except OSError as e:
+        logger.error(f"Ошибка записи профиля: {e}")
+        return []
+    for path in paths:
+        logger.info(f"Профиль записан: {path}")
+    return paths
+
+
+def profiled(session, func: Callable[[Any], Optional[Iterable]],
+             tag_of: Callable[[Any], str]) -> Callable[[Any], Iterable]:
+    """
+    Оборачивает функцию стадии конвейера: вызов и выдача ее результатов профилируются под тегом
+    элемента (источником). Результаты отдаются генератором, поэтому функции-генераторы
+    (стадия fetch) профилируются целиком, а не только до первого yield.
+    """
+    def wrapper(item):
+        token = session.enter(tag_of(item))
+        try:
+            yield from func(item) or ()
+        finally:
+            session.exit(token)
+    return wrapper
+
+
+def next_crawl_mode() -> str:
+    """
+    Режим профилирования очередного обхода: разовый запрос (файл next_crawl в каталоге профилей,
+    удаляется при чтении) или PROFILE_CRAWL для каждого обхода. Пустая строка - не профилировать.
+    """
+    path = os.path.join(get_profile_dir(), TRIGGER_FILE)
+    try:
+        with open(path, encoding='utf-8') as f:
+            mode = f.read().strip() or 'sample'
+        os.remove(path)
+    except FileNotFoundError:
+        mode = Config.PROFILE_CRAWL
+    if mode and mode not in MODES:
+        logger.warning(f"Неизвестный режим профилирования {mode!r}, доступны: {', '.join(MODES)}")
+        return ''
+    return mode
+
+
+def request_next_crawl(mode: str) -> str:
+    """Просит работающий воркер профилировать следующий обход; возвращает путь файла-запроса"""
+    directory = get_profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, TRIGGER_FILE)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(mode)
+    return path
@@ -0,0 +1,190 @@
+"""
+Дневные агрегаты вакансий для дашбордов: по дню публикации, источнику и городу - число вакансий,
+число вакансий с указанной зарплатой, сумма и границы зарплат в рублях.
+
+Агрегаты обновляются в той же транзакции, что и пачка вакансий (RollupDelta), и сохраняют историю:
+перенос в архив их не меняет. Пересчитать с нуля (после ручных правок или для старых данных):
+    python worker.py --rebuild-rollups
+"""
+import sqlite3
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from core.config import Config
+
+ROLLUP_COLUMNS = ("published_at_ts", "source", "location_id", "salary", "salary_from", "salary_to", "salary_currency")
+
+CREATE_ROLLUPS_SQL = """
+    CREATE TABLE IF NOT EXISTS daily_rollups (
+        day TEXT NOT NULL,
+        source TEXT NOT NULL,
+        location_id INTEGER NOT NULL DEFAULT 0,
+        vacancies INTEGER NOT NULL DEFAULT 0,
+        with_salary INTEGER NOT NULL DEFAULT 0,
+        salary_count INTEGER NOT NULL DEFAULT 0,
+        salary_sum INTEGER NOT NULL DEFAULT 0,
+        salary_min INTEGER,
+        salary_max INTEGER,
+        PRIMARY KEY (day, source, location_id)
+    ) WITHOUT ROWID
+"""
+
+# Зарплата в рублях для сумм и границ: середина вилки или единственная указанная граница
+SALARY_SQL = """
+    CASE WHEN salary_currency = 'RUB' THEN
+        CASE WHEN salary_from IS NOT NULL AND salary_to IS NOT NULL THEN (salary_from + salary_to) / 2
+             ELSE COALESCE(salary_from, salary_to) END
+    END
+"""
+
+# Границы только расширяются: удаление вакансии их не сужает (до пересчета командой rebuild)
+UPSERT_ROLLUP_SQL = """
+    INSERT INTO daily_rollups (day, source, location_id, vacancies, with_salary,
+                               salary_count, salary_sum, salary_min, salary_max)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (day, source, location_id) DO UPDATE SET
+        vacancies = vacancies + excluded.vacancies,
+        with_salary = with_salary + excluded.with_salary,
+        salary_count = salary_count + excluded.salary_count,
+        salary_sum = salary_sum + excluded.salary_sum,
+        salary_min = MIN(COALESCE(salary_min, excluded.salary_min), COALESCE(excluded.salary_min, salary_min)),
+        salary_max = MAX(COALESCE(salary_max, excluded.salary_max), COALESCE(excluded.salary_max, salary_max))
+"""
+
+RollupKey = Tuple[str, str, int]
+
+
+def rollup_day(published_at_ts: int) -> str:
+    """День публикации (граница суток сдвинута на ROLLUP_DAY_OFFSET секунд от UTC, как в SQL пересчета)"""
+    return datetime.fromtimestamp(published_at_ts + Config.ROLLUP_DAY_OFFSET, timezone.utc).strftime("%Y-%m-%d")
+
+
+def rollup_salary(row: Any) -> Optional[int]:
+    """То же, что SALARY_SQL, для строки в памяти"""
+    if row["salary_currency"] != "RUB":
+        return None
+    salary_from, salary_to = row["salary_from"], row["salary_to"]
+    if salary_from is not None and salary_to is not None:
+        return (salary_from + salary_to) // 2
+    return salary_from if salary_from is not None else salary_to
+
+
+class RollupDelta:
+    """Изменения агрегатов в пределах одной транзакции: копятся по ключу и пишутся одним executemany"""
+
+    def __init__(self):
+        # ключ -> [vacancies, with_salary, salary_count, salary_sum, salary_min, salary_max]
+        self._deltas: Dict[RollupKey, list] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self._deltas)
+
+    def add(self, row: Any, sign: int = 1) -> None:
+        """Учитывает строку вакансии (sign=1) или убирает ее вклад (sign=-1)"""
+        if row["published_at_ts"] is None:
+            return
+        key = (rollup_day(row["published_at_ts"]), row["source"], row["location_id"] or 0)
+        delta = self._deltas.setdefault(key, [0, 0, 0, 0, None, None])
+        delta[0] += sign
+        if row["salary"]:
+            delta[1] += sign
+        salary = rollup_salary(row)
+        if salary is None:
+            return
+        delta[2] += sign
+        delta[3] += sign * salary
+        if sign > 0:
+            delta[4] = salary if delta[4] is None else min(delta[4], salary)
+            delta[5] = salary if delta[5] is None else max(delta[5], salary)
+
+    def apply(self, cursor: sqlite3.Cursor) -> None:
+        if not self._deltas:
+            return
+        cursor.executemany(UPSERT_ROLLUP_SQL, [(*key, *delta) for key, delta in self._deltas.items()])
+        emptied = [key for key, delta in self._deltas.items() if delta[0] < 0]
+        if emptied:
+            cursor.executemany(
+                "DELETE FROM daily_rollups WHERE day = ? AND source = ? AND location_id = ? AND vacancies <= 0",
+                emptied
+            )
+        self._deltas.clear()
+
+
+def fetch_rollup_row(cursor: sqlite3.Cursor, vacancy_id: int) -> Optional[Dict[str, Any]]:
+    """Поля сохраненной вакансии, от которых зависят агрегаты (до ее изменения или удаления)"""
+    row = cursor.execute(
+        f"SELECT {', '.join(ROLLUP_COLUMNS)} FROM vacancies WHERE id = ?", (vacancy_id,)
+    ).fetchone()
+    return dict(zip(ROLLUP_COLUMNS, row)) if row else None
+
+
+def rebuild(conn: sqlite3.Connection, archive_schema: Optional[str] = None) -> int:
+    """
+    Пересчитывает агрегаты целиком одним проходом по вакансиям (и по архиву, если он подключен
+    как archive_schema). Возвращает число строк агрегатов.
+    """
+    columns = ", ".join(ROLLUP_COLUMNS)
+    vacancies = f"SELECT {columns} FROM main.vacancies"
+    if archive_schema:
+        vacancies += (f" UNION ALL SELECT {columns} FROM {archive_schema}.vacancies"
+                      f" WHERE id NOT IN (SELECT id FROM main.vacancies)")
+    with conn:
+        conn.execute("DELETE FROM daily_rollups")
+        conn.execute(f"""
+            INSERT INTO daily_rollups (day, source, location_id, vacancies, with_salary,
+                                       salary_count, salary_sum, salary_min, salary_max)
+            SELECT date(published_at_ts + ?, 'unixepoch'), source, COALESCE(location_id, 0), COUNT(*),
+                   SUM(salary IS NOT NULL AND salary != ''), COUNT(amount), COALESCE(SUM(amount), 0),
+                   MIN(amount), MAX(amount)
+            FROM (SELECT published_at_ts, source, location_id, salary, {SALARY_SQL} AS amount FROM ({vacancies}))
+            WHERE published_at_ts IS NOT NULL
+            GROUP BY 1, 2, 3
+        """, (Config.ROLLUP_DAY_OFFSET,))
+    return conn.execute("SELECT COUNT(*) FROM daily_rollups").fetchone()[0]
+
+
+def summary(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """Итоги для главной страницы: всего вакансий, источников и доля вакансий с зарплатой"""
+    row = conn.execute("""
+        SELECT COALESCE(SUM(vacancies), 0), COALESCE(SUM(with_salary), 0), COUNT(DISTINCT source)
+        FROM daily_rollups
+    """).fetchone()
+    total, with_salary, sources = row[0], row[1], row[2]
+    return {
+        "total_vacancies": total,
+        "sources_count": sources,
+        "salary_percent": round(with_salary / total * 100, 2) if total else 0,
+    }
+
+
+def daily(conn: sqlite3.Connection, since_day: str, source: str = "",
+          location_ids: Optional[Sequence[int]] = None) -> List[Dict[str, Any]]:
+    """Ряды по дням и источникам начиная с since_day (города суммируются или фильтруются по location_ids)"""
+    sql = """
+        SELECT day, source, SUM(vacancies), SUM(with_salary), SUM(salary_count), SUM(salary_sum),
+               MIN(salary_min), MAX(salary_max)
+        FROM daily_rollups
+        WHERE day >= ?
+    """
+    params: List[Any] = [since_day]
+    if source:
+        sql += " AND source = ?"
+        params.append(source)
+    if location_ids is not None:
+        sql += f" AND location_id IN ({','.join('?' * len(location_ids)) or 'NULL'})"
+        params.extend(location_ids)
+    sql += " GROUP BY day, source ORDER BY day, source"
+    return [
+        {
+            "day": day,
+            "source": row_source,
+            "vacancies": count,
+            "salary_percent": round(with_salary / count * 100, 2) if count else 0,
+            "salary_avg": salary_sum // salary_count if salary_count else None,
+            "salary_min": salary_min,
+            "salary_max": salary_max,
+        }
+        for day, row_source, count, with_salary, salary_count, salary_sum, salary_min, salary_max
+        in conn.execute(sql, params).fetchall()
+    ]
+
@@ -0,0 +1,38 @@
+import re
+from typing import Optional, Tuple
+
+# "от 100000 до 150000 RUR" (hh.ru, superjob.ru) или "10 000 ₽", "до 5000 руб." (fl.ru)
+NUMBER_RE = re.compile(r"\d[\d\s ]*\d|\d")
+FROM_RE = re.compile(r"от\s*(\d[\d\s ]*\d|\d)")
+TO_RE = re.compile(r"до\s*(\d[\d\s ]*\d|\d)")
+CURRENCY_ALIASES = {
+    "rur": "RUB", "rub": "RUB", "руб": "RUB", "₽": "RUB", "р": "RUB",
+    "usd": "USD", "$": "USD", "eur": "EUR", "€": "EUR", "kzt": "KZT", "byr": "BYN", "byn": "BYN",
+    "uah": "UAH", "uzs": "UZS",
+}
+CURRENCY_RE = re.compile(r"(rur|rub|руб|₽|usd|\$|eur|€|kzt|byr|byn|uah|uzs|р)\.?\s*$")
+
+
+def _to_int(text: str) -> int:
+    return int(re.sub(r"[\s ]", "", text))
+
+
+def parse_salary(text: Optional[str]) -> Tuple[Optional[int], Optional[int], Optional[str]]:
+    """Разбирает текст зарплаты в (от, до, валюта); валюта по умолчанию - рубли"""
+    if not text:
+        return None, None, None
+    lowered = text.lower().strip()
+    salary_from = FROM_RE.search(lowered)
+    salary_to = TO_RE.search(lowered)
+    if salary_from or salary_to:
+        low = _to_int(salary_from.group(1)) if salary_from else None
+        high = _to_int(salary_to.group(1)) if salary_to else None
+    else:
+        numbers = [_to_int(number) for number in NUMBER_RE.findall(lowered)]
+        if not numbers:
+            return None, None, None
+        low, high = min(numbers), max(numbers)
+        if low == high:
+            high = None
+    currency = CURRENCY_RE.search(lowered)
+    return low, high, CURRENCY_ALIASES[currency.group(1)] if currency else "RUB"
@@ -1,83 +1,172 @@
 import logging
+import threading
+import time
+from typing import Optional
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime
-from typing import List, Dict, Any
-from core.database import insert_vacancy, remove_duplicates
-from parsers.hh_parser import HHAPIParser
-from parsers.sj_parser import SJAPIParser
-from parsers.fl_parser import FLParser
-
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    filename='scheduler.log'
+from core.config import Config
+from core.database import (
+    initialize_database,
+    remove_duplicates,
+    bump_data_generation,
+    archive_old_vacancies,
+    publish_snapshot
 )
+from core.crawl_lease import CrawlLease
+from core.ingestion import IngestionPipeline
+from core.profiling import create_session, finish_session, next_crawl_mode
+from metrics.store import metrics_store
+from services.notifier import notify_new_vacancies
+
 logger = logging.getLogger(__name__)
 
 # Создаем планировщик
 scheduler = BackgroundScheduler()
 
+# Не даем запуску наложиться на предыдущий внутри одного процесса
+_run_lock = threading.Lock()
+
 
 def parse_jobs():
-    """Парсинг вакансий со всех источников"""
+    """Парсинг вакансий, если этот процесс получил аренду обхода"""
+    if not _run_lock.acquire(blocking=False):
+        logger.warning("Предыдущий парсинг еще выполняется, запуск пропущен")
+        return
     try:
-        logger.info("Начало парсинга вакансий")
+        with CrawlLease('parse_jobs') as lease:
+            if not lease.acquired:
+                logger.info("Парсинг выполняется или недавно выполнен другим процессом, запуск пропущен")
+                return
+            _run_parse_jobs(lease)
+    except Exception as e:
+        logger.error(f"Ошибка аренды обхода: {e}")
+    finally:
+        _run_lock.release()
+
 
-        # Инициализируем парсеры
-        hh_parser = HHAPIParser()
-        sj_parser = SJAPIParser()
-        fl_parser = FLParser()
-
-        # Парсим вакансии с каждого источника
-        hh_vacancies = hh_parser.parse_vacancies()
-        sj_vacancies = sj_parser.parse_vacancies()
-        fl_vacancies = fl_parser.parse_vacancies()
-
-        # Сохраняем вакансии в базу данных
-        total_saved = 0
-        for vacancy in hh_vacancies + sj_vacancies + fl_vacancies:
-            vacancy_dict = {
-                'title': vacancy.title,
-                'company': vacancy.company,
-                'location': vacancy.location,
-                'salary': vacancy.salary,
-                'description': vacancy.description,
-                'published_at': vacancy.published_at,
-                'source': vacancy.source,
-                'original_url': vacancy.original_url
-            }
-            if insert_vacancy(vacancy_dict):
-                total_saved += 1
+def _run_parse_jobs(lease: Optional[CrawlLease] = None):
+    """Парсинг вакансий со всех источников; если аренда lease потеряна, обход прерывается"""
+    try:
+        logger.info("Начало парсинга вакансий")
+        started = time.monotonic()
+
+        # Профиль обхода пишется, только если он запрошен (PROFILE_CRAWL или --profile-next-crawl)
+        mode = next_crawl_mode()
+        profiler = create_session(mode) if mode else None
+        if profiler is not None:
+            logger.info(f"Обход профилируется в режиме {mode}")
+            profiler.start()
+            token = profiler.enter('run')
+
+        # Загрузка, разбор, обогащение, подготовка и запись идут параллельно стадиями конвейера;
+        # повторы между поисками отбрасываются до записи
+        try:
+            counts = IngestionPipeline(profiler=profiler,
+                                       should_stop=lambda: lease is not None and lease.lost).run()
+        finally:
+            if profiler is not None:
+                finish_session(profiler, token, 'crawl')
+        logger.info(f"Парсинг завершен. Новых вакансий {counts['new']}, изменившихся {counts['changed']}, "
+                    f"без изменений {counts['unchanged']}")
+        metrics_store.record('crawl.duration', time.monotonic() - started)
+        metrics_store.record('crawl.vacancies', sum(counts.values()))
+        for kind, count in counts.items():
+            metrics_store.record(f'crawl.{kind}', count)
+        metrics_store.flush()
+
+        if lease is not None and lease.lost:
+            # Снимок, поколение и уведомления - дело процесса, который теперь владеет арендой
+            logger.error("Аренда обхода потеряна: снимок не публикуется, уведомления не отправляются")
+            return
+
+        if not counts['new'] and not counts['changed']:
+            # Данные не менялись - поколение и снимок остаются прежними
+            return
 
         # Удаляем дубликаты
         remove_duplicates()
 
-        logger.info(f"Парсинг завершен. Сохранено {total_saved} вакансий")
+        # Веб-процесс увидит новые данные по смене поколения в новом снимке
+        bump_data_generation()
+        publish_snapshot()
+
+        # Новые вакансии сверяются с сохраненными поисками пользователей
+        if counts['new']:
+            notify_new_vacancies()
 
     except Exception as e:
         logger.error(f"Ошибка при парсинге вакансий: {e}")
 
 
+def archive_jobs():
+    """Переносит старые вакансии в архивную БД, если этот процесс получил аренду архивации"""
+    try:
+        with CrawlLease('archive_vacancies', min_gap=Config.ARCHIVE_INTERVAL * 9 // 10) as lease:
+            if not lease.acquired:
+                logger.info("Архивация выполняется или недавно выполнена другим процессом, запуск пропущен")
+                return
+            if archive_old_vacancies():
+                bump_data_generation()
+                publish_snapshot()
+    except Exception as e:
+        logger.error(f"Ошибка при архивации вакансий: {e}")
+
+
+def metrics_jobs():
+    """Прореживание метрик: старые точки сворачиваются в часовые и дневные"""
+    try:
+        metrics_store.downsample()
+    except Exception as e:
+        logger.error(f"Ошибка прореживания метрик: {e}")
+
+
 def start_scheduler():
     """Запускает планировщик задач"""
     try:
-        # Добавляем задачу парсинга каждый час
+        # Схема и миграции БД до первого сохранения вакансий; снимок - с актуальной схемой
+        initialize_database()
+        publish_snapshot()
+        # Отметка для уведомлений ставится при первом старте, дальше досверяются пропущенные вакансии
+        notify_new_vacancies()
+
+        # Добавляем задачу парсинга каждый час; пропущенные запуски схлопываем,
+        # а параллельный запуск той же задачи запрещаем
         scheduler.add_job(
             parse_jobs,
-            trigger=IntervalTrigger(hours=1),
+            trigger=IntervalTrigger(seconds=Config.SCHEDULER_INTERVAL),
             id='parse_jobs',
             name='Parse job vacancies',
-            replace_existing=True
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+            next_run_time=datetime.now()  # первый парсинг сразу, но в фоне
+        )
+
+        # Старые вакансии раз в сутки уходят в архив, основная таблица остается небольшой
+        scheduler.add_job(
+            archive_jobs,
+            trigger=IntervalTrigger(seconds=Config.ARCHIVE_INTERVAL),
+            id='archive_jobs',
+            name='Archive old vacancies',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+
+        scheduler.add_job(
+            metrics_jobs,
+            trigger=IntervalTrigger(seconds=Config.METRICS_DOWNSAMPLE_INTERVAL),
+            id='metrics_jobs',
+            name='Downsample metrics',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
         )
 
         # Запускаем планировщик
         scheduler.start()
 
-        # Запускаем парсинг сразу при старте
-        parse_jobs()
-
         logger.info("Планировщик успешно запущен")
     except Exception as e:
         logger.error(f"Ошибка при запуске планировщика: {e}")
@@ -87,10 +176,11 @@ def stop_scheduler():
     """Останавливает планировщик задач"""
     try:
         scheduler.shutdown()
+        metrics_store.flush()
         logger.info("Планировщик успешно остановлен")
     except Exception as e:
         logger.error(f"Ошибка при остановке планировщика: {e}")
 
 
 # Экспортируем функции
-__all__ = ['start_scheduler', 'stop_scheduler', 'parse_jobs']
\ No newline at end of file
+__all__ = ['start_scheduler', 'stop_scheduler', 'parse_jobs', 'archive_jobs', 'metrics_jobs']
\ No newline at end of file
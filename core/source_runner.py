@@ -0,0 +1,161 @@
+import logging
+import threading
+from time import monotonic
+from typing import Any, Callable, Dict, Generator, List, Optional
+
+from core.config import Config
+from parsers.registry import CrawlTask, VacancySource
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Размыкатель источника: после threshold неудачных задач подряд источник пропускается
+    cooldown секунд, затем выполняется одна пробная задача. Успех замыкает цепь, ошибка снова размыкает.
+    Состояние живет в процессе воркера между запусками обхода.
+    """
+
+    def __init__(self, name: str, threshold: Optional[int] = None, cooldown: Optional[float] = None):
+        self.name = name
+        self.threshold = threshold or Config.CIRCUIT_BREAKER_THRESHOLD
+        self.cooldown = cooldown if cooldown is not None else Config.CIRCUIT_BREAKER_COOLDOWN
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def allow(self) -> bool:
+        """Можно ли выполнить задачу источника сейчас"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if monotonic() - self.opened_at < self.cooldown or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info(f"Источник {self.name} снова доступен")
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.threshold:
+                if self.opened_at is None or self._probing:
+                    logger.warning(
+                        f"Источник {self.name} отключен на {self.cooldown} с после {self.failures} ошибок подряд"
+                    )
+                self.opened_at = monotonic()
+                self._probing = False
+
+    def release_probe(self) -> None:
+        """Пробная задача прервана без результата: следующая задача снова может стать пробной"""
+        with self._lock:
+            self._probing = False
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """Возвращает размыкатель источника (создает при первом обращении)"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
+
+
+class SourceRunner:
+    """
+    Выполняет вызовы источника в пределах срока обхода: парсер не начинает запросы после срока,
+    и таймаут каждого запроса не больше оставшегося времени. Ошибки учитывает размыкатель.
+    """
+
+    def __init__(self, source: VacancySource):
+        self.source = source
+        self.breaker = get_circuit_breaker(source.name)
+        self.request_timeout = (Config.SOURCE_REQUEST_TIMEOUTS.get(source.name)
+                                or source.request_timeout or Config.SOURCE_REQUEST_TIMEOUT)
+        deadline = Config.SOURCE_DEADLINES.get(source.name) or source.deadline or Config.SOURCE_DEADLINE
+        self.deadline_at = monotonic() + deadline
+        self.completed = 0
+        self.failed = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def _count(self, attribute: str) -> None:
+        with self._lock:
+            setattr(self, attribute, getattr(self, attribute) + 1)
+
+    def _call(self, method: Callable, parser, task: CrawlTask, on_error: Callable, counted: bool) -> list:
+        if monotonic() >= self.deadline_at or not self.breaker.allow():
+            if counted:
+                self._count('skipped')
+            return []
+        parser.deadline = self.deadline_at
+        parser.timeout = self.request_timeout
+        try:
+            result = method(parser, task)
+        except Exception as e:
+            logger.error(f"Ошибка при выполнении задачи {task.key}: {e}")
+            self._count('failed')
+            self.breaker.record_failure()
+            return on_error(e)
+        if counted:
+            self._count('completed')
+        self.breaker.record_success()
+        return result
+
+    def expand(self, parser, task: CrawlTask) -> List[CrawlTask]:
+        """Уточняет задачу; при ошибке задача выполняется как есть"""
+        return self._call(self.source.expand_task, parser, task, lambda e: [task], counted=False)
+
+    def fetch(self, parser, task: CrawlTask) -> list:
+        """Обходит задачу; при ошибке возвращает то, что успели собрать"""
+        return self._call(self.source.fetch, parser, task, lambda e: getattr(e, 'partial', []), counted=True)
+
+    def fetch_pages(self, parser, task: CrawlTask, start_page: int = 0) -> Generator[Any, None, bool]:
+        """
+        Сырые страницы задачи для конвейера, начиная со страницы start_page (продолжение обхода).
+        При ошибке поток страниц обрывается, загруженные остаются. Возвращает True, если задача пройдена до конца.
+        """
+        if monotonic() >= self.deadline_at or not self.breaker.allow():
+            self._count('skipped')
+            return False
+        parser.deadline = self.deadline_at
+        parser.timeout = self.request_timeout
+        try:
+            if start_page:
+                yield from self.source.fetch_pages(parser, task, start_page)
+            else:
+                yield from self.source.fetch_pages(parser, task)
+        except GeneratorExit:
+            # Конвейер перестал читать страницы (например, потеряна аренда обхода): это не успех и не ошибка
+            self.breaker.release_probe()
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка при выполнении задачи {task.key}: {e}")
+            self._count('failed')
+            self.breaker.record_failure()
+            return False
+        self._count('completed')
+        self.breaker.record_success()
+        return True
+
+    def summary(self) -> str:
+        return (f"{self.source.name}: выполнено {self.completed}, ошибок {self.failed}, "
+                f"пропущено {self.skipped}, размыкатель {self.breaker.state}")
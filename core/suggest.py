@@ -0,0 +1,233 @@
+import heapq
+import logging
+import re
+import sqlite3
+import threading
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.config import Config
+from core.database import create_read_connection
+from core.generation import watcher
+
+logger = logging.getLogger(__name__)
+
+WORD_START_RE = re.compile(r"(?:^|[\s\-/(,.«\"])(?=\w)")
+MAX_KEY_LENGTH = 40  # дальше этой длины префиксы никто не вводит
+SUGGEST_KINDS = ("title", "company", "location")
+
+
+def normalize_suggest_key(value: str) -> str:
+    return " ".join((value or "").lower().replace("ё", "е").split())
+
+
+class PrefixIndex:
+    """
+    Подсказки по префиксу: отсортированный массив ключей и bisect.
+    Ключи - хвосты значения с начала каждого слова ("python developer" находится и по "dev"),
+    вес значения - сколько раз оно встретилось. Для коротких префиксов с большим диапазоном
+    ключей лучшие результаты кэшируются до следующего обновления индекса.
+    Значение, частота которого упала до нуля, в выдачу не попадает; его ключи остаются до перестройки.
+    """
+
+    def __init__(self, scan_limit: int = 256):
+        self.scan_limit = scan_limit
+        self._keys: List[str] = []
+        self._key_terms: List[int] = []
+        self._terms: List[str] = []
+        self._weights: List[int] = []
+        self._term_ids: Dict[str, int] = {}
+        self._top_cache: Dict[Tuple[str, int], List[Tuple[str, int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def copy(self) -> 'PrefixIndex':
+        clone = PrefixIndex(self.scan_limit)
+        clone._keys = list(self._keys)
+        clone._key_terms = list(self._key_terms)
+        clone._terms = list(self._terms)
+        clone._weights = list(self._weights)
+        clone._term_ids = dict(self._term_ids)
+        return clone
+
+    @staticmethod
+    def _keys_for(value: str) -> List[str]:
+        normalized = normalize_suggest_key(value)
+        starts = {match.end() for match in WORD_START_RE.finditer(normalized)}
+        return [normalized[start:start + MAX_KEY_LENGTH] for start in sorted(starts)]
+
+    def add(self, counts: Dict[str, int]) -> None:
+        """
+        Добавляет к частотам значений counts (изменения бывают и отрицательными);
+        ключи новых значений вставляются в отсортированный массив
+        """
+        new_entries = []
+        for value, count in counts.items():
+            if not value:
+                continue
+            normalized = normalize_suggest_key(value)
+            if not normalized:
+                continue
+            term_id = self._term_ids.get(normalized)
+            if term_id is not None:
+                self._weights[term_id] += count
+                continue
+            if count <= 0:
+                continue
+            term_id = len(self._terms)
+            self._term_ids[normalized] = term_id
+            self._terms.append(value.strip())
+            self._weights.append(count)
+            new_entries.extend((key, term_id) for key in self._keys_for(value))
+
+        if new_entries:
+            if len(new_entries) > len(self._keys) // 8:
+                # Много новых ключей: дешевле пересортировать все целиком
+                entries = sorted(zip(self._keys + [k for k, _ in new_entries],
+                                     self._key_terms + [t for _, t in new_entries]))
+                self._keys = [key for key, _ in entries]
+                self._key_terms = [term_id for _, term_id in entries]
+            else:
+                for key, term_id in new_entries:
+                    position = bisect_left(self._keys, key)
+                    self._keys.insert(position, key)
+                    self._key_terms.insert(position, term_id)
+        self._top_cache = {}
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        return bisect_left(self._keys, prefix), bisect_left(self._keys, prefix + "\uffff")
+
+    def _top(self, lo: int, hi: int, limit: int) -> List[Tuple[str, int]]:
+        weights = self._weights
+        term_ids = {term_id for term_id in self._key_terms[lo:hi] if weights[term_id] > 0}
+        best = heapq.nlargest(limit, term_ids, key=weights.__getitem__)
+        return [(self._terms[term_id], self._weights[term_id]) for term_id in best]
+
+    def search(self, prefix: str, limit: int = 10) -> List[Tuple[str, int]]:
+        """Самые частые значения, у которых какое-либо слово начинается с prefix"""
+        prefix = normalize_suggest_key(prefix)[:MAX_KEY_LENGTH]
+        if not prefix:
+            return []
+        lo, hi = self._range(prefix)
+        if hi - lo <= self.scan_limit:
+            return self._top(lo, hi, limit)
+        cache_key = (prefix, limit)
+        cached = self._top_cache.get(cache_key)
+        if cached is None:
+            cached = self._top_cache[cache_key] = self._top(lo, hi, limit)
+        return cached
+
+
+class SuggestService:
+    """
+    Индексы подсказок по названиям, компаниям и городам. При смене поколения данных индексы
+    обновляются по журналу suggest_changes (его пишут триггеры на vacancies: новые, измененные,
+    удаленные и перенесенные в архив вакансии). Индексы строятся заново при первой загрузке,
+    если журнал уже очищен дальше прочитанного места или изменений больше SUGGEST_MAX_CHANGES.
+    """
+
+    def __init__(self):
+        self.indexes = {kind: PrefixIndex() for kind in SUGGEST_KINDS}
+        self._generation = None
+        self._last_change: Optional[int] = None  # последняя учтенная запись журнала
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _last_change_id(conn) -> int:
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'suggest_changes'").fetchone()
+        return row[0] if row else 0
+
+    def _load(self, conn) -> int:
+        # Новые индексы подменяют старые целиком: поиск в других потоках не видит наполовину
+        # построенные массивы
+        indexes = {kind: PrefixIndex() for kind in SUGGEST_KINDS}
+        counters = {kind: Counter() for kind in SUGGEST_KINDS}
+        try:
+            last_change = self._last_change_id(conn)
+        except sqlite3.OperationalError:
+            # Снимок без журнала (опубликован до его появления): следующее обновление - тоже целиком
+            last_change = None
+        rows = conn.execute("""
+            SELECT v.title, v.company, l.name
+            FROM vacancies v LEFT JOIN locations l ON l.id = v.location_id
+        """)
+        loaded = 0
+        for row in rows:
+            loaded += 1
+            counters["title"][row[0]] += 1
+            counters["company"][row[1]] += 1
+            if row[2]:
+                counters["location"][row[2]] += 1
+        for kind, counter in counters.items():
+            indexes[kind].add(counter)
+        self.indexes = indexes
+        self._last_change = last_change
+        return loaded
+
+    def _apply_changes(self, conn) -> Optional[int]:
+        """Применяет изменения из журнала; None - по журналу обновить нельзя, нужна перестройка"""
+        if self._last_change is None:
+            return None
+        try:
+            last_change = self._last_change_id(conn)
+            first_change = conn.execute("SELECT MIN(id) FROM suggest_changes").fetchone()[0]
+        except sqlite3.OperationalError:
+            return None
+        if last_change == self._last_change:
+            return 0
+        if first_change is None or first_change > self._last_change + 1:
+            return None
+        if last_change - self._last_change > Config.SUGGEST_MAX_CHANGES:
+            return None
+        deltas = {kind: {} for kind in SUGGEST_KINDS}
+        for kind, value, delta in conn.execute("""
+            SELECT kind, value, SUM(delta) FROM suggest_changes WHERE id > ? AND id <= ?
+            GROUP BY kind, value
+        """, (self._last_change, last_change)):
+            if delta and kind in deltas:
+                deltas[kind][value] = delta
+        # Изменения вносятся в копии: поиск в других потоках работает со старыми индексами до подмены
+        indexes = dict(self.indexes)
+        for kind, counts in deltas.items():
+            if counts:
+                indexes[kind] = indexes[kind].copy()
+                indexes[kind].add(counts)
+        self.indexes = indexes
+        applied = last_change - self._last_change
+        self._last_change = last_change
+        return applied
+
+    def refresh(self) -> None:
+        """Обновляет индексы, если воркер записал данные с прошлой проверки"""
+        generation = watcher.current()
+        if generation == self._generation:
+            return
+        with self._lock:
+            if generation == self._generation:
+                return
+            conn = create_read_connection()
+            try:
+                # Журнал и вакансии читаются в одной транзакции, чтобы видеть одно и то же состояние
+                conn.execute("BEGIN")
+                applied = self._apply_changes(conn)
+                if applied is None:
+                    loaded = self._load(conn)
+                    logger.info(f"Индекс подсказок построен по {loaded} вакансиям, поколение {generation}")
+                elif applied:
+                    logger.info(f"Индекс подсказок обновлен по {applied} изменениям, поколение {generation}")
+            finally:
+                conn.close()
+            self._generation = generation
+
+    def suggest(self, prefix: str, kinds: Optional[Iterable[str]] = None, limit: int = 10) -> Dict[str, List[dict]]:
+        self.refresh()
+        indexes = self.indexes
+        return {
+            kind: [{"value": value, "count": count} for value, count in indexes[kind].search(prefix, limit)]
+            for kind in (kinds or SUGGEST_KINDS)
+        }
+
+
+suggest_service = SuggestService()
@@ -0,0 +1,53 @@
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+# Московское время (без перехода на летнее время с 2014 года)
+MSK = timezone(timedelta(hours=3), 'MSK')
+
+RELATIVE_RE = re.compile(r"^(\d+)\s*([mhdw])$")
+RELATIVE_UNITS = {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def to_epoch(value: Any) -> Optional[int]:
+    """
+    Приводит дату публикации к UTC-таймстампу в секундах.
+    Понимает datetime (aware и naive), ISO-строки в формате sqlite3 ('2024-05-01 10:00:00+03:00')
+    и HH ('2024-05-01T10:00:00+0300'), а также числа. Naive-время считается локальным временем сервера:
+    так его сохраняли парсеры (datetime.fromtimestamp, datetime.now()).
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        text = value.strip()
+        if text.isdigit():
+            return int(text)
+        # fromisoformat в Python 3.11 понимает и '+0300', и пробел вместо 'T'
+        try:
+            value = datetime.fromisoformat(text)
+        except ValueError:
+            return None
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    return None
+
+
+def parse_time_filter(value: str, now: Optional[float] = None) -> Optional[int]:
+    """
+    Разбирает значение фильтра since/until: относительное ('24h', '7d', '30m', '2w'),
+    таймстамп или ISO-дата. Возвращает UTC-таймстамп; ValueError для нераспознанных значений.
+    """
+    if not value:
+        return None
+    text = value.strip().lower()
+    match = RELATIVE_RE.match(text)
+    if match:
+        now = time.time() if now is None else now
+        return int(now) - int(match.group(1)) * RELATIVE_UNITS[match.group(2)]
+    epoch = to_epoch(text)
+    if epoch is None:
+        raise ValueError(f"Некорректное значение даты: {value}")
+    return epoch
@@ -1,6 +1,9 @@
-from core.database import initialize_database
+from core.database import initialize_database, publish_snapshot
+from metrics import create_metrics_table
 
 if __name__ == "__main__":
     print("Инициализация базы данных...")
     initialize_database()
+    create_metrics_table()
+    publish_snapshot()
     print("База данных успешно инициализирована!")
\ No newline at end of file
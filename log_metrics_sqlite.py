@@ -1,50 +1,24 @@
-import sqlite3
-from datetime import datetime
+from metrics.store import LEGACY_COLUMNS, metrics_store
 
-DB_NAME = 'metrics.db'
-TABLE_NAME = 'project_metrics'
 
 def init_db():
-    """Создаёт таблицу метрик, если она не существует."""
-    with sqlite3.connect(DB_NAME) as conn:
-        cursor = conn.cursor()
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TEXT,
-                source TEXT,
-                vacancies_count INTEGER,
-                parsing_time REAL,
-                salary_percent TEXT,
-                error_count INTEGER,
-                ui_response_time INTEGER,
-                comment TEXT
-            )
-        ''')
-        conn.commit()
-        print(f"[✓] Таблица '{TABLE_NAME}' инициализирована в '{DB_NAME}'.")
+    """Создаёт хранилище метрик, если оно не существует."""
+    metrics_store.connect().close()
+    print("[✓] Хранилище метрик инициализировано.")
+
 
 def log_metrics(data: dict):
-    """Добавляет строку метрик в базу данных."""
-    with sqlite3.connect(DB_NAME) as conn:
-        cursor = conn.cursor()
-        cursor.execute(f'''
-            INSERT INTO {TABLE_NAME} (
-                date, source, vacancies_count, parsing_time, 
-                salary_percent, error_count, ui_response_time, comment
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            datetime.now().strftime('%Y-%m-%d'),
-            data.get('source'),
-            data.get('vacancies_count'),
-            data.get('parsing_time'),
-            data.get('salary_percent'),
-            data.get('error_count'),
-            data.get('ui_response_time'),
-            data.get('comment')
-        ))
-        conn.commit()
-        print(f"[+] Метрики добавлены: {data}")
+    """Записывает метрики запуска (поля прежней таблицы project_metrics) в хранилище."""
+    source = data.get('source') or ''
+    for column, name in LEGACY_COLUMNS.items():
+        value = data.get(column)
+        if isinstance(value, str):
+            value = value.strip().rstrip('%')
+        if value is not None and value != '':
+            metrics_store.record(name, float(value), source)
+    metrics_store.flush()
+    print(f"[+] Метрики добавлены: {data}")
+
 
 if __name__ == '__main__':
     init_db()
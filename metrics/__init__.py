@@ -1,17 +1,6 @@
-import sqlite3
+from metrics.store import metrics_store
 
-def create_metrics_table():
-    conn = sqlite3.connect('jobs.db')  # путь к твоей БД
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS project_metrics (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            value REAL NOT NULL,
-            updated_at TEXT NOT NULL
-        )
-    ''')
-    conn.commit()
-    conn.close()
 
-create_metrics_table()
+def create_metrics_table():
+    """Создает хранилище метрик (metrics/store.py): одна БД и одна таблица точек для всех метрик"""
+    metrics_store.connect().close()
@@ -1,27 +1,40 @@
-import sqlite3
-import os
-
-DB_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'jobs.db')
-TABLE_NAME = "project_metrics"
-
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(f'''
-        CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            date TEXT NOT NULL,
-            source TEXT NOT NULL,
-            vacancies_count INTEGER NOT NULL,
-            parsing_time REAL NOT NULL,
-            salary_percent REAL NOT NULL,
-            error_count INTEGER NOT NULL,
-            ui_response_time REAL NOT NULL,
-            comment TEXT
-        )
-    ''')
-    conn.commit()
-    conn.close()
-
-# Гарантированно создаем таблицу при импорте
-init_db()
\ No newline at end of file
+from datetime import datetime
+from flask import Flask, render_template, request
+import time
+
+from core.timeutils import parse_time_filter
+from metrics.store import metrics_store
+
+app = Flask(__name__)
+
+PAGE_SIZE = 100
+
+
+@app.template_filter('datetime')
+def format_ts(ts: int) -> str:
+    return datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
+
+
+# --- Роут отображения: ряд метрики за окно времени и страница точек (без чтения всей таблицы) ---
+@app.route('/')
+def index():
+    names = metrics_store.names()
+    name = request.args.get('name') or (names[0] if names else '')
+    source = request.args.get('source') or None
+    window = request.args.get('window', '7d')
+    now = int(time.time())
+    try:
+        since = parse_time_filter(window, now)
+    except ValueError:
+        window, since = '7d', now - 7 * 86400
+    until = int(request.args.get('until') or now + 1)
+
+    series = metrics_store.series(name, since, now + 1, source) if name else {"step": 0, "points": []}
+    page = metrics_store.points(name, since, until, source, PAGE_SIZE) if name else {"points": [], "next_until": None}
+    return render_template('metrics.html', names=names, name=name, source=source or '', window=window,
+                           series=series, page=page)
+
+
+# --- Точка входа ---
+if __name__ == '__main__':
+    app.run(debug=True)
@@ -0,0 +1,334 @@
+"""
+Хранилище метрик проекта: одна БД (metrics.db) и одна таблица точек временного ряда.
+
+Точка - агрегат значений метрики за интервал: (name, source, resolution, ts) -> count, sum, min, max.
+Сырые точки пишутся с шагом в секунду; старше METRICS_RAW_RETENTION они сворачиваются в часовые,
+часовые старше METRICS_HOURLY_RETENTION - в дневные, дневные старше METRICS_DAILY_RETENTION удаляются.
+
+Обслуживание из корня проекта:
+    python -m metrics.store downsample
+    python -m metrics.store import-legacy metrics.db jobs.db
+"""
+import atexit
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.config import Config
+from core.database import get_db_path
+
+logger = logging.getLogger(__name__)
+
+RAW, HOURLY, DAILY = 1, 3600, 86400
+# Шаги отображения ряда: выбирается самый мелкий, при котором точек не больше лимита
+DISPLAY_STEPS = (60, 300, 900, HOURLY, 6 * HOURLY, DAILY, 7 * DAILY)
+
+# Столбцы прежних таблиц project_metrics -> имена метрик
+LEGACY_COLUMNS = {
+    "vacancies_count": "crawl.vacancies",
+    "parsing_time": "crawl.duration",
+    "salary_percent": "crawl.salary_percent",
+    "error_count": "crawl.errors",
+    "ui_response_time": "ui.response_time",
+}
+
+CREATE_POINTS_SQL = """
+    CREATE TABLE IF NOT EXISTS metric_points (
+        name TEXT NOT NULL,
+        resolution INTEGER NOT NULL,
+        ts INTEGER NOT NULL,
+        source TEXT NOT NULL DEFAULT '',
+        count INTEGER NOT NULL,
+        sum REAL NOT NULL,
+        min REAL NOT NULL,
+        max REAL NOT NULL,
+        PRIMARY KEY (name, resolution, ts, source)
+    ) WITHOUT ROWID
+"""
+
+MERGE_SQL = """
+    ON CONFLICT (name, resolution, ts, source) DO UPDATE SET
+        count = count + excluded.count,
+        sum = sum + excluded.sum,
+        min = MIN(min, excluded.min),
+        max = MAX(max, excluded.max)
+"""
+
+UPSERT_POINT_SQL = f"""
+    INSERT INTO metric_points (name, resolution, ts, source, count, sum, min, max)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    {MERGE_SQL}
+"""
+
+
+def get_metrics_path() -> str:
+    """Путь к БД метрик (по умолчанию рядом с основной БД)"""
+    return Config.METRICS_DATABASE_PATH or os.path.join(os.path.dirname(get_db_path()), 'metrics.db')
+
+
+def display_step(since: int, until: int, limit: int) -> int:
+    for step in DISPLAY_STEPS:
+        if (until - since) / step <= limit:
+            return step
+    return DISPLAY_STEPS[-1]
+
+
+class MetricsStore:
+    """
+    Запись метрик буферизуется в памяти (значения одной секунды сразу складываются в одну точку)
+    и сбрасывается одной транзакцией, когда накопилось METRICS_FLUSH_SIZE точек или прошло
+    METRICS_FLUSH_INTERVAL секунд. После start_flusher() сброс идет только в фоновом потоке.
+    Чтение всегда ограничено окном времени и числом строк.
+    """
+
+    def __init__(self, path: Optional[str] = None, flush_size: Optional[int] = None,
+                 flush_interval: Optional[float] = None):
+        self.path = path
+        self.flush_size = flush_size or Config.METRICS_FLUSH_SIZE
+        self.flush_interval = Config.METRICS_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self._buffer: Dict[Tuple[str, int, str], list] = {}
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        self._flusher: Optional[threading.Thread] = None
+
+    def connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path or get_metrics_path(), timeout=10)
+        conn.row_factory = sqlite3.Row
+        if not self._schema_ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(CREATE_POINTS_SQL)
+            conn.commit()
+            self._schema_ready = True
+        return conn
+
+    def record(self, name: str, value: float, source: str = "", ts: Optional[float] = None) -> None:
+        """Добавляет значение метрики; запись в БД - при очередном сбросе буфера"""
+        key = (name, int(time.time() if ts is None else ts), source)
+        with self._lock:
+            point = self._buffer.get(key)
+            if point is None:
+                self._buffer[key] = [1, value, value, value]
+            else:
+                point[0] += 1
+                point[1] += value
+                point[2] = min(point[2], value)
+                point[3] = max(point[3], value)
+            due = self._flusher is None and (len(self._buffer) >= self.flush_size
+                                             or time.monotonic() - self._flushed_at >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def start_flusher(self) -> None:
+        """
+        Сбрасывает буфер в фоновом потоке раз в flush_interval секунд: record() перестает писать в БД сам,
+        и поток запроса веб-приложения не ждет SQLite. Значения одной секунды складываются в одну точку,
+        поэтому буфер за интервал остается небольшим.
+        """
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flush_loop, name="metrics-flusher", daemon=True)
+        self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self) -> int:
+        """Пишет накопленные точки одной транзакцией; возвращает их число"""
+        with self._lock:
+            buffer, self._buffer = self._buffer, {}
+            self._flushed_at = time.monotonic()
+        if not buffer:
+            return 0
+        try:
+            conn = self.connect()
+            try:
+                with conn:
+                    conn.executemany(UPSERT_POINT_SQL, [
+                        (name, RAW, ts, source, *point) for (name, ts, source), point in buffer.items()
+                    ])
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            # Метрики не должны ломать парсинг и страницы: точки теряются, ошибка пишется в лог
+            logger.error(f"Ошибка записи метрик: {e}")
+            return 0
+        return len(buffer)
+
+    def downsample(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Сворачивает сырые точки в часовые, часовые в дневные и удаляет дневные старше срока хранения"""
+        now = int(time.time() if now is None else now)
+        self.flush()
+        result = {}
+        conn = self.connect()
+        try:
+            with conn:
+                for source_res, target_res, retention in ((RAW, HOURLY, Config.METRICS_RAW_RETENTION),
+                                                          (HOURLY, DAILY, Config.METRICS_HOURLY_RETENTION)):
+                    # Граница выровнена по целевому интервалу, чтобы сворачивались только полные интервалы
+                    cutoff = now - retention
+                    cutoff -= cutoff % target_res
+                    conn.execute(f"""
+                        INSERT INTO metric_points (name, resolution, ts, source, count, sum, min, max)
+                        SELECT name, ?, ts - ts % ?, source, SUM(count), SUM(sum), MIN(min), MAX(max)
+                        FROM metric_points
+                        WHERE resolution = ? AND ts < ?
+                        GROUP BY name, ts - ts % ?, source
+                        {MERGE_SQL}
+                    """, (target_res, target_res, source_res, cutoff, target_res))
+                    result[f"{source_res}->{target_res}"] = conn.execute(
+                        "DELETE FROM metric_points WHERE resolution = ? AND ts < ?", (source_res, cutoff)
+                    ).rowcount
+                result["expired"] = conn.execute(
+                    "DELETE FROM metric_points WHERE resolution = ? AND ts < ?",
+                    (DAILY, now - Config.METRICS_DAILY_RETENTION)
+                ).rowcount
+        finally:
+            conn.close()
+        logger.info(f"Метрики прорежены: {result}")
+        return result
+
+    def names(self) -> List[str]:
+        conn = self.connect()
+        try:
+            # Пропуск по первичному ключу: одна строка индекса на имя
+            names = []
+            row = conn.execute("SELECT MIN(name) FROM metric_points").fetchone()
+            while row and row[0] is not None:
+                names.append(row[0])
+                row = conn.execute("SELECT MIN(name) FROM metric_points WHERE name > ?", (row[0],)).fetchone()
+            return names
+        finally:
+            conn.close()
+
+    def series(self, name: str, since: int, until: int, source: Optional[str] = None,
+               limit: int = 500) -> Dict[str, Any]:
+        """
+        Ряд метрики в окне [since, until) с шагом, при котором точек не больше limit.
+        Берет точки всех разрешений: свежие сырые, более старые часовые и дневные.
+        """
+        step = display_step(since, until, limit)
+        sql = """
+            SELECT ts - ts % ? AS bucket, SUM(count), SUM(sum), MIN(min), MAX(max)
+            FROM metric_points
+            WHERE name = ? AND resolution IN (?, ?, ?) AND ts >= ? AND ts < ?
+        """
+        params: List[Any] = [step, name, RAW, HOURLY, DAILY, since, until]
+        if source is not None:
+            sql += " AND source = ?"
+            params.append(source)
+        sql += " GROUP BY bucket ORDER BY bucket LIMIT ?"
+        params.append(limit)
+        conn = self.connect()
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+        return {
+            "name": name,
+            "step": step,
+            "points": [
+                {"ts": bucket, "count": count, "avg": total / count, "min": low, "max": high}
+                for bucket, count, total, low, high in rows
+            ],
+        }
+
+    def points(self, name: str, since: int, until: int, source: Optional[str] = None,
+               limit: int = 100) -> Dict[str, Any]:
+        """
+        Точки метрики от новых к старым, страница не больше limit строк. Следующая страница -
+        тот же запрос с until = next_until (пагинация по ts, без OFFSET).
+        """
+        sql = """
+            SELECT ts, resolution, source, count, sum, min, max
+            FROM metric_points
+            WHERE name = ? AND resolution IN (?, ?, ?) AND ts >= ? AND ts < ?
+        """
+        params: List[Any] = [name, RAW, HOURLY, DAILY, since, until]
+        if source is not None:
+            sql += " AND source = ?"
+            params.append(source)
+        sql += " ORDER BY ts DESC LIMIT ?"
+        params.append(limit + 1)
+        conn = self.connect()
+        try:
+            rows = [dict(row) for row in conn.execute(sql, params).fetchall()]
+        finally:
+            conn.close()
+        next_until = None
+        if len(rows) > limit:
+            # Точки одной секунды не разрываются между страницами
+            boundary = rows[limit]["ts"]
+            page = [row for row in rows[:limit] if row["ts"] > boundary]
+            if page:
+                rows, next_until = page, boundary + 1
+            else:
+                rows, next_until = rows[:limit], boundary
+        return {"points": rows, "next_until": next_until}
+
+    def import_legacy(self, path: str) -> int:
+        """Переносит строки прежних таблиц project_metrics (обе схемы) в хранилище; возвращает число значений"""
+        legacy = sqlite3.connect(path)
+        legacy.row_factory = sqlite3.Row
+        imported = 0
+        try:
+            columns = {row[1] for row in legacy.execute("PRAGMA table_info(project_metrics)")}
+            if not columns:
+                return 0
+            for row in legacy.execute("SELECT * FROM project_metrics"):
+                if "name" in columns:
+                    values = {row["name"]: row["value"]}
+                    when, source = row["updated_at"], ""
+                else:
+                    values = {LEGACY_COLUMNS[column]: row[column] for column in LEGACY_COLUMNS if column in columns}
+                    when, source = row["date"], row["source"] or ""
+                try:
+                    ts = datetime.fromisoformat(when).timestamp()
+                except (TypeError, ValueError):
+                    continue
+                for name, value in values.items():
+                    if isinstance(value, str):
+                        value = value.strip().rstrip("%")
+                    try:
+                        self.record(name, float(value), source, ts)
+                    except (TypeError, ValueError):
+                        continue
+                    imported += 1
+        finally:
+            legacy.close()
+        self.flush()
+        logger.info(f"Из {path} перенесено {imported} значений метрик")
+        return imported
+
+
+metrics_store = MetricsStore()
+atexit.register(metrics_store.flush)
+
+
+def record_metric(name: str, value: float, source: str = "") -> None:
+    metrics_store.record(name, value, source)
+
+
+def main(argv: List[str]) -> int:
+    if argv[1:2] == ["downsample"]:
+        metrics_store.downsample()
+        return 0
+    if argv[1:2] == ["import-legacy"] and argv[2:]:
+        for path in argv[2:]:
+            metrics_store.import_legacy(path)
+        return 0
+    print("Использование: python -m metrics.store downsample | import-legacy <db> [<db> ...]")
+    return 2
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    sys.exit(main(sys.argv))
@@ -1,22 +1,20 @@
+import re
 import requests
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 from dataclasses import dataclass
-from time import sleep
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import logging
+from parsers.rate_limiter import get_rate_limiter
+from parsers.registry import BaseSource, CrawlTask, DeadlineMixin, SourceFetchError
+from core.timeutils import MSK
 
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    filename='fl_parser.log'
-)
 logger = logging.getLogger(__name__)
 
 FL_BASE_URL = "https://www.fl.ru"
 FL_SEARCH_URL = f"{FL_BASE_URL}/projects/"
 REQUEST_DELAY = 2.0  # Увеличиваем задержку для избежания блокировки
+PROJECT_ID_RE = re.compile(r"/projects/(\d+)")
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
 
 
@@ -30,10 +28,12 @@ class Vacancy:
     published_at: datetime
     source: str = "fl.ru"
     original_url: str = ""
+    source_id: str = ""
 
 
-class FLParser:
+class FLParser(DeadlineMixin):
     def __init__(self):
+        self.rate_limiter = get_rate_limiter("fl.ru", REQUEST_DELAY)
         self._init_session()
 
     def _init_session(self):
@@ -52,119 +52,153 @@ class FLParser:
         return text.strip()
 
     def _parse_date(self, date_str: str) -> datetime:
-        """Парсит дату в формате FL.ru"""
+        """Парсит дату в формате FL.ru (время на сайте московское)"""
         try:
             # Пример: "сегодня в 14:30" или "вчера в 09:15"
             if "сегодня" in date_str:
-                date_part = datetime.now().date()
+                date_part = datetime.now(MSK).date()
             elif "вчера" in date_str:
-                date_part = datetime.now().date() - timedelta(days=1)
+                date_part = datetime.now(MSK).date() - timedelta(days=1)
             else:
                 # Для других форматов может потребоваться дополнительная обработка
-                return datetime.now()
+                return datetime.now(MSK)
 
             time_part = date_str.split()[-1]
-            return datetime.combine(date_part, datetime.strptime(time_part, "%H:%M").time())
+            return datetime.combine(date_part, datetime.strptime(time_part, "%H:%M").time(), tzinfo=MSK)
         except Exception as e:
             logger.error(f"Ошибка парсинга даты: {e}")
-            return datetime.now()
+            return datetime.now(MSK)
 
-    def _parse_vacancy_page(self, url: str) -> Dict:
-        """Парсит страницу вакансии"""
+    def _fetch_vacancy_page(self, url: str) -> str:
+        """HTML страницы проекта (пустая строка, если загрузить не удалось)"""
         try:
-            response = self.session.get(url, timeout=10)
+            response = self.session.get(url, timeout=self.request_timeout())
             response.raise_for_status()
             response.encoding = 'utf-8'
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            description = soup.find('div', {'class': 'b-layout__txt'})
-            if description:
-                description = description.get_text('\n', strip=True)
-            else:
-                description = ""
-
-            return {
-                'description': description
-            }
-        except Exception as e:
-            logger.error(f"Ошибка при парсинге страницы вакансии {url}: {e}")
-            return {'description': ''}
-
-    def parse_vacancies(self, search_query: str = "Python") -> List[Vacancy]:
-        """Основной метод парсинга вакансий"""
-        vacancies = []
+            return response.text
+        except requests.RequestException as e:
+            logger.error(f"Ошибка при загрузке страницы вакансии {url}: {e}")
+            return ""
+
+    def _parse_description(self, html: str) -> str:
+        """Описание проекта со страницы проекта"""
+        if not html:
+            return ""
+        soup = BeautifulSoup(html, 'html.parser')
+        description = soup.find('div', {'class': 'b-layout__txt'})
+        return description.get_text('\n', strip=True) if description else ""
+
+    def fetch_pages(self, search_query: str = "Python", start_page: int = 0) -> Iterator[Dict]:
+        """
+        Страницы списка проектов вместе с HTML страниц самих проектов, без разбора.
+        start_page - сколько первых страниц списка пропустить (нумерация на сайте с 1)
+        """
         params = {
             "kind": "1",  # Проекты
             "sb": "1",  # Сортировка по дате
             "q": search_query
         }
 
+        page = 1 + start_page
+        while True:
+            params["page"] = page
+            try:
+                self.wait_turn()
+                response = self.session.get(FL_SEARCH_URL, params=params, timeout=self.request_timeout())
+                response.raise_for_status()
+                response.encoding = 'utf-8'
+            except requests.RequestException as e:
+                logger.error(f"Ошибка запроса страницы {page}: {e}")
+                raise SourceFetchError(f"Ошибка запроса страницы {page}: {e}") from e
+
+            # Для загрузки страниц проектов хватает ссылок; полный разбор списка - в parse_page
+            links = BeautifulSoup(response.text, 'html.parser', parse_only=SoupStrainer('a', class_='b-post__link'))
+            urls = [FL_BASE_URL + link['href'] for link in links.find_all('a', href=True)]
+            if not urls:
+                logger.info(f"Достигнут конец страниц на странице {page}")
+                break
+
+            # Страница каждого проекта - отдельный запрос, срок обхода проверяется перед каждым
+            yield {"html": response.text, "projects": {url: self._fetch_vacancy_page(url) for url in urls}}
+            page += 1
+
+    def parse_page(self, data: Dict) -> List[Vacancy]:
+        """Разбор страницы списка проектов и страниц проектов в вакансии"""
+        vacancies = []
+        soup = BeautifulSoup(data["html"], 'html.parser')
+        for project in soup.find_all('div', {'class': 'project'}):
+            try:
+                title_elem = project.find('a', {'class': 'b-post__link'})
+                if not title_elem:
+                    continue
+
+                title = title_elem.get_text(strip=True)
+                original_url = FL_BASE_URL + title_elem['href']
+                project_id = PROJECT_ID_RE.search(original_url)
+
+                # Парсим дополнительные данные
+                price_elem = project.find('span', {'class': 'b-post__price'})
+                salary = self._parse_salary(price_elem.get_text(strip=True)) if price_elem else None
+
+                employer_elem = project.find('a', {'class': 'b-post__link_txt'})
+                company = employer_elem.get_text(strip=True) if employer_elem else "Частное лицо"
+
+                date_elem = project.find('span', {'class': 'b-post__time'})
+                date = self._parse_date(date_elem.get_text(strip=True)) if date_elem else datetime.now(MSK)
+
+                vacancy = Vacancy(
+                    title=title,
+                    company=company,
+                    location="Удалённая работа",  # FL.ru в основном для удалёнки
+                    salary=salary,
+                    description=self._parse_description(data["projects"].get(original_url, "")),
+                    published_at=date,
+                    original_url=original_url,
+                    source_id=project_id.group(1) if project_id else original_url
+                )
+                vacancies.append(vacancy)
+                logger.info(f"Обработана вакансия: {title}")
+            except Exception as e:
+                logger.error(f"Ошибка при обработке вакансии: {e}")
+        return vacancies
+
+    def parse_vacancies(self, search_query: str = "Python") -> List[Vacancy]:
+        """Основной метод парсинга вакансий"""
+        vacancies = []
         try:
             logger.info(f"Начало парсинга вакансий FL.ru с запросом '{search_query}'")
-
-            page = 1
-            while True:
-                params["page"] = page
-                try:
-                    response = self.session.get(FL_SEARCH_URL, params=params, timeout=10)
-                    response.raise_for_status()
-                    response.encoding = 'utf-8'
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                except requests.RequestException as e:
-                    logger.error(f"Ошибка запроса страницы {page}: {e}")
-                    break
-
-                projects = soup.find_all('div', {'class': 'project'})
-                if not projects:
-                    logger.info(f"Достигнут конец страниц на странице {page}")
-                    break
-
-                for project in projects:
-                    try:
-                        title_elem = project.find('a', {'class': 'b-post__link'})
-                        if not title_elem:
-                            continue
-
-                        title = title_elem.get_text(strip=True)
-                        original_url = FL_BASE_URL + title_elem['href']
-
-                        # Парсим дополнительные данные
-                        price_elem = project.find('span', {'class': 'b-post__price'})
-                        salary = self._parse_salary(price_elem.get_text(strip=True)) if price_elem else None
-
-                        employer_elem = project.find('a', {'class': 'b-post__link_txt'})
-                        company = employer_elem.get_text(strip=True) if employer_elem else "Частное лицо"
-
-                        date_elem = project.find('span', {'class': 'b-post__time'})
-                        date = self._parse_date(date_elem.get_text(strip=True)) if date_elem else datetime.now()
-
-                        # Парсим страницу вакансии для получения описания
-                        page_data = self._parse_vacancy_page(original_url)
-
-                        vacancy = Vacancy(
-                            title=title,
-                            company=company,
-                            location="Удалённая работа",  # FL.ru в основном для удалёнки
-                            salary=salary,
-                            description=page_data['description'],
-                            published_at=date,
-                            original_url=original_url
-                        )
-                        vacancies.append(vacancy)
-                        logger.info(f"Обработана вакансия: {title}")
-                    except Exception as e:
-                        logger.error(f"Ошибка при обработке вакансии: {e}")
-
-                page += 1
-                sleep(REQUEST_DELAY)
-
+            for data in self.fetch_pages(search_query):
+                vacancies.extend(self.parse_page(data))
             logger.info(f"Парсинг FL.ru завершен. Найдено {len(vacancies)} вакансий")
-
+        except SourceFetchError as e:
+            e.partial = vacancies
+            raise
         except Exception as e:
             logger.error(f"Критическая ошибка парсинга FL.ru: {e}")
-        finally:
-            return vacancies
+            raise SourceFetchError(str(e), vacancies) from e
+        return vacancies
 
     def __del__(self):
         if hasattr(self, "session"):
-            self.session.close()
\ No newline at end of file
+            self.session.close()
+
+
+class FLSource(BaseSource):
+    """fl.ru: один поиск на запрос; страница каждого проекта запрашивается отдельно, поэтому срок короче"""
+    name = "fl.ru"
+    deadline = 600
+
+    def create_parser(self) -> FLParser:
+        return FLParser()
+
+    def base_tasks(self, queries: List[str], now: datetime) -> List[CrawlTask]:
+        return [CrawlTask(self.name, query) for query in queries]
+
+    def fetch(self, parser: FLParser, task: CrawlTask) -> List[Vacancy]:
+        return parser.parse_vacancies(task.query)
+
+    def fetch_pages(self, parser: FLParser, task: CrawlTask, start_page: int = 0) -> Iterator[Dict]:
+        return parser.fetch_pages(task.query, start_page)
+
+    def parse_page(self, parser: FLParser, page: Dict) -> List[Vacancy]:
+        return parser.parse_page(page)
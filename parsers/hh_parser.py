@@ -1,21 +1,19 @@
 import requests
-from datetime import datetime
-from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
 from dataclasses import dataclass
 import logging
-from time import sleep
-
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    filename='hh_parser.log'
-)
+from core import jsonutil
+from core.config import Config
+from parsers.rate_limiter import get_rate_limiter
+from parsers.registry import BaseSource, CrawlTask, DeadlineMixin, SourceFetchError
+
 logger = logging.getLogger(__name__)
 
 # Константы
 HH_API_URL = "https://api.hh.ru/vacancies"
 REQUEST_DELAY = 0.5  # Задержка между запросами
+HH_MAX_RESULTS = 2000  # HH отдает не больше 2000 результатов на один поиск
 USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
 
 
@@ -29,10 +27,14 @@ class Vacancy:
     published_at: datetime
     source: str = "hh.ru"
     original_url: str = ""
+    source_id: str = ""
+    # В description только сниппет поиска: полное описание загрузить не удалось
+    description_partial: bool = False
 
 
-class HHAPIParser:
+class HHAPIParser(DeadlineMixin):
     def __init__(self):
+        self.rate_limiter = get_rate_limiter("hh.ru", REQUEST_DELAY)
         self._init_session()
 
     def _init_session(self):
@@ -66,57 +68,121 @@ class HHAPIParser:
         responsibility = snippet.get("responsibility", "")
         return f"{requirement} {responsibility}".strip()
 
+    def get_vacancy_details(self, vacancy_id: str) -> Dict:
+        """Полная карточка вакансии (/vacancies/{id}) с HTML-описанием"""
+        self.wait_turn()
+        response = self.session.get(f"{HH_API_URL}/{vacancy_id}", timeout=self.request_timeout())
+        response.raise_for_status()
+        return jsonutil.loads(response.content)
+
+    def _search_params(
+        self,
+        search_query: str,
+        area: int,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+    ) -> Dict:
+        """Параметры поискового запроса, включая окно по дате публикации"""
+        params = {"text": search_query, "area": area}
+        if date_from:
+            params["date_from"] = date_from.isoformat(timespec="seconds")
+        if date_to:
+            params["date_to"] = date_to.isoformat(timespec="seconds")
+        return params
+
+    def count_vacancies(
+        self,
+        search_query: str = "Python",
+        area: int = 1,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+    ) -> int:
+        """Количество найденных вакансий (поле found) без обхода страниц"""
+        params = self._search_params(search_query, area, date_from, date_to)
+        params.update({"per_page": 1, "page": 0})
+        self.wait_turn()
+        response = self.session.get(HH_API_URL, params=params, timeout=self.request_timeout())
+        response.raise_for_status()
+        return int(jsonutil.loads(response.content).get("found", 0))
+
+    def fetch_pages(
+        self,
+        search_query: str = "Python",
+        area: int = 1,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        start_page: int = 0,
+    ) -> Iterator[Dict]:
+        """Страницы поисковой выдачи (JSON) по одной, без разбора, начиная со start_page"""
+        params = self._search_params(search_query, area, date_from, date_to)
+        params.update({"per_page": 50, "page": start_page})
+
+        while True:
+            try:
+                self.wait_turn()
+                response = self.session.get(HH_API_URL, params=params, timeout=self.request_timeout())
+                response.raise_for_status()
+                data = jsonutil.loads(response.content)
+            except (requests.RequestException, ValueError) as e:
+                # ValueError - ответ не разобрался как JSON
+                logger.error(f"Ошибка запроса: {e}")
+                raise SourceFetchError(f"Ошибка запроса: {e}") from e
+
+            if not data.get("items"):
+                break
+
+            yield data
+
+            if params["page"] >= data.get("pages", 1) - 1:
+                break
+
+            params["page"] += 1
+
+    def parse_page(self, data: Dict) -> List[Vacancy]:
+        """Разбор одной страницы выдачи в вакансии"""
+        vacancies = []
+        for item in data["items"]:
+            try:
+                # Получаем alternate_url или формируем ссылку вручную по id
+                original_url = item.get("alternate_url")
+                if not original_url and "id" in item:
+                    original_url = f"https://hh.ru/vacancy/{item['id']}"
+                vacancy = Vacancy(
+                    title=item.get("name", ""),
+                    company=item["employer"].get("name", ""),
+                    location=item["area"].get("name", ""),
+                    salary=self._parse_salary(item.get("salary")),
+                    description=self._get_vacancy_description(item),
+                    published_at=datetime.strptime(
+                        item["published_at"], "%Y-%m-%dT%H:%M:%S%z"
+                    ),
+                    original_url=original_url or "",
+                    source_id=str(item.get("id", "")),
+                )
+                vacancies.append(vacancy)
+            except (KeyError, ValueError) as e:
+                logger.error(f"Пропущена вакансия из-за ошибки в данных: {e}")
+        return vacancies
+
     def parse_vacancies(
-        self, search_query: str = "Python", area: int = 1
+        self,
+        search_query: str = "Python",
+        area: int = 1,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
     ) -> List[Vacancy]:
         """Основной метод парсинга вакансий"""
         vacancies = []
-        params = {"text": search_query, "area": area, "per_page": 50, "page": 0}
-
         try:
-            while True:
-                try:
-                    response = self.session.get(HH_API_URL, params=params)
-                    response.raise_for_status()
-                    data = response.json()
-                except requests.RequestException as e:
-                    logger.error(f"Ошибка запроса: {e}")
-                    break
-
-                if not data.get("items"):
-                    break
-
-                for item in data["items"]:
-                    try:
-                        # Получаем alternate_url или формируем ссылку вручную по id
-                        original_url = item.get("alternate_url")
-                        if not original_url and "id" in item:
-                            original_url = f"https://hh.ru/vacancy/{item['id']}"
-                        vacancy = Vacancy(
-                            title=item.get("name", ""),
-                            company=item["employer"].get("name", ""),
-                            location=item["area"].get("name", ""),
-                            salary=self._parse_salary(item.get("salary")),
-                            description=self._get_vacancy_description(item),
-                            published_at=datetime.strptime(
-                                item["published_at"], "%Y-%m-%dT%H:%M:%S%z"
-                            ),
-                            original_url=original_url or "",
-                        )
-                        vacancies.append(vacancy)
-                    except (KeyError, ValueError) as e:
-                        logger.error(f"Пропущена вакансия из-за ошибки в данных: {e}")
-
-                if params["page"] >= data.get("pages", 1) - 1:
-                    break
-
-                params["page"] += 1
-                sleep(REQUEST_DELAY)
-
+            for data in self.fetch_pages(search_query, area, date_from, date_to):
+                vacancies.extend(self.parse_page(data))
+        except SourceFetchError as e:
+            e.partial = vacancies
+            raise
         except Exception as e:
             logger.error(f"Критическая ошибка парсинга: {e}")
-        finally:
-            return vacancies
+            raise SourceFetchError(str(e), vacancies) from e
+        return vacancies
 
     def __del__(self):
         """Закрытие соединений при уничтожении объекта"""
@@ -124,7 +190,54 @@ class HHAPIParser:
             self.session.close()
 
 
+class HHSource(BaseSource):
+    """hh.ru: поиск по регионам HH_AREAS за HH_SEARCH_PERIOD_DAYS дней с разбиением на окна"""
+    name = "hh.ru"
+
+    def create_parser(self) -> HHAPIParser:
+        return HHAPIParser()
+
+    def base_tasks(self, queries: List[str], now: datetime) -> List[CrawlTask]:
+        period_start = now - timedelta(days=Config.HH_SEARCH_PERIOD_DAYS)
+        return [CrawlTask(self.name, query, area, period_start, now) for query in queries for area in Config.HH_AREAS]
+
+    def expand_task(self, parser: HHAPIParser, task: CrawlTask) -> List[CrawlTask]:
+        """Делит поиск на окна по published_at, пока каждое не влезет в лимит выдачи"""
+        min_window = timedelta(minutes=Config.HH_MIN_WINDOW_MINUTES)
+        pending = [task]
+        windows = []
+        while pending:
+            current = pending.pop()
+            found = parser.count_vacancies(current.query, current.region, current.date_from, current.date_to)
+            span = current.date_to - current.date_from
+            if found <= HH_MAX_RESULTS:
+                if found:
+                    windows.append(current)
+            elif span <= min_window:
+                logger.warning(f"Окно {current.key} содержит {found} вакансий, часть будет недоступна")
+                windows.append(current)
+            else:
+                middle = current.date_from + span / 2
+                pending.append(CrawlTask(current.source, current.query, current.region, current.date_from, middle))
+                pending.append(CrawlTask(current.source, current.query, current.region, middle, current.date_to))
+        return windows
+
+    def fetch(self, parser: HHAPIParser, task: CrawlTask) -> List[Vacancy]:
+        return parser.parse_vacancies(task.query, task.region, task.date_from, task.date_to)
+
+    def fetch_pages(self, parser: HHAPIParser, task: CrawlTask, start_page: int = 0) -> Iterator[Dict]:
+        return parser.fetch_pages(task.query, task.region, task.date_from, task.date_to, start_page)
+
+    def parse_page(self, parser: HHAPIParser, page: Dict) -> List[Vacancy]:
+        return parser.parse_page(page)
+
+
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        filename='hh_parser.log'
+    )
     parser = HHAPIParser()
     vacancies = parser.parse_vacancies()
     print(f"Найдено {len(vacancies)} вакансий")
\ No newline at end of file
@@ -0,0 +1,40 @@
+import threading
+from time import monotonic, sleep
+from typing import Dict, Optional
+
+
+class RateLimiter:
+    """Ограничивает частоту запросов к источнику, общий для всех потоков"""
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def wait(self, deadline: Optional[float] = None) -> bool:
+        """
+        Блокирует поток до момента, когда разрешен следующий запрос.
+        Если очередь наступит позже deadline (monotonic), сразу возвращает False и не занимает слот.
+        """
+        with self._lock:
+            now = monotonic()
+            slot = max(now, self._next_at)
+            if deadline is not None and slot >= deadline:
+                return False
+            self._next_at = slot + self.min_interval
+        if slot > now:
+            sleep(slot - now)
+        return True
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str, min_interval: float) -> RateLimiter:
+    """Возвращает общий ограничитель для источника (создает при первом обращении)"""
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = _limiters[name] = RateLimiter(min_interval)
+        return limiter
@@ -0,0 +1,183 @@
+import importlib
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from importlib.metadata import entry_points
+from time import monotonic
+from typing import Any, Dict, Iterator, List, Optional, Protocol, runtime_checkable
+
+logger = logging.getLogger(__name__)
+
+# Группа entry points, через которую сторонние пакеты добавляют источники:
+# [project.entry-points."it_parser.sources"] my_site = "my_package.source:MySource"
+ENTRY_POINT_GROUP = "it_parser.sources"
+
+# Встроенные источники загружаются по требованию, так же как и плагины
+BUILTIN_SOURCES = {
+    "hh.ru": "parsers.hh_parser:HHSource",
+    "superjob.ru": "parsers.sj_parser:SJSource",
+    "fl.ru": "parsers.fl_parser:FLSource",
+}
+
+
+@dataclass(frozen=True)
+class CrawlTask:
+    """Один поисковый запрос к источнику: запрос, регион и окно по дате публикации"""
+    source: str
+    query: str
+    region: Optional[int] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+
+    @property
+    def key(self) -> str:
+        parts = [self.source, self.query, str(self.region or '')]
+        if self.date_from or self.date_to:
+            parts.append(f"{self.date_from:%Y%m%d%H%M}-{self.date_to:%Y%m%d%H%M}")
+        return "|".join(parts)
+
+
+class SourceFetchError(Exception):
+    """Ошибка обхода источника; partial - вакансии, собранные до ошибки"""
+
+    def __init__(self, message: str, partial: Optional[list] = None):
+        super().__init__(message)
+        self.partial = partial or []
+
+
+class DeadlineExceeded(SourceFetchError):
+    """Время, выделенное источнику на обход, истекло"""
+
+
+class DeadlineMixin:
+    """Таймаут запроса и крайний срок обхода; оба выставляет раннер источника"""
+    timeout: float = 15
+    deadline: Optional[float] = None  # monotonic()
+    rate_limiter = None
+
+    def wait_turn(self, partial: Optional[list] = None) -> None:
+        """Ждет очереди ограничителя частоты; если очередь наступит после срока, обход прекращается"""
+        if not self.rate_limiter.wait(self.deadline):
+            raise DeadlineExceeded("Очередь запроса наступит после срока обхода источника", partial)
+
+    def check_deadline(self, partial: Optional[list] = None) -> None:
+        if self.deadline is not None and monotonic() >= self.deadline:
+            raise DeadlineExceeded("Истек срок обхода источника", partial)
+
+    def request_timeout(self, partial: Optional[list] = None) -> float:
+        """Таймаут очередного запроса: не дольше, чем осталось до срока обхода"""
+        self.check_deadline(partial)
+        if self.deadline is None:
+            return self.timeout
+        return max(1.0, min(self.timeout, self.deadline - monotonic()))
+
+
+@runtime_checkable
+class VacancySource(Protocol):
+    """Протокол источника вакансий для планировщика обхода"""
+    name: str
+    # Собственные значения источника; None - общие из Config
+    request_timeout: Optional[float]
+    deadline: Optional[float]
+
+    def create_parser(self):
+        """Новый экземпляр парсера (у каждого потока свой)"""
+
+    def base_tasks(self, queries: List[str], now: datetime) -> List[CrawlTask]:
+        """Поисковые задачи источника для списка запросов"""
+
+    def expand_task(self, parser, task: CrawlTask) -> List[CrawlTask]:
+        """Уточнение задачи перед обходом (например, разбиение на окна по дате)"""
+
+    def fetch(self, parser, task: CrawlTask) -> list:
+        """Обход задачи; ошибки запросов - SourceFetchError с частичным результатом"""
+
+    def fetch_pages(self, parser, task: CrawlTask, start_page: int = 0) -> Iterator[Any]:
+        """
+        Сырые страницы задачи по одной (только сеть, для конвейера загрузки).
+        start_page - сколько первых страниц пропустить при продолжении прерванного обхода.
+        """
+
+    def parse_page(self, parser, page: Any) -> list:
+        """Разбор сырой страницы в вакансии (без запросов к сети)"""
+
+
+class BaseSource:
+    """
+    Общая часть источников: задача без уточнения и значения по умолчанию.
+    Источник без разделения на загрузку и разбор отдает весь результат fetch одной «страницей»,
+    поэтому при продолжении обхода (start_page > 0) ему загружать нечего.
+    """
+    name = ""
+    request_timeout: Optional[float] = None
+    deadline: Optional[float] = None
+
+    def expand_task(self, parser, task: CrawlTask) -> List[CrawlTask]:
+        return [task]
+
+    def fetch_pages(self, parser, task: CrawlTask, start_page: int = 0) -> Iterator[Any]:
+        if not start_page:
+            yield self.fetch(parser, task)
+
+    def parse_page(self, parser, page: Any) -> list:
+        return page
+
+
+_sources: Dict[str, VacancySource] = {}
+_sources_lock = threading.Lock()
+_plugins_loaded = False
+
+
+def register_source(source) -> VacancySource:
+    """Регистрирует источник (класс или экземпляр); можно использовать как декоратор класса"""
+    instance = source() if isinstance(source, type) else source
+    if not isinstance(instance, VacancySource):
+        raise TypeError(f"{source!r} не реализует протокол VacancySource")
+    with _sources_lock:
+        _sources[instance.name] = instance
+    return source
+
+
+def _load_object(spec: str):
+    module_name, _, attribute = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def _load_plugins() -> None:
+    """Подключает источники из entry points установленных пакетов (один раз за процесс)"""
+    global _plugins_loaded
+    if _plugins_loaded:
+        return
+    _plugins_loaded = True
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        try:
+            register_source(entry_point.load())
+            logger.info(f"Подключен источник из entry point {entry_point.name}")
+        except Exception as e:
+            logger.error(f"Не удалось подключить источник {entry_point.name}: {e}")
+
+
+def get_source(name: str) -> VacancySource:
+    """Источник по имени: зарегистрированный, встроенный или из entry points"""
+    source = _sources.get(name)
+    if source is None and name in BUILTIN_SOURCES:
+        register_source(_load_object(BUILTIN_SOURCES[name]))
+        source = _sources.get(name)
+    if source is None:
+        _load_plugins()
+        source = _sources.get(name)
+    if source is None:
+        raise KeyError(f"Неизвестный источник: {name}")
+    return source
+
+
+def get_sources(names: List[str]) -> Dict[str, VacancySource]:
+    """Источники по списку имен; неизвестные пропускаются с ошибкой в логе"""
+    sources = {}
+    for name in names:
+        try:
+            sources[name] = get_source(name)
+        except Exception as e:
+            logger.error(f"Источник {name} пропущен: {e}")
+    return sources
@@ -1,16 +1,13 @@
 import requests
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 from dataclasses import dataclass
 import logging
-from time import sleep
-
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    filename='sj_parser.log'
-)
+from core import jsonutil
+from core.config import Config
+from parsers.rate_limiter import get_rate_limiter
+from parsers.registry import BaseSource, CrawlTask, DeadlineMixin, SourceFetchError
+
 logger = logging.getLogger(__name__)
 
 SJ_API_URL = "https://api.superjob.ru/2.0/vacancies/"
@@ -28,11 +25,13 @@ class Vacancy:
     published_at: datetime
     source: str = "superjob.ru"
     original_url: str = ""
+    source_id: str = ""
 
 
-class SJAPIParser:
+class SJAPIParser(DeadlineMixin):
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key
+        self.rate_limiter = get_rate_limiter("superjob.ru", REQUEST_DELAY)
         self._init_session()
 
     def _init_session(self):
@@ -61,59 +60,92 @@ class SJAPIParser:
 
         return " ".join(parts) + f" {currency}" if parts else None
 
-    def parse_vacancies(self, search_query: str = "Python", town: int = 4) -> List[Vacancy]:
-        """Основной метод парсинга вакансий (town=4 - Москва)"""
-        vacancies = []
+    def fetch_pages(self, search_query: str = "Python", town: int = 4, start_page: int = 0) -> Iterator[Dict]:
+        """Страницы выдачи (JSON) по одной, без разбора, начиная со start_page"""
         params = {
             "keyword": search_query,
             "town": town,
             "count": 50,
-            "page": 0
+            "page": start_page
         }
 
-        try:
-            logger.info(f"Начало парсинга вакансий SuperJob с запросом '{search_query}'")
+        while True:
+            try:
+                self.wait_turn()
+                response = self.session.get(SJ_API_URL, params=params, timeout=self.request_timeout())
+                response.raise_for_status()
+                data = jsonutil.loads(response.content)
+            except (requests.RequestException, ValueError) as e:
+                # ValueError - ответ не разобрался как JSON
+                logger.error(f"Ошибка запроса: {e}")
+                raise SourceFetchError(f"Ошибка запроса: {e}") from e
 
-            while True:
-                try:
-                    response = self.session.get(SJ_API_URL, params=params)
-                    response.raise_for_status()
-                    data = response.json()
-                except requests.RequestException as e:
-                    logger.error(f"Ошибка запроса: {e}")
-                    break
-
-                if not data.get("objects"):
-                    break
-
-                for item in data["objects"]:
-                    try:
-                        vacancy = Vacancy(
-                            title=item.get("profession", ""),
-                            company=item.get("firm_name", ""),
-                            location=item.get("town", {}).get("title", ""),
-                            salary=self._parse_salary(item),
-                            description=item.get("candidat", ""),
-                            published_at=datetime.fromtimestamp(item["date_published"]),
-                            original_url=item.get("link", "")
-                        )
-                        vacancies.append(vacancy)
-                    except (KeyError, ValueError) as e:
-                        logger.error(f"Пропущена вакансия из-за ошибки в данных: {e}")
-
-                if not data.get("more"):
-                    break
-
-                params["page"] += 1
-                sleep(REQUEST_DELAY)
+            if not data.get("objects"):
+                break
 
-            logger.info(f"Парсинг SuperJob завершен. Найдено {len(vacancies)} вакансий")
+            yield data
+
+            if not data.get("more"):
+                break
+
+            params["page"] += 1
 
+    def parse_page(self, data: Dict) -> List[Vacancy]:
+        """Разбор одной страницы выдачи в вакансии"""
+        vacancies = []
+        for item in data["objects"]:
+            try:
+                vacancy = Vacancy(
+                    title=item.get("profession", ""),
+                    company=item.get("firm_name", ""),
+                    location=item.get("town", {}).get("title", ""),
+                    salary=self._parse_salary(item),
+                    description=item.get("candidat", ""),
+                    published_at=datetime.fromtimestamp(item["date_published"]),
+                    original_url=item.get("link", ""),
+                    source_id=str(item.get("id", ""))
+                )
+                vacancies.append(vacancy)
+            except (KeyError, ValueError) as e:
+                logger.error(f"Пропущена вакансия из-за ошибки в данных: {e}")
+        return vacancies
+
+    def parse_vacancies(self, search_query: str = "Python", town: int = 4) -> List[Vacancy]:
+        """Основной метод парсинга вакансий (town=4 - Москва)"""
+        vacancies = []
+        try:
+            logger.info(f"Начало парсинга вакансий SuperJob с запросом '{search_query}'")
+            for data in self.fetch_pages(search_query, town):
+                vacancies.extend(self.parse_page(data))
+            logger.info(f"Парсинг SuperJob завершен. Найдено {len(vacancies)} вакансий")
+        except SourceFetchError as e:
+            e.partial = vacancies
+            raise
         except Exception as e:
             logger.error(f"Критическая ошибка парсинга SuperJob: {e}")
-        finally:
-            return vacancies
+            raise SourceFetchError(str(e), vacancies) from e
+        return vacancies
 
     def __del__(self):
         if hasattr(self, "session"):
-            self.session.close()
\ No newline at end of file
+            self.session.close()
+
+
+class SJSource(BaseSource):
+    """superjob.ru: поиск по городам SJ_TOWNS"""
+    name = "superjob.ru"
+
+    def create_parser(self) -> SJAPIParser:
+        return SJAPIParser(Config.SJ_API_KEY)
+
+    def base_tasks(self, queries: List[str], now: datetime) -> List[CrawlTask]:
+        return [CrawlTask(self.name, query, town) for query in queries for town in Config.SJ_TOWNS]
+
+    def fetch(self, parser: SJAPIParser, task: CrawlTask) -> List[Vacancy]:
+        return parser.parse_vacancies(task.query, task.region)
+
+    def fetch_pages(self, parser: SJAPIParser, task: CrawlTask, start_page: int = 0) -> Iterator[Dict]:
+        return parser.fetch_pages(task.query, task.region, start_page)
+
+    def parse_page(self, parser: SJAPIParser, page: Dict) -> List[Vacancy]:
+        return parser.parse_page(page)
@@ -1,17 +1,20 @@
 from app import create_app
-from core.scheduler import start_scheduler
 import logging
+import sys
 
-# Настройка логирования
+# Настройка логирования (только в точке входа, не при импорте модулей)
 logging.basicConfig(
-    level=logging.INFO,
+    level=logging.DEBUG,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    filename='app.log'
+    handlers=[
+        logging.FileHandler('app.log'),
+        logging.StreamHandler(sys.stdout)
+    ]
 )
 logger = logging.getLogger(__name__)
 
+# Веб-процесс только читает данные; парсинг выполняет отдельный воркер (worker.py)
 app = create_app()
-scheduler = start_scheduler()
 
 if __name__ == "__main__":
     logger.info("Запуск приложения...")
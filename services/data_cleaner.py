@@ -0,0 +1,100 @@
+import html
+import logging
+import re
+from functools import lru_cache
+from typing import Any, List, Optional
+
+from core.companies import LEGAL_ABBREVIATION_RE
+from core.config import Config
+
+logger = logging.getLogger(__name__)
+
+TAG_RE = re.compile(r"<[^>]+>")  # <highlighttext> в сниппетах HH и прочая разметка
+SPACES_RE = re.compile(r"[ \t\r\f\v\u00a0\u2007\u202f\u200b]+")  # включая неразрывные пробелы
+BLANK_LINES_RE = re.compile(r"\n\s*\n\s*(?:\n\s*)+")  # три и больше переносов подряд
+LINE_EDGES_RE = re.compile(r" *\n *")
+# Кавычки вокруг названия: "Рога и копыта", “Рога и копыта”, „Рога и копыта“ (апострофы не трогаем)
+QUOTED_RE = re.compile(r"[\"“”„«]+\s*([^\"“”„«»]+?)\s*[\"“”»]+")
+TRAILING_PUNCTUATION_RE = re.compile(r"[\s,.;:]+$")
+
+
+def clean_text(value: Optional[str]) -> str:
+    """Однострочный текст: без HTML-разметки и сущностей, пробелы (включая неразрывные) схлопнуты"""
+    if not value:
+        return ""
+    if "<" in value:
+        value = TAG_RE.sub("", value)
+    if "&" in value:
+        value = html.unescape(value)
+    return SPACES_RE.sub(" ", value.replace("\n", " ")).strip()
+
+
+def clean_description(value: Optional[str]) -> str:
+    """Многострочное описание: без разметки, строки без краевых пробелов, не больше одной пустой строки подряд"""
+    if not value:
+        return ""
+    if "<" in value:
+        value = TAG_RE.sub("", value)
+    if "&" in value:
+        value = html.unescape(value)
+    value = SPACES_RE.sub(" ", value)
+    value = LINE_EDGES_RE.sub("\n", value)
+    return BLANK_LINES_RE.sub("\n\n", value).strip()
+
+
+@lru_cache(maxsize=Config.CLEANER_CACHE_SIZE)
+def clean_title(value: Optional[str]) -> str:
+    """Название вакансии; написанное целиком заглавными приводится к обычному регистру"""
+    value = clean_text(value)
+    letters = [char for char in value if char.isalpha()]
+    if len(letters) > 3 and all(char.isupper() for char in letters):
+        value = value[0] + value[1:].lower()
+    return value
+
+
+@lru_cache(maxsize=Config.CLEANER_CACHE_SIZE)
+def clean_company(value: Optional[str]) -> str:
+    """Компания: название в «елочках», организационно-правовая форма заглавными (ООО, АО, ИП)"""
+    value = clean_text(value)
+    value = QUOTED_RE.sub(lambda match: f"«{match.group(1)}»", value)
+    return LEGAL_ABBREVIATION_RE.sub(lambda match: match.group(1).upper(), value)
+
+
+@lru_cache(maxsize=Config.CLEANER_CACHE_SIZE)
+def clean_location(value: Optional[str]) -> str:
+    return TRAILING_PUNCTUATION_RE.sub("", clean_text(value))
+
+
+@lru_cache(maxsize=Config.CLEANER_CACHE_SIZE)
+def clean_salary(value: Optional[str]) -> Optional[str]:
+    return clean_text(value) or None
+
+
+class DataCleaner:
+    """
+    Нормализация вакансий перед записью. Повторяющиеся значения (названия, компании, города,
+    зарплаты) обрабатываются один раз благодаря ограниченному кэшу; описания чистятся
+    предкомпилированными выражениями без кэша.
+    """
+
+    def clean(self, vacancy: Any) -> Any:
+        vacancy.title = clean_title(vacancy.title)
+        vacancy.company = clean_company(vacancy.company)
+        vacancy.location = clean_location(vacancy.location)
+        vacancy.salary = clean_salary(vacancy.salary)
+        vacancy.description = clean_description(vacancy.description)
+        return vacancy
+
+    def clean_batch(self, vacancies: List[Any]) -> List[Any]:
+        """Чистит вакансии на месте и возвращает тот же список"""
+        for vacancy in vacancies:
+            self.clean(vacancy)
+        return vacancies
+
+    @staticmethod
+    def cache_info() -> dict:
+        return {
+            name: func.cache_info()._asdict()
+            for name, func in (("title", clean_title), ("company", clean_company),
+                               ("location", clean_location), ("salary", clean_salary))
+        }
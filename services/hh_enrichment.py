@@ -0,0 +1,177 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from core.config import Config
+from core.database import get_db_path, get_stored_descriptions
+from core.timeutils import to_epoch
+from parsers.hh_parser import HHAPIParser
+
+logger = logging.getLogger(__name__)
+
+BLOCK_TAGS = ["p", "li", "br", "div", "h1", "h2", "h3", "h4", "ul", "ol"]
+
+
+def get_details_cache_path() -> str:
+    """Путь к кэшу карточек HH (по умолчанию рядом с основной БД)"""
+    return Config.HH_DETAILS_CACHE_PATH or os.path.join(os.path.dirname(get_db_path()), 'hh_details_cache.db')
+
+
+class DescriptionCache:
+    """
+    Локальный кэш полных описаний HH: id -> (published_at, сжатое описание, когда вакансия была
+    в выдаче). Записи вакансий, которых нет в выдаче дольше HH_DETAILS_CACHE_TTL, удаляются
+    при открытии кэша, то есть раз за обход.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or get_details_cache_path()
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS hh_details (
+                    source_id TEXT PRIMARY KEY,
+                    published_at TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    seen_at INTEGER NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_hh_details_seen_at ON hh_details(seen_at)")
+        self.prune()
+
+    def get_many(self, source_ids: List[str]) -> Dict[str, Tuple[str, str]]:
+        """Описания из кэша; найденные отмечаются как увиденные в выдаче сейчас"""
+        cached = {}
+        seen_at = int(time.time())
+        with sqlite3.connect(self.path) as conn:
+            for start in range(0, len(source_ids), 500):
+                chunk = source_ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT source_id, published_at, body FROM hh_details WHERE source_id IN ({placeholders})",
+                    chunk
+                ).fetchall()
+                cached.update((row[0], (row[1], zlib.decompress(row[2]).decode("utf-8"))) for row in rows)
+                conn.execute(f"UPDATE hh_details SET seen_at = ? WHERE source_id IN ({placeholders})",
+                             [seen_at, *chunk])
+        return cached
+
+    def put_many(self, rows: List[Tuple[str, str, str]]) -> None:
+        seen_at = int(time.time())
+        with sqlite3.connect(self.path) as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO hh_details VALUES (?, ?, ?, ?)",
+                [(source_id, published_at, zlib.compress(description.encode("utf-8")), seen_at)
+                 for source_id, published_at, description in rows]
+            )
+
+    def prune(self, max_age: Optional[int] = None) -> int:
+        """Удаляет описания вакансий, которых нет в выдаче дольше max_age секунд; возвращает их число"""
+        cutoff = int(time.time()) - (Config.HH_DETAILS_CACHE_TTL if max_age is None else max_age)
+        with sqlite3.connect(self.path) as conn:
+            removed = conn.execute("DELETE FROM hh_details WHERE seen_at < ?", (cutoff,)).rowcount
+        if removed:
+            logger.info(f"Из кэша карточек HH удалено {removed} вакансий, пропавших из выдачи")
+        return removed
+
+
+class HHDescriptionEnricher:
+    """
+    Заменяет сниппеты HH полными описаниями; карточка загружается, только если ее нет в кэше
+    и в основной БД для текущей даты публикации (иначе сниппет перезаписал бы сохраненное полное описание).
+    """
+
+    def __init__(self, cache: Optional[DescriptionCache] = None, max_workers: Optional[int] = None):
+        self.cache = cache or DescriptionCache()
+        self.max_workers = max_workers or Config.HH_DETAILS_CONCURRENCY
+        # Срок обхода hh.ru (monotonic) и таймаут запроса; выставляются на время обхода
+        self.deadline: Optional[float] = None
+        self.timeout: Optional[float] = None
+        self._local = threading.local()
+
+    def _parser(self) -> HHAPIParser:
+        # Парсер (и его requests.Session) у каждого потока свой,
+        # а ограничитель частоты запросов к hh.ru общий
+        if not hasattr(self._local, 'parser'):
+            self._local.parser = HHAPIParser()
+        parser = self._local.parser
+        parser.deadline = self.deadline
+        if self.timeout is not None:
+            parser.timeout = self.timeout
+        return parser
+
+    def _fetch_description(self, source_id: str) -> Optional[str]:
+        try:
+            details = self._parser().get_vacancy_details(source_id)
+        except Exception as e:
+            logger.error(f"Не удалось получить описание вакансии HH {source_id}: {e}")
+            return None
+        soup = BeautifulSoup(details.get("description") or "", "html.parser")
+        # Переносы строк только после блочных элементов, чтобы <b>/<em> не рвали текст
+        for block in soup.find_all(BLOCK_TAGS):
+            block.append("\n")
+        lines = (line.strip() for line in soup.get_text().splitlines())
+        return "\n".join(line for line in lines if line)
+
+    def enrich(self, vacancies: list) -> int:
+        """Дополняет вакансии полными описаниями, возвращает число загруженных карточек"""
+        hh_vacancies = {
+            v.source_id: v for v in vacancies if v.source == "hh.ru" and v.source_id
+        }
+        if not hh_vacancies:
+            return 0
+
+        cached = self.cache.get_many(list(hh_vacancies))
+
+        missed = []
+        for source_id, vacancy in hh_vacancies.items():
+            cached_entry = cached.get(source_id)
+            if cached_entry and cached_entry[0] == str(vacancy.published_at):
+                vacancy.description = cached_entry[1]
+            else:
+                missed.append(source_id)
+        if not missed:
+            return 0
+
+        # Кэш мог быть удален или очищен: полное описание, уже сохраненное в БД, загружать заново незачем
+        stored = get_stored_descriptions("hh.ru", missed)
+        to_fetch, seeded = [], []
+        for source_id in missed:
+            vacancy = hh_vacancies[source_id]
+            stored_entry = stored.get(source_id)
+            if stored_entry and stored_entry[0] == to_epoch(vacancy.published_at):
+                vacancy.description = stored_entry[1]
+                seeded.append((source_id, str(vacancy.published_at), stored_entry[1]))
+            else:
+                to_fetch.append(source_id)
+        self.cache.put_many(seeded)
+
+        if not to_fetch:
+            return 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            descriptions = list(executor.map(self._fetch_description, to_fetch))
+
+        fetched = []
+        for source_id, description in zip(to_fetch, descriptions):
+            vacancy = hh_vacancies[source_id]
+            if description:
+                vacancy.description = description
+                fetched.append((source_id, str(vacancy.published_at), description))
+            else:
+                # Остался сниппет: при записи он не заменит сохраненное полное описание
+                vacancy.description_partial = True
+        self.cache.put_many(fetched)
+        logger.info(f"Загружено {len(fetched)} полных описаний HH из {len(to_fetch)} новых вакансий")
+        return len(fetched)
+
+
+def enrich_hh_descriptions(vacancies: list) -> int:
+    """Этап обогащения: полные описания HH для новых и изменившихся вакансий"""
+    return HHDescriptionEnricher().enrich(vacancies)
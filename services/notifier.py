@@ -0,0 +1,255 @@
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from core.config import Config
+from core.database import create_connection
+from core.locations import LocationDirectory
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"[\w+#]+")
+
+VACANCY_BATCH_SQL = """
+    SELECT id, title, company, location, excerpt, source, location_id,
+           salary_from, salary_to, salary_currency
+    FROM vacancies
+    WHERE id > ?
+    ORDER BY id
+    LIMIT ?
+"""
+
+
+def tokenize(*texts: Optional[str]) -> Set[str]:
+    """Слова текста в нижнем регистре (ё -> е); c++ и c# остаются словами"""
+    tokens = set()
+    for text in texts:
+        if text:
+            tokens.update(TOKEN_RE.findall(text.lower().replace("ё", "е")))
+    return tokens
+
+
+def salary_bucket(amount: int) -> int:
+    """Корзина зарплаты шагом NOTIFIER_SALARY_STEP; все суммы выше последней - в последней"""
+    return min(max(amount, 0) // Config.NOTIFIER_SALARY_STEP, Config.NOTIFIER_SALARY_BUCKETS - 1)
+
+
+@dataclass
+class SavedSearch:
+    """Сохраненный поиск: все слова запроса, источник, города (id справочника) и нижняя граница зарплаты"""
+    id: int
+    user_id: str
+    terms: FrozenSet[str] = frozenset()
+    source: str = ""
+    location_ids: FrozenSet[int] = frozenset()
+    salary_min: Optional[int] = None
+
+    def matches(self, vacancy: 'VacancyFeatures') -> bool:
+        if self.source and vacancy.source != self.source:
+            return False
+        if self.location_ids and vacancy.location_id not in self.location_ids:
+            return False
+        if self.salary_min and (vacancy.salary is None or vacancy.salary < self.salary_min):
+            return False
+        return self.terms <= vacancy.tokens
+
+
+@dataclass
+class VacancyFeatures:
+    """То, с чем сверяются поиски: слова вакансии, источник, город и зарплата в рублях (верхняя граница)"""
+    id: int
+    tokens: Set[str]
+    source: str
+    location_id: Optional[int]
+    salary: Optional[int] = None
+
+    @classmethod
+    def from_row(cls, row) -> 'VacancyFeatures':
+        salary = None
+        if row['salary_currency'] == 'RUB':
+            salary = row['salary_to'] or row['salary_from']
+        return cls(
+            id=row['id'],
+            tokens=tokenize(row['title'], row['company'], row['location'], row['excerpt']),
+            source=row['source'],
+            location_id=row['location_id'],
+            salary=salary,
+        )
+
+
+@dataclass
+class PercolatorIndex:
+    """
+    Обратный поиск: индексируются сами сохраненные поиски. Каждый поиск кладется в индекс
+    по одному, самому избирательному, ключу: слову запроса, иначе городу, источнику или корзине зарплаты.
+    Для вакансии кандидаты берутся только по ее собственным ключам и затем проверяются целиком,
+    поэтому сверка пачки стоит пропорционально размеру пачки, а не числу сохраненных поисков.
+    """
+    searches: Dict[int, SavedSearch] = field(default_factory=dict)
+    by_term: Dict[str, List[int]] = field(default_factory=dict)
+    by_location: Dict[int, List[int]] = field(default_factory=dict)
+    by_source: Dict[str, List[int]] = field(default_factory=dict)
+    by_salary: Dict[int, List[int]] = field(default_factory=dict)
+    match_all: List[int] = field(default_factory=list)
+
+    def add(self, search: SavedSearch) -> None:
+        self.searches[search.id] = search
+        if search.terms:
+            # Длинное слово обычно реже встречается в вакансиях, значит меньше лишних кандидатов
+            term = max(search.terms, key=lambda value: (len(value), value))
+            self.by_term.setdefault(term, []).append(search.id)
+        elif search.location_ids:
+            for location_id in search.location_ids:
+                self.by_location.setdefault(location_id, []).append(search.id)
+        elif search.source:
+            self.by_source.setdefault(search.source, []).append(search.id)
+        elif search.salary_min:
+            self.by_salary.setdefault(salary_bucket(search.salary_min), []).append(search.id)
+        else:
+            self.match_all.append(search.id)
+
+    def __len__(self) -> int:
+        return len(self.searches)
+
+    def candidates(self, vacancy: VacancyFeatures) -> Set[int]:
+        found = set(self.match_all)
+        for token in vacancy.tokens:
+            found.update(self.by_term.get(token, ()))
+        if vacancy.location_id is not None:
+            found.update(self.by_location.get(vacancy.location_id, ()))
+        found.update(self.by_source.get(vacancy.source, ()))
+        if vacancy.salary:
+            # Поиск с границей из корзины выше зарплаты вакансии подойти не может
+            for bucket in range(salary_bucket(vacancy.salary) + 1):
+                found.update(self.by_salary.get(bucket, ()))
+        return found
+
+    def match(self, vacancies: Iterable[VacancyFeatures]) -> List[Tuple[str, int, int]]:
+        """(user_id, vacancy_id, saved_search_id) без повторов: одному пользователю одна вакансия один раз"""
+        matched = {}
+        for vacancy in vacancies:
+            for search_id in sorted(self.candidates(vacancy)):
+                search = self.searches[search_id]
+                key = (search.user_id, vacancy.id)
+                if key not in matched and search.matches(vacancy):
+                    matched[key] = search_id
+        return [(user_id, vacancy_id, search_id) for (user_id, vacancy_id), search_id in matched.items()]
+
+
+def load_index(conn) -> PercolatorIndex:
+    """Строит индекс по всем сохраненным поискам; города сопоставляются со справочником как в фильтре списка"""
+    locations = LocationDirectory().load(conn)
+    index = PercolatorIndex()
+    for row in conn.execute("SELECT id, user_id, query, source, location, salary_min FROM saved_searches"):
+        location_ids = frozenset(locations.match_ids(row['location'])) if row['location'] else frozenset()
+        if row['location'] and not location_ids:
+            continue  # город не найден в справочнике - поиск пока ничего не найдет
+        index.add(SavedSearch(
+            id=row['id'],
+            user_id=row['user_id'],
+            terms=frozenset(tokenize(row['query'])),
+            source=row['source'],
+            location_ids=location_ids,
+            salary_min=row['salary_min'],
+        ))
+    return index
+
+
+def add_saved_search(user_id: str, query: str = "", source: str = "", location: str = "",
+                     salary_min: Optional[int] = None) -> int:
+    """Сохраняет поиск пользователя; слова запроса должны встретиться в названии, компании, городе или выдержке"""
+    conn = create_connection()
+    try:
+        cursor = conn.execute(
+            "INSERT INTO saved_searches (user_id, query, source, location, salary_min, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (user_id, query, source, location, salary_min, time.time())
+        )
+        conn.commit()
+        return cursor.lastrowid
+    finally:
+        conn.close()
+
+
+def delete_saved_search(search_id: int) -> None:
+    conn = create_connection()
+    try:
+        conn.execute("DELETE FROM saved_searches WHERE id = ?", (search_id,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def get_pending_notifications(limit: int = 1000) -> List[dict]:
+    """Неотправленные уведомления вместе с данными вакансии"""
+    conn = create_connection()
+    try:
+        rows = conn.execute("""
+            SELECT n.id, n.user_id, n.saved_search_id, n.vacancy_id, n.created_at,
+                   v.title, v.company, v.location, v.salary, v.original_url
+            FROM notifications n
+            JOIN vacancies v ON v.id = n.vacancy_id
+            WHERE n.sent_at IS NULL
+            ORDER BY n.id
+            LIMIT ?
+        """, (limit,)).fetchall()
+        return [dict(row) for row in rows]
+    finally:
+        conn.close()
+
+
+def mark_notifications_sent(notification_ids: List[int]) -> None:
+    conn = create_connection()
+    try:
+        now = time.time()
+        conn.executemany(
+            "UPDATE notifications SET sent_at = ? WHERE id = ?",
+            [(now, notification_id) for notification_id in notification_ids]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def notify_new_vacancies(batch_size: Optional[int] = None) -> int:
+    """
+    Сверяет вакансии, добавленные после прошлого запуска, с сохраненными поисками и записывает
+    уведомления. Индекс поисков строится один раз на запуск; каждая пачка вакансий сверяется
+    с ним один раз, уведомления и отметка о последней сверенной вакансии пишутся одной транзакцией.
+    Возвращает число новых уведомлений.
+    """
+    batch_size = batch_size or Config.NOTIFIER_BATCH_SIZE
+    conn = create_connection()
+    try:
+        state = conn.execute("SELECT last_vacancy_id FROM notifier_state WHERE id = 1").fetchone()
+        if state is None:
+            # Первый запуск: уведомляем только о вакансиях, появившихся после него
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM vacancies").fetchone()[0]
+            conn.execute("INSERT INTO notifier_state (id, last_vacancy_id) VALUES (1, ?)", (last_id,))
+            conn.commit()
+            return 0
+        last_id = state[0]
+
+        index = load_index(conn)
+        created = 0
+        while True:
+            rows = conn.execute(VACANCY_BATCH_SQL, (last_id, batch_size)).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1]['id']
+            matches = index.match(VacancyFeatures.from_row(row) for row in rows) if len(index) else []
+            now = time.time()
+            cursor = conn.executemany(
+                "INSERT OR IGNORE INTO notifications (user_id, vacancy_id, saved_search_id, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                [(user_id, vacancy_id, search_id, now) for user_id, vacancy_id, search_id in matches]
+            )
+            created += max(cursor.rowcount, 0)
+            conn.execute("UPDATE notifier_state SET last_vacancy_id = ? WHERE id = 1", (last_id,))
+            conn.commit()
+        logger.info(f"Сохраненных поисков {len(index)}, новых уведомлений {created}")
+        return created
+    finally:
+        conn.close()
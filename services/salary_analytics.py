@@ -0,0 +1,259 @@
+import logging
+import math
+import threading
+from array import array
+from collections import OrderedDict
+from itertools import groupby
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # NumPy не обязателен: без него считаем на array и чистом Python
+    np = None
+
+from core.database import create_read_connection, get_location_directory
+from core.generation import watcher
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (10, 25, 50, 75, 90)
+GROUP_BY_CHOICES = ("none", "source", "city")
+
+SNAPSHOT_SQL = """
+    SELECT
+        CASE WHEN salary_from IS NOT NULL AND salary_to IS NOT NULL
+             THEN (salary_from + salary_to) / 2.0
+             ELSE COALESCE(salary_from, salary_to) END,
+        source,
+        COALESCE(location_id, 0),
+        COALESCE(published_at_ts, 0),
+        title
+    FROM vacancies
+    WHERE salary_currency = 'RUB' AND (salary_from IS NOT NULL OR salary_to IS NOT NULL)
+"""
+
+
+def _interpolate(sorted_values, start: int, count: int, percentile: float) -> float:
+    position = start + (count - 1) * percentile / 100
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+class SalarySnapshot:
+    """
+    Колоночный снимок вакансий с зарплатой в рублях: значение, код источника, id города,
+    время публикации. Массивы NumPy (или array без NumPy); порядок сортировки по группе
+    и зарплате считается один раз на снимок, фильтры его сохраняют.
+    """
+
+    def __init__(self, rows: list, generation: int):
+        self.generation = generation
+        self.sources: List[str] = sorted({row[1] for row in rows})
+        source_codes = {source: code for code, source in enumerate(self.sources)}
+        self.titles = [(row[4] or "").lower() for row in rows]
+        self.size = len(rows)
+        if np is not None:
+            self.salary = np.fromiter((row[0] for row in rows), dtype=np.float64, count=self.size)
+            self.source_codes = np.fromiter((source_codes[row[1]] for row in rows), dtype=np.int16, count=self.size)
+            self.city_ids = np.fromiter((row[2] for row in rows), dtype=np.int32, count=self.size)
+            self.published_ts = np.fromiter((row[3] for row in rows), dtype=np.int64, count=self.size)
+        else:
+            self.salary = array('d', (row[0] for row in rows))
+            self.source_codes = array('h', (source_codes[row[1]] for row in rows))
+            self.city_ids = array('l', (row[2] for row in rows))
+            self.published_ts = array('q', (row[3] for row in rows))
+        self._orders = {}
+        self._title_masks = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, generation: int) -> 'SalarySnapshot':
+        conn = create_read_connection()
+        try:
+            rows = conn.execute(SNAPSHOT_SQL).fetchall()
+        finally:
+            conn.close()
+        return cls(rows, generation)
+
+    def _group_keys(self, group_by: str):
+        if group_by == "source":
+            return self.source_codes
+        if group_by == "city":
+            return self.city_ids
+        return np.zeros(self.size, dtype=np.int8) if np is not None else array('b', bytes(self.size))
+
+    def _order(self, group_by: str):
+        """Индексы, упорядоченные по (группа, зарплата); считаются один раз на снимок"""
+        order = self._orders.get(group_by)
+        if order is None:
+            keys = self._group_keys(group_by)
+            if np is not None:
+                order = np.lexsort((self.salary, keys))
+            else:
+                order = sorted(range(self.size), key=lambda i: (keys[i], self.salary[i]))
+            self._orders[group_by] = order
+        return order
+
+    def _title_mask(self, query: str):
+        """Маска вакансий, в названии которых есть query (кэшируется для повторных запросов)"""
+        query = query.lower()
+        with self._lock:
+            mask = self._title_masks.get(query)
+            if mask is not None:
+                self._title_masks.move_to_end(query)
+                return mask
+        if np is not None:
+            mask = np.fromiter((query in title for title in self.titles), dtype=bool, count=self.size)
+        else:
+            mask = [query in title for title in self.titles]
+        with self._lock:
+            self._title_masks[query] = mask
+            if len(self._title_masks) > 64:
+                self._title_masks.popitem(last=False)
+        return mask
+
+    def _group_name(self, group_by: str, key: int) -> str:
+        if group_by == "source":
+            return self.sources[key]
+        if group_by == "city":
+            return get_location_directory().name(key) or "Не указан"
+        return "all"
+
+    def compute(self, group_by: str = "none", since: Optional[int] = None, until: Optional[int] = None,
+                query: str = "", source: str = "", city_ids: Optional[List[int]] = None, bins: int = 10) -> dict:
+        """Медиана, перцентили, среднее и гистограмма по группам для отфильтрованных вакансий"""
+        source_code = self.sources.index(source) if source in self.sources else None
+        if source and source_code is None:
+            return {"group_by": group_by, "count": 0, "groups": []}
+        if np is not None:
+            groups = self._compute_numpy(group_by, since, until, query, source_code, city_ids, bins)
+        else:
+            groups = self._compute_python(group_by, since, until, query, source_code, city_ids, bins)
+        return {
+            "group_by": group_by,
+            "count": sum(group["count"] for group in groups),
+            "groups": groups,
+        }
+
+    def _compute_numpy(self, group_by, since, until, query, source_code, city_ids, bins) -> List[dict]:
+        mask = np.ones(self.size, dtype=bool)
+        if since is not None:
+            mask &= self.published_ts >= since
+        if until is not None:
+            mask &= self.published_ts < until
+        if query:
+            mask &= self._title_mask(query)
+        if source_code is not None:
+            mask &= self.source_codes == source_code
+        if city_ids is not None:
+            mask &= np.isin(self.city_ids, city_ids)
+
+        order = self._order(group_by)
+        selected = order[mask[order]]  # порядок (группа, зарплата) сохраняется
+        if not selected.size:
+            return []
+        values = self.salary[selected]
+        keys = self._group_keys(group_by)[selected]
+
+        boundaries = np.flatnonzero(np.diff(keys)) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [values.size]))
+        counts = ends - starts
+        means = np.add.reduceat(values, starts) / counts
+
+        percentiles = {}
+        for percentile in PERCENTILES:
+            position = starts + (counts - 1) * (percentile / 100)
+            lower = np.floor(position).astype(np.int64)
+            upper = np.ceil(position).astype(np.int64)
+            percentiles[percentile] = values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+        # Общие границы гистограммы по 1-99 перцентилям, чтобы выбросы не съедали шкалу
+        low, high = np.percentile(values, [1, 99])
+        edges = np.linspace(low, high if high > low else low + 1, bins + 1)
+        bin_index = np.clip(np.searchsorted(edges, values, side="right") - 1, 0, bins - 1)
+        group_index = np.repeat(np.arange(counts.size), counts)
+        histogram = np.zeros((counts.size, bins), dtype=np.int64)
+        np.add.at(histogram, (group_index, bin_index), 1)
+
+        return [
+            self._group_result(
+                group_by, int(keys[starts[i]]), int(counts[i]), float(means[i]),
+                float(values[starts[i]]), float(values[ends[i] - 1]),
+                {p: float(percentiles[p][i]) for p in PERCENTILES},
+                edges.tolist(), histogram[i].tolist()
+            )
+            for i in range(counts.size)
+        ]
+
+    def _compute_python(self, group_by, since, until, query, source_code, city_ids, bins) -> List[dict]:
+        keys = self._group_keys(group_by)
+        title_mask = self._title_mask(query) if query else None
+        city_set = set(city_ids) if city_ids is not None else None
+        selected = [
+            i for i in self._order(group_by)
+            if (since is None or self.published_ts[i] >= since)
+            and (until is None or self.published_ts[i] < until)
+            and (title_mask is None or title_mask[i])
+            and (source_code is None or self.source_codes[i] == source_code)
+            and (city_set is None or self.city_ids[i] in city_set)
+        ]
+        if not selected:
+            return []
+        all_values = sorted(self.salary[i] for i in selected)
+        low = _interpolate(all_values, 0, len(all_values), 1)
+        high = _interpolate(all_values, 0, len(all_values), 99)
+        high = high if high > low else low + 1
+        edges = [low + (high - low) * step / bins for step in range(bins + 1)]
+
+        groups = []
+        for key, items in groupby(selected, key=lambda i: keys[i]):
+            values = [self.salary[i] for i in items]
+            histogram = [0] * bins
+            for value in values:
+                position = int((value - low) / (high - low) * bins)
+                histogram[min(max(position, 0), bins - 1)] += 1
+            groups.append(self._group_result(
+                group_by, key, len(values), sum(values) / len(values), values[0], values[-1],
+                {p: _interpolate(values, 0, len(values), p) for p in PERCENTILES},
+                edges, histogram
+            ))
+        return groups
+
+    def _group_result(self, group_by, key, count, mean, minimum, maximum, percentiles, edges, histogram) -> dict:
+        return {
+            "key": self._group_name(group_by, key),
+            "count": count,
+            "mean": round(mean, 2),
+            "min": minimum,
+            "max": maximum,
+            "median": round(percentiles[50], 2),
+            "percentiles": {f"p{p}": round(value, 2) for p, value in percentiles.items()},
+            "histogram": {"edges": [round(edge, 2) for edge in edges], "counts": histogram},
+        }
+
+
+class SalaryAnalytics:
+    """Держит актуальный снимок: перестраивает его, когда воркер увеличивает поколение данных"""
+
+    def __init__(self):
+        self._snapshot: Optional[SalarySnapshot] = None
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> SalarySnapshot:
+        generation = watcher.current()
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.generation != generation:
+            with self._lock:
+                if self._snapshot is None or self._snapshot.generation != generation:
+                    self._snapshot = SalarySnapshot.load(generation)
+                    logger.info(f"Снимок зарплат обновлен: {self._snapshot.size} вакансий, поколение {generation}")
+                snapshot = self._snapshot
+        return snapshot
+
+    def salary_stats(self, **filters) -> dict:
+        return self.snapshot().compute(**filters)
+
+
+salary_analytics = SalaryAnalytics()
@@ -0,0 +1,217 @@
+import logging
+import threading
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from core.database import create_connection, decompress_description, replace_vacancy_tags
+
+logger = logging.getLogger(__name__)
+
+# Навыки и технологии: тег (каноническое имя в нижнем регистре) -> варианты написания
+SKILLS: Dict[str, List[str]] = {
+    "python": ["python", "python3", "питон", "пайтон"],
+    "django": ["django", "drf", "django rest framework", "джанго"],
+    "fastapi": ["fastapi", "fast api"],
+    "flask": ["flask", "фласк"],
+    "aiohttp": ["aiohttp"],
+    "asyncio": ["asyncio"],
+    "celery": ["celery"],
+    "sqlalchemy": ["sqlalchemy", "sql alchemy"],
+    "pandas": ["pandas"],
+    "numpy": ["numpy"],
+    "pytorch": ["pytorch", "torch"],
+    "tensorflow": ["tensorflow"],
+    "scikit-learn": ["scikit-learn", "sklearn", "scikit learn"],
+    "airflow": ["airflow", "apache airflow"],
+    "spark": ["spark", "pyspark", "apache spark"],
+    "kafka": ["kafka", "apache kafka"],
+    "rabbitmq": ["rabbitmq", "rabbit mq"],
+    "postgresql": ["postgresql", "postgres", "postgre", "pgsql", "постгрес"],
+    "mysql": ["mysql"],
+    "sqlite": ["sqlite"],
+    "clickhouse": ["clickhouse", "click house"],
+    "mongodb": ["mongodb", "mongo"],
+    "redis": ["redis"],
+    "elasticsearch": ["elasticsearch", "elastic search", "elastic"],
+    "sql": ["sql"],
+    "docker": ["docker", "докер"],
+    "kubernetes": ["kubernetes", "k8s", "кубернетес"],
+    "terraform": ["terraform"],
+    "ansible": ["ansible"],
+    "linux": ["linux", "линукс"],
+    "git": ["git", "github", "gitlab"],
+    "ci/cd": ["ci/cd", "ci cd", "github actions", "gitlab ci", "jenkins"],
+    "aws": ["aws", "amazon web services"],
+    "grpc": ["grpc"],
+    "rest api": ["rest api", "restful", "rest"],
+    "graphql": ["graphql"],
+    "javascript": ["javascript", "js", "ecmascript"],
+    "typescript": ["typescript", "ts"],
+    "react": ["react", "react.js", "reactjs"],
+    "vue": ["vue", "vue.js", "vuejs"],
+    "node.js": ["node.js", "nodejs", "node"],
+    "go": ["golang", "go"],
+    "java": ["java"],
+    "kotlin": ["kotlin"],
+    "c++": ["c++", "cpp"],
+    "c#": ["c#", ".net", "dotnet", "asp.net"],
+    "php": ["php", "laravel", "symfony"],
+    "1c": ["1с", "1c"],
+    "rust": ["rust"],
+    "machine learning": ["machine learning", "машинное обучение", "ml"],
+    "llm": ["llm", "large language model", "langchain"],
+    "selenium": ["selenium"],
+    "pytest": ["pytest"],
+}
+
+
+def normalize_text(text: str) -> str:
+    """Нижний регистр и ё -> е; длина строки не меняется, позиции совпадений остаются верными"""
+    return (text or "").lower().replace("ё", "е")
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class AhoCorasick:
+    """
+    Автомат Ахо-Корасик по словарю вариантов написания. Строится один раз;
+    поиск проходит текст за один проход: время линейно по длине текста плюс число совпадений
+    и не зависит от размера словаря (выходы суффиксных ссылок сливаются при построении).
+    """
+
+    def __init__(self, patterns: Dict[str, str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        # Для каждого состояния: (длина варианта, тег) всех вариантов, оканчивающихся здесь
+        self.outputs: List[List[Tuple[int, str]]] = [[]]
+        for pattern, tag in patterns.items():
+            self._add(pattern, tag)
+        self._build()
+
+    def _add(self, pattern: str, tag: str) -> None:
+        state = 0
+        for char in pattern:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+            state = next_state
+        self.outputs[state].append((len(pattern), tag))
+
+    def _build(self) -> None:
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                self.outputs[next_state] = self.outputs[next_state] + self.outputs[self.fail[next_state]]
+
+    def __len__(self) -> int:
+        return len(self.goto)
+
+    def search(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """Совпадения (начало, конец, тег) в уже нормализованном тексте"""
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length, tag in outputs[state]:
+                yield position - length + 1, position + 1, tag
+
+
+class SkillTagger:
+    """Извлекает теги технологий из названия и описания; совпадение засчитывается только целым словом"""
+
+    def __init__(self, skills: Optional[Dict[str, List[str]]] = None):
+        skills = skills or SKILLS
+        self.aliases = {
+            normalize_text(alias): tag
+            for tag, aliases in skills.items()
+            for alias in [tag, *aliases]
+        }
+        self.automaton = AhoCorasick(self.aliases)
+
+    def canonical(self, value: str) -> str:
+        """Тег по введенному значению (вариант написания или сам тег); неизвестное - как есть"""
+        key = normalize_text(value).strip()
+        return self.aliases.get(key, key)
+
+    def extract(self, *texts: Optional[str]) -> List[str]:
+        tags = set()
+        for text in texts:
+            text = normalize_text(text)
+            length = len(text)
+            for start, end, tag in self.automaton.search(text):
+                if tag in tags:
+                    continue
+                if start > 0 and _is_word_char(text[start - 1]) and _is_word_char(text[start]):
+                    continue
+                if end < length and _is_word_char(text[end]) and _is_word_char(text[end - 1]):
+                    continue
+                tags.add(tag)
+        return sorted(tags)
+
+
+_tagger: Optional[SkillTagger] = None
+_tagger_lock = threading.Lock()
+
+
+def get_skill_tagger() -> SkillTagger:
+    """Общий экземпляр с построенным автоматом (строится при первом обращении)"""
+    global _tagger
+    if _tagger is None:
+        with _tagger_lock:
+            if _tagger is None:
+                _tagger = SkillTagger()
+    return _tagger
+
+
+def canonical_tag(value: str) -> str:
+    return get_skill_tagger().canonical(value)
+
+
+def retag_vacancies(batch_size: int = 1000) -> int:
+    """
+    Заново размечает все вакансии основной БД (после изменения словаря или для старых данных).
+    Пачки по batch_size, одна транзакция на пачку; возвращает число размеченных вакансий.
+    """
+    tagger = get_skill_tagger()
+    conn = create_connection()
+    last_id = 0
+    tagged = 0
+    try:
+        while True:
+            rows = conn.execute("""
+                SELECT v.id, v.title, d.body
+                FROM vacancies v LEFT JOIN vacancy_descriptions d ON d.vacancy_id = v.id
+                WHERE v.id > ? ORDER BY v.id LIMIT ?
+            """, (last_id, batch_size)).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            cursor = conn.cursor()
+            for vacancy_id, title, body in rows:
+                replace_vacancy_tags(cursor, vacancy_id, tagger.extract(title, decompress_description(body)))
+            conn.commit()
+            tagged += len(rows)
+    finally:
+        conn.close()
+    logger.info(f"Теги проставлены {tagged} вакансиям")
+    return tagged
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    retag_vacancies()
@@ -0,0 +1,48 @@
+import pytest
+
+import core.database as database
+from core.config import Config
+from core.generation import watcher
+from metrics.store import metrics_store
+
+
+@pytest.fixture(autouse=True, scope="session")
+def data_files(tmp_path_factory):
+    """Файлы метрик и кэша карточек HH - во временном каталоге, а не рядом с vacancies.db проекта"""
+    directory = tmp_path_factory.mktemp("data")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(Config, "METRICS_DATABASE_PATH", str(directory / "metrics.db"))
+        patch.setattr(Config, "HH_DETAILS_CACHE_PATH", str(directory / "hh_details_cache.db"))
+        yield directory
+        # Иначе буфер метрик допишется при выходе, уже по пути по умолчанию
+        metrics_store.flush()
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Пустая БД во временном каталоге; чтение идет из нее напрямую, без снимка"""
+    monkeypatch.setattr(database, "get_db_path", lambda: str(tmp_path / "vacancies.db"))
+    monkeypatch.setattr(Config, "READ_FROM_SNAPSHOT", False)
+    monkeypatch.setattr(database, "_directories", {})
+    # Поколение данных перечитывается при каждом обращении
+    monkeypatch.setattr(watcher, "poll_interval", 0)
+    monkeypatch.setattr(watcher, "_generation", None)
+    database.initialize_database()
+    return tmp_path
+
+
+def make_vacancy(index, **fields):
+    """Вакансия для insert_vacancy с уникальными ссылкой и временем публикации"""
+    vacancy = {
+        "title": f"Python developer {index}",
+        "company": "Яндекс",
+        "location": "Москва",
+        "salary": "от 100000 RUR",
+        "description": f"Описание вакансии {index}: Python, Django, PostgreSQL",
+        "published_at": f"2026-10-01T12:{index % 60:02d}:00+03:00",
+        "source": "hh.ru",
+        "original_url": f"https://hh.ru/vacancy/{index}",
+        "source_id": str(index),
+    }
+    vacancy.update(fields)
+    return vacancy
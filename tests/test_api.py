@@ -0,0 +1,71 @@
+import pytest
+
+from app import create_app
+from core.database import get_filtered_vacancies, get_total_vacancies_count, insert_vacancy
+from core.timeutils import parse_time_filter, to_epoch
+from tests.conftest import make_vacancy
+
+PUBLISHED = [
+    "2026-09-01T10:00:00+03:00",
+    "2026-09-15T10:00:00+03:00",
+    "2026-10-01T10:00:00+03:00",
+]
+
+
+@pytest.fixture
+def vacancies(db):
+    for index, published_at in enumerate(PUBLISHED, 1):
+        assert insert_vacancy(make_vacancy(index, published_at=published_at))
+    return [to_epoch(published_at) for published_at in PUBLISHED]
+
+
+@pytest.fixture
+def client(vacancies):
+    return create_app().test_client()
+
+
+def titles(rows):
+    return sorted(row["title"] for row in rows)
+
+
+def test_since_until_bounds(vacancies):
+    first, second, third = vacancies
+
+    assert titles(get_filtered_vacancies(since=second)) == ["Python developer 2", "Python developer 3"]
+    # until не включается в диапазон
+    assert titles(get_filtered_vacancies(until=second)) == ["Python developer 1"]
+    assert titles(get_filtered_vacancies(since=first, until=third)) == ["Python developer 1", "Python developer 2"]
+    assert get_total_vacancies_count(since=second, until=third) == 1
+    assert get_total_vacancies_count(since=third + 1) == 0
+
+
+def test_timestamps_are_utc():
+    assert to_epoch("2026-10-01T10:00:00+03:00") == to_epoch("2026-10-01 07:00:00+00:00")
+    assert to_epoch("2026-10-01T10:00:00+0300") == to_epoch("2026-10-01T07:00:00Z")
+
+
+def test_parse_time_filter():
+    now = 1_800_000_000
+    assert parse_time_filter("24h", now) == now - 86400
+    assert parse_time_filter("2w", now) == now - 14 * 86400
+    assert parse_time_filter(str(now)) == now
+    assert parse_time_filter("2026-10-01T07:00:00+00:00") == to_epoch("2026-10-01T10:00:00+03:00")
+    assert parse_time_filter("") is None
+    with pytest.raises(ValueError):
+        parse_time_filter("вчера")
+
+
+def test_api_since_until(client, vacancies):
+    response = client.get("/api/vacancies", query_string={"since": vacancies[1], "until": vacancies[2]})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert titles(body["data"]) == ["Python developer 2"]
+    assert body["total"] == 1
+
+
+def test_api_rejects_bad_since(client):
+    response = client.get("/api/vacancies", query_string={"since": "вчера"})
+
+    assert response.status_code == 400
+    assert response.get_json()["status"] == "error"
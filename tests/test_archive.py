@@ -0,0 +1,68 @@
+import os
+
+from core.database import (ARCHIVE_SCHEMA, archive_old_vacancies, attach_archive, create_connection,
+                           get_archive_path, get_descriptions, get_filtered_vacancies, get_total_vacancies_count,
+                           get_vacancy_by_id, insert_vacancy)
+from tests.conftest import make_vacancy
+
+OLD = "2020-03-01T10:{:02d}:00+03:00"
+
+
+def vacancy_ids():
+    conn = create_connection()
+    try:
+        return {row['source_id']: row['id'] for row in conn.execute("SELECT id, source_id FROM vacancies")}
+    finally:
+        conn.close()
+
+
+def test_archive_moves_old_vacancies(db):
+    for index in range(1, 4):
+        insert_vacancy(make_vacancy(index, published_at=OLD.format(index)))
+    insert_vacancy(make_vacancy(4))
+    ids = vacancy_ids()
+    # Пока архива нет, чтение его не создает
+    assert get_total_vacancies_count(include_archived=True) == 4
+    assert not os.path.exists(get_archive_path())
+
+    assert archive_old_vacancies(max_age_days=365, batch_size=2) == 3
+    # Повторный запуск переносить уже нечего
+    assert archive_old_vacancies(max_age_days=365) == 0
+
+    assert list(vacancy_ids()) == ["4"]
+    assert get_total_vacancies_count() == 1
+    assert get_total_vacancies_count(include_archived=True) == 4
+    assert sorted(row['id'] for row in get_filtered_vacancies(include_archived=True)) == sorted(ids.values())
+    assert get_descriptions([ids["2"]], include_archived=True) == {
+        ids["2"]: "Описание вакансии 2: Python, Django, PostgreSQL"}
+
+
+def test_vacancy_detail_falls_back_to_archive(db):
+    insert_vacancy(make_vacancy(1, published_at=OLD.format(1)))
+    vacancy_id = vacancy_ids()["1"]
+    archive_old_vacancies(max_age_days=365)
+
+    vacancy = get_vacancy_by_id(vacancy_id)
+
+    assert vacancy['title'] == "Python developer 1"
+    assert vacancy['description'] == "Описание вакансии 1: Python, Django, PostgreSQL"
+    assert get_vacancy_by_id(vacancy_id + 100) is None
+
+
+def test_include_archived_counts_row_in_both_tables_once(db):
+    insert_vacancy(make_vacancy(1, published_at=OLD.format(1)))
+    insert_vacancy(make_vacancy(2))
+    archive_old_vacancies(max_age_days=365)
+    # Пачка скопирована в архив, но не удалена из основной таблицы (перенос прервался)
+    conn = create_connection()
+    try:
+        attach_archive(conn)
+        columns = ", ".join(row[1] for row in conn.execute("PRAGMA main.table_info(vacancies)"))
+        conn.execute(f"INSERT INTO {ARCHIVE_SCHEMA}.vacancies ({columns}) SELECT {columns} FROM main.vacancies")
+        conn.commit()
+    finally:
+        conn.close()
+
+    assert get_total_vacancies_count(include_archived=True) == 2
+    assert sorted(row['title'] for row in get_filtered_vacancies(include_archived=True)) == [
+        "Python developer 1", "Python developer 2"]
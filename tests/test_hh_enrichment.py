@@ -0,0 +1,54 @@
+from datetime import datetime
+
+from core.database import create_connection, insert_vacancy, migrate_add_description_partial_column
+from parsers.hh_parser import Vacancy
+from services.hh_enrichment import DescriptionCache, HHDescriptionEnricher
+from tests.conftest import make_vacancy
+
+
+def hh_vacancy(index, published_at=None):
+    published_at = published_at or make_vacancy(index)['published_at']
+    return Vacancy(f"Python developer {index}", "Яндекс", "Москва", None, f"Сниппет {index}",
+                   datetime.fromisoformat(published_at), "hh.ru", f"https://hh.ru/vacancy/{index}", str(index))
+
+
+def test_enrich_skips_descriptions_stored_in_database(db, tmp_path, monkeypatch):
+    insert_vacancy(make_vacancy(1, description="Полное описание\nPython, Django"))
+    insert_vacancy(make_vacancy(2, description="Сниппет 2", description_partial=True))
+    insert_vacancy(make_vacancy(4, description="Полное описание\nGo"))
+    cache = DescriptionCache(str(tmp_path / "cache.db"))
+    enricher = HHDescriptionEnricher(cache=cache, max_workers=1)
+    requested = []
+
+    def fetch(source_id):
+        requested.append(source_id)
+        return f"Карточка {source_id}\nPython"
+
+    monkeypatch.setattr(enricher, "_fetch_description", fetch)
+    vacancies = [hh_vacancy(1), hh_vacancy(2), hh_vacancy(3), hh_vacancy(4, "2026-10-02T09:00:00+03:00")]
+
+    assert enricher.enrich(vacancies) == 3
+
+    # Полное описание из БД для той же даты публикации; сниппет, новая и переопубликованная - загружаются
+    assert sorted(requested) == ["2", "3", "4"]
+    assert [vacancy.description for vacancy in vacancies] == [
+        "Полное описание\nPython, Django", "Карточка 2\nPython", "Карточка 3\nPython", "Карточка 4\nPython"]
+    # Описание из БД попало в кэш: следующий обход не обращается и к БД
+    assert cache.get_many(["1"]) == {"1": (str(vacancies[0].published_at), "Полное описание\nPython, Django")}
+
+
+def test_partial_migration_marks_single_line_hh_descriptions(db):
+    insert_vacancy(make_vacancy(1, description="Сниппет без переносов"))
+    insert_vacancy(make_vacancy(2, description="Полное описание\nPython"))
+    insert_vacancy(make_vacancy(3, description="Описание другого источника", source="superjob.ru"))
+    conn = create_connection()
+    try:
+        conn.execute("ALTER TABLE vacancy_descriptions DROP COLUMN partial")
+        migrate_add_description_partial_column(conn, batch_size=1)
+        partial = conn.execute("""
+            SELECT v.source_id FROM vacancy_descriptions d JOIN vacancies v ON v.id = d.vacancy_id
+            WHERE d.partial = 1
+        """).fetchall()
+    finally:
+        conn.close()
+    assert [row[0] for row in partial] == ["1"]
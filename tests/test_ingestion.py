@@ -0,0 +1,138 @@
+from datetime import datetime
+
+import pytest
+
+from core.crawl_checkpoint import CrawlCheckpoint
+from core.crawl_planner import CrawlPlanner
+from core.database import create_connection
+from core.ingestion import IngestionPipeline
+from parsers.hh_parser import Vacancy
+from parsers.registry import BaseSource, CrawlTask, DeadlineMixin, register_source
+
+PAGES = 3
+PER_PAGE = 2
+
+
+class FakeSource(BaseSource):
+    """Источник без сети: у каждого запроса PAGES страниц по PER_PAGE вакансий"""
+    name = "test.local"
+
+    def __init__(self):
+        self.requested = []
+        self.fail_at = None  # (запрос, страница), на которой загрузка падает
+
+    def create_parser(self):
+        return DeadlineMixin()
+
+    def base_tasks(self, queries, now):
+        return [CrawlTask(self.name, query) for query in queries]
+
+    def fetch(self, parser, task):
+        return [vacancy for page in self.fetch_pages(parser, task) for vacancy in self.parse_page(parser, page)]
+
+    def fetch_pages(self, parser, task, start_page=0):
+        for page in range(start_page, PAGES):
+            if self.fail_at == (task.query, page):
+                raise ConnectionError("сеть недоступна")
+            self.requested.append((task.query, page))
+            yield [(task.query, page, item) for item in range(PER_PAGE)]
+
+    def parse_page(self, parser, page):
+        return [
+            Vacancy(f"{query} developer {page}-{item}", "Яндекс", "Москва", None, f"{query} {page} {item}",
+                    datetime(2026, 10, 1, 12, page, item), self.name, f"https://test.local/{query}/{page}/{item}",
+                    f"{query}-{page}-{item}")
+            for query, page, item in page
+        ]
+
+
+@pytest.fixture
+def source(db):
+    source = FakeSource()
+    register_source(source)
+    return source
+
+
+def run_pipeline(**kwargs):
+    planner = CrawlPlanner(queries=["Python", "Go"], sources=[FakeSource.name])
+    return IngestionPipeline(planner=planner, batch_size=1, **kwargs).run()
+
+
+def crawl_state():
+    conn = create_connection()
+    try:
+        runs = conn.execute("SELECT id, finished_at FROM crawl_runs").fetchall()
+        checkpoints = {row['query']: (row['pages_done'], row['done'])
+                       for row in conn.execute("SELECT * FROM crawl_checkpoints")}
+        return [tuple(run) for run in runs], checkpoints
+    finally:
+        conn.close()
+
+
+def test_failed_task_resumes_from_first_unwritten_page(source):
+    source.fail_at = ("Python", 2)
+    assert run_pipeline() == {'new': (PAGES + 2) * PER_PAGE, 'changed': 0, 'unchanged': 0}
+    runs, checkpoints = crawl_state()
+    # Задача Python не дошла до конца: запуск не завершен, план сохранен
+    assert len(runs) == 1 and runs[0][1] is None
+    assert checkpoints == {"Python": (2, 0), "Go": (PAGES, 1)}
+
+    source.fail_at = None
+    source.requested.clear()
+    assert run_pipeline() == {'new': PER_PAGE, 'changed': 0, 'unchanged': 0}
+    # Продолжается только незавершенная задача и только с незаписанной страницы
+    assert source.requested == [("Python", 2)]
+    runs, checkpoints = crawl_state()
+    assert runs[0][1] is not None
+    assert checkpoints == {}
+
+    # Следующий запуск - новый, с полным планом
+    source.requested.clear()
+    assert run_pipeline() == {'new': 0, 'changed': 0, 'unchanged': PAGES * 2 * PER_PAGE}
+    assert len(source.requested) == PAGES * 2
+
+
+def test_run_without_plan_starts_over(db):
+    # Процесс упал между begin() и save_plan(): продолжать нечего
+    checkpoint = CrawlCheckpoint()
+    assert checkpoint.begin() is False
+
+    checkpoint = CrawlCheckpoint()
+    assert checkpoint.begin() is False
+    checkpoint.save_plan([CrawlTask(FakeSource.name, "Python")])
+    assert CrawlCheckpoint().begin() is True
+
+
+def test_checkpoint_counts_contiguous_prefix(db):
+    task = CrawlTask(FakeSource.name, "Python")
+    checkpoint = CrawlCheckpoint()
+    checkpoint.begin()
+    checkpoint.save_plan([task])
+
+    def write(save):
+        conn = create_connection()
+        try:
+            save(conn.cursor())
+            conn.commit()
+        finally:
+            conn.close()
+
+    # Страницы пишутся не по порядку: засчитывается только непрерывный префикс
+    checkpoint.commit_pages([(task.key, 1), (task.key, 2)], write)
+    assert crawl_state()[1] == {"Python": (0, 0)}
+    checkpoint.finish_task(task.key, 3)
+    checkpoint.commit_pages([(task.key, 0)], write)
+    assert crawl_state()[1] == {"Python": (3, 1)}
+    assert checkpoint.unfinished() == 0
+
+    resumed = CrawlCheckpoint()
+    assert resumed.begin() is True
+    assert resumed.pending() == []
+
+
+def test_lost_lease_stops_feeding_tasks(source):
+    assert run_pipeline(should_stop=lambda: True) == {'new': 0, 'changed': 0, 'unchanged': 0}
+    assert source.requested == []
+    runs, checkpoints = crawl_state()
+    assert runs[0][1] is None
+    assert set(checkpoints) == {"Python", "Go"}
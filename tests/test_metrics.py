@@ -0,0 +1,114 @@
+import random
+
+import pytest
+
+from metrics.store import DAILY, HOURLY, RAW, MetricsStore, display_step
+
+NOW = 1_800_000_000 - 1_800_000_000 % DAILY
+DAY = 86400
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr("core.config.Config.METRICS_RAW_RETENTION", 2 * DAY)
+    monkeypatch.setattr("core.config.Config.METRICS_HOURLY_RETENTION", 10 * DAY)
+    monkeypatch.setattr("core.config.Config.METRICS_DAILY_RETENTION", 100 * DAY)
+    return MetricsStore(str(tmp_path / "metrics.db"), flush_size=10_000, flush_interval=3600)
+
+
+def resolutions(store):
+    conn = store.connect()
+    try:
+        return {row[0]: row[1] for row in conn.execute(
+            "SELECT resolution, COUNT(*) FROM metric_points GROUP BY resolution")}
+    finally:
+        conn.close()
+
+
+def totals(store, name, since, until):
+    """Число, сумма и границы значений в окне по всем разрешениям"""
+    conn = store.connect()
+    try:
+        return tuple(conn.execute(
+            "SELECT SUM(count), SUM(sum), MIN(min), MAX(max) FROM metric_points WHERE name = ? AND ts >= ? AND ts < ?",
+            (name, since, until)
+        ).fetchone())
+    finally:
+        conn.close()
+
+
+def test_record_merges_values_of_one_second(store):
+    for value in (5, 1, 9):
+        store.record("ui.response_time", value, "index", ts=NOW + 0.4)
+    assert store.flush() == 1
+
+    points = store.points("ui.response_time", NOW, NOW + 1)["points"]
+    assert [(p["count"], p["sum"], p["min"], p["max"]) for p in points] == [(3, 15, 1, 9)]
+
+
+def test_downsample_keeps_totals(store):
+    rng = random.Random(48)
+    # Значения за 20 дней: часть уходит в часовые, часть в дневные точки
+    values = [(NOW - rng.randrange(20 * DAY), rng.uniform(0, 100)) for _ in range(3000)]
+    for ts, value in values:
+        store.record("crawl.duration", value, ts=ts)
+    store.flush()
+    before = totals(store, "crawl.duration", 0, NOW + 1)
+
+    store.downsample(now=NOW)
+
+    after = totals(store, "crawl.duration", 0, NOW + 1)
+    assert after[0] == before[0] == len(values)
+    assert after[1] == pytest.approx(before[1])
+    assert after[2:] == before[2:]
+    counts = resolutions(store)
+    assert set(counts) == {RAW, HOURLY, DAILY}
+    conn = store.connect()
+    try:
+        # Сырые точки только за последние 2 дня, часовые - за 10, старше - дневные
+        assert conn.execute("SELECT MIN(ts) FROM metric_points WHERE resolution = ?", (RAW,)).fetchone()[0] \
+            >= NOW - 2 * DAY
+        assert conn.execute("SELECT MIN(ts) FROM metric_points WHERE resolution = ?", (HOURLY,)).fetchone()[0] \
+            >= NOW - 10 * DAY
+        assert conn.execute("SELECT COUNT(*) FROM metric_points WHERE ts % resolution != 0").fetchone()[0] == 0
+    finally:
+        conn.close()
+
+    # Повторное прореживание ничего не меняет
+    store.downsample(now=NOW)
+    assert totals(store, "crawl.duration", 0, NOW + 1) == after
+
+
+def test_downsample_expires_old_daily_points(store):
+    store.record("crawl.errors", 1, ts=NOW - 200 * DAY)
+    store.record("crawl.errors", 2, ts=NOW - 50 * DAY)
+
+    result = store.downsample(now=NOW)
+
+    assert result["expired"] == 1
+    assert totals(store, "crawl.errors", 0, NOW)[:2] == (1, 2)
+
+
+def test_series_uses_coarse_step_for_long_window(store):
+    for hour in range(48):
+        store.record("crawl.vacancies", hour, ts=NOW - hour * HOURLY)
+    store.flush()
+
+    series = store.series("crawl.vacancies", NOW - 2 * DAY, NOW + 1, limit=10)
+
+    assert series["step"] == display_step(NOW - 2 * DAY, NOW + 1, 10) == 6 * HOURLY
+    assert len(series["points"]) <= 10
+    assert sum(point["count"] for point in series["points"]) == 48
+
+
+def test_flusher_keeps_writes_off_the_recording_thread(store):
+    store.flush_size = 1
+    store.start_flusher()
+
+    store.record("ui.response_time", 12, "index", ts=NOW)
+    store.record("ui.response_time", 30, "search", ts=NOW)
+
+    # Буфер больше flush_size, но record() сам в БД не пишет: это дело фонового потока
+    assert resolutions(store) == {}
+    assert len(store._buffer) == 2
+    assert store._flusher.is_alive()
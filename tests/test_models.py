@@ -0,0 +1,78 @@
+from core.database import (create_connection, get_company_counts, get_descriptions, get_filtered_vacancies,
+                           get_total_vacancies_count, insert_vacancy, prepare_vacancy, upsert_prepared_vacancies)
+from tests.conftest import make_vacancy
+
+FULL_DESCRIPTION = "Полное описание: Python, Django, PostgreSQL, Docker"
+
+
+def stored_rows():
+    conn = create_connection()
+    try:
+        return conn.execute("SELECT id, source_id, salary, content_hash FROM vacancies ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def test_upsert_counts_new_changed_unchanged(db):
+    rows = [prepare_vacancy(make_vacancy(index)) for index in range(1, 4)]
+    assert upsert_prepared_vacancies(rows) == {'new': 3, 'changed': 0, 'unchanged': 0}
+    ids = [row['id'] for row in stored_rows()]
+
+    rows = [prepare_vacancy(make_vacancy(1)), prepare_vacancy(make_vacancy(2, salary="от 200000 RUR")),
+            prepare_vacancy(make_vacancy(3)), prepare_vacancy(make_vacancy(4))]
+    assert upsert_prepared_vacancies(rows) == {'new': 1, 'changed': 1, 'unchanged': 2}
+
+    stored = stored_rows()
+    # Изменившаяся вакансия обновлена на месте, без нового id
+    assert [row['id'] for row in stored[:3]] == ids
+    assert stored[1]['salary'] == "от 200000 RUR"
+    assert len(stored) == 4
+
+
+def test_upsert_repeated_key_in_one_batch(db):
+    rows = [prepare_vacancy(make_vacancy(1)), prepare_vacancy(make_vacancy(1, salary="до 300000 RUR"))]
+
+    assert upsert_prepared_vacancies(rows) == {'new': 1, 'changed': 1, 'unchanged': 0}
+    assert [row['salary'] for row in stored_rows()] == ["до 300000 RUR"]
+
+
+def test_partial_description_keeps_stored_one(db):
+    upsert_prepared_vacancies([prepare_vacancy(make_vacancy(1, description=FULL_DESCRIPTION))])
+    vacancy_id = stored_rows()[0]['id']
+
+    # Карточку HH загрузить не удалось: пришел сниппет, остальное не изменилось
+    snippet = make_vacancy(1, description="Python, Django", description_partial=True)
+    assert upsert_prepared_vacancies([prepare_vacancy(snippet)]) == {'new': 0, 'changed': 0, 'unchanged': 1}
+    assert get_descriptions([vacancy_id]) == {vacancy_id: FULL_DESCRIPTION}
+
+    # Изменилась зарплата: поле обновляется, а полное описание остается
+    snippet['salary'] = "от 250000 RUR"
+    assert upsert_prepared_vacancies([prepare_vacancy(snippet)]) == {'new': 0, 'changed': 1, 'unchanged': 0}
+    assert get_descriptions([vacancy_id]) == {vacancy_id: FULL_DESCRIPTION}
+    assert get_filtered_vacancies()[0]['salary'] == "от 250000 RUR"
+    assert get_filtered_vacancies()[0]['excerpt'].startswith("Полное описание")
+
+    # После этого полное описание снова совпадает с сохраненным
+    full = make_vacancy(1, description=FULL_DESCRIPTION, salary="от 250000 RUR")
+    assert upsert_prepared_vacancies([prepare_vacancy(full)]) == {'new': 0, 'changed': 0, 'unchanged': 1}
+
+
+def test_location_filter_matches_inserted_vacancy(db):
+    insert_vacancy(make_vacancy(1, location="г. Санкт-Петербург"))
+    insert_vacancy(make_vacancy(2, location="Москва"))
+
+    # insert_vacancy сопоставляет город со справочником, и фильтр по location_id его находит
+    assert [row['location'] for row in get_filtered_vacancies(location="СПб")] == ["г. Санкт-Петербург"]
+    assert get_total_vacancies_count(location="санкт-петербург") == 1
+
+
+def test_company_filter_matches_inserted_vacancy(db):
+    insert_vacancy(make_vacancy(1, company='ООО "Яндекс"'))
+    insert_vacancy(make_vacancy(2, company="YANDEX LLC"))
+    insert_vacancy(make_vacancy(3, company="Сбербанк"))
+
+    # Разные написания одной компании сводятся к одному company_id
+    assert sorted(row['company'] for row in get_filtered_vacancies(company="яндекс")) == [
+        "YANDEX LLC", 'ООО "Яндекс"']
+    assert get_total_vacancies_count(company="Яндекс") == 2
+    assert {row['name']: row['count'] for row in get_company_counts()}.get("Яндекс") == 2
@@ -0,0 +1,88 @@
+import random
+
+from core.database import insert_vacancy
+from services.notifier import (PercolatorIndex, SavedSearch, VacancyFeatures, add_saved_search,
+                               get_pending_notifications, mark_notifications_sent, notify_new_vacancies, tokenize)
+from tests.conftest import make_vacancy
+
+WORDS = ["python", "java", "go", "django", "senior", "junior", "c++", "c#", "backend", "data"]
+SOURCES = ["hh.ru", "superjob.ru", "fl.ru"]
+
+
+def brute_force(searches, vacancies):
+    """Сверка каждой вакансии с каждым поиском: то, что должен дать индекс"""
+    matched = {}
+    for vacancy in vacancies:
+        for search in sorted(searches, key=lambda search: search.id):
+            key = (search.user_id, vacancy.id)
+            if key not in matched and search.matches(vacancy):
+                matched[key] = search.id
+    return sorted((user_id, vacancy_id, search_id) for (user_id, vacancy_id), search_id in matched.items())
+
+
+def test_tokenize():
+    assert tokenize("Senior C++/C# разработчик", "Ёлка") == {"senior", "c++", "c#", "разработчик", "елка"}
+
+
+def test_index_matches_brute_force():
+    rng = random.Random(43)
+    searches = [
+        SavedSearch(
+            id=search_id,
+            user_id=f"user{rng.randrange(40)}",
+            terms=frozenset(rng.sample(WORDS, rng.choice([0, 0, 1, 2]))),
+            source=rng.choice(["", "", *SOURCES]),
+            location_ids=frozenset(rng.sample(range(1, 6), rng.choice([0, 0, 1, 2]))),
+            salary_min=rng.choice([None, None, 80000, 150000, 400000]),
+        )
+        for search_id in range(1, 501)
+    ]
+    vacancies = [
+        VacancyFeatures(
+            id=vacancy_id,
+            tokens=set(rng.sample(WORDS, rng.randrange(1, 5))),
+            source=rng.choice(SOURCES),
+            location_id=rng.choice([None, 1, 2, 3, 4, 5]),
+            salary=rng.choice([None, 50000, 120000, 200000, 600000]),
+        )
+        for vacancy_id in range(1, 301)
+    ]
+    index = PercolatorIndex()
+    for search in searches:
+        index.add(search)
+
+    matched = sorted(index.match(vacancies))
+
+    assert matched
+    assert matched == brute_force(searches, vacancies)
+
+
+def test_notify_new_vacancies(db):
+    insert_vacancy(make_vacancy(1, title="Python developer"))
+    # Первый запуск только запоминает последнюю вакансию
+    assert notify_new_vacancies() == 0
+
+    python_moscow = add_saved_search("anna", query="python", location="Москва")
+    add_saved_search("anna", query="developer")
+    well_paid = add_saved_search("boris", salary_min=150000)
+    add_saved_search("boris", query="java", source="superjob.ru")
+
+    insert_vacancy(make_vacancy(2, title="Python developer", salary="от 100000 до 200000 руб."))
+    insert_vacancy(make_vacancy(3, title="Python developer", location="Казань", salary="до 90000 руб."))
+    insert_vacancy(make_vacancy(4, title="Java developer", description="Java, Spring"))
+
+    assert notify_new_vacancies(batch_size=2) == 4
+    pending = get_pending_notifications()
+    got = sorted((row['user_id'], row['title'], row['location'], row['saved_search_id']) for row in pending)
+    assert got == sorted([
+        # Одному пользователю одна вакансия - одно уведомление, по первому подошедшему поиску
+        ("anna", "Python developer", "Москва", python_moscow),
+        ("anna", "Python developer", "Казань", python_moscow + 1),
+        ("anna", "Java developer", "Москва", python_moscow + 1),
+        ("boris", "Python developer", "Москва", well_paid),
+    ])
+
+    # Сверенные вакансии повторно не сверяются
+    assert notify_new_vacancies() == 0
+    mark_notifications_sent([row['id'] for row in pending])
+    assert get_pending_notifications() == []
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta, timezone
+
+from parsers.hh_parser import HH_MAX_RESULTS, HHSource
+from parsers.registry import CrawlTask
+
+
+class FakeHHParser:
+    """Считает вакансии по списку дат публикации, как /vacancies с per_page=0"""
+
+    def __init__(self, published):
+        self.published = published
+        self.requests = 0
+
+    def count_vacancies(self, query, area, date_from, date_to):
+        self.requests += 1
+        return sum(date_from <= published < date_to for published in self.published)
+
+
+def make_task(start, end):
+    return CrawlTask("hh.ru", "Python", 1, start, end)
+
+
+def test_expand_task_keeps_small_search_whole():
+    end = datetime(2026, 10, 1, tzinfo=timezone.utc)
+    start = end - timedelta(days=30)
+    parser = FakeHHParser([start + timedelta(hours=i) for i in range(100)])
+    task = make_task(start, end)
+
+    assert HHSource().expand_task(parser, task) == [task]
+    assert parser.requests == 1
+
+
+def test_expand_task_splits_into_windows_within_limit():
+    end = datetime(2026, 10, 1, tzinfo=timezone.utc)
+    start = end - timedelta(days=30)
+    # 5000 вакансий, плотнее в последние дни
+    published = [start + timedelta(minutes=8 * i) for i in range(3000)]
+    published += [end - timedelta(minutes=i + 1) for i in range(2000)]
+    parser = FakeHHParser(published)
+
+    windows = HHSource().expand_task(parser, make_task(start, end))
+
+    assert len(windows) > 2
+    counts = [parser.count_vacancies("Python", 1, w.date_from, w.date_to) for w in windows]
+    assert all(0 < count <= HH_MAX_RESULTS for count in counts)
+    # Окна не пересекаются и покрывают все вакансии периода
+    assert sum(counts) == len(published)
+    ordered = sorted(windows, key=lambda w: w.date_from)
+    assert all(a.date_to <= b.date_from for a, b in zip(ordered, ordered[1:]))
+    assert len({w.key for w in windows}) == len(windows)
+
+
+def test_expand_task_stops_at_min_window(monkeypatch):
+    monkeypatch.setattr("core.config.Config.HH_MIN_WINDOW_MINUTES", 10)
+    end = datetime(2026, 10, 1, tzinfo=timezone.utc)
+    start = end - timedelta(days=1)
+    # Больше лимита за одну минуту: дальше делить нельзя, окно берется как есть
+    parser = FakeHHParser([end - timedelta(seconds=30)] * (HH_MAX_RESULTS + 1))
+
+    windows = HHSource().expand_task(parser, make_task(start, end))
+
+    assert len(windows) == 1
+    assert windows[0].date_to - windows[0].date_from <= timedelta(minutes=10)
+    assert windows[0].date_from <= end - timedelta(seconds=30) < windows[0].date_to
@@ -0,0 +1,142 @@
+import threading
+import time
+
+import pytest
+
+from core.pipeline import Pipeline, Stage
+
+
+class Collector:
+    """Последняя стадия: запоминает все, что до нее дошло"""
+
+    def __init__(self):
+        self.items = []
+        self._lock = threading.Lock()
+
+    def __call__(self, item):
+        with self._lock:
+            self.items.append(item)
+        return ()
+
+
+def pipeline_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith(("produce-", "consume-", "batch-"))]
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "условие не выполнилось"
+        time.sleep(0.01)
+
+
+def test_bounded_queue_blocks_fast_stage():
+    release = threading.Event()
+    produced = []
+    collector = Collector()
+
+    def produce(item):
+        produced.append(item)
+        return [item]
+
+    def consume(item):
+        release.wait()
+        return collector(item)
+
+    stages = [Stage('produce', produce, queue_size=100), Stage('consume', consume, queue_size=2)]
+    runner = threading.Thread(target=Pipeline(stages).run, args=(range(50),))
+    runner.start()
+
+    # Медленная стадия держит один элемент, в ее очереди еще два, и один ждет места у быстрой
+    wait_until(lambda: len(produced) == 4)
+    time.sleep(0.1)
+    assert len(produced) == 4
+    assert stages[1].queue.qsize() == 2
+
+    release.set()
+    runner.join(5)
+    assert not runner.is_alive()
+    assert sorted(collector.items) == list(range(50))
+    assert stages[1].max_depth <= 2
+    assert stages[0].blocked > 0
+
+
+def test_flush_runs_once_per_worker():
+    collector = Collector()
+    local = threading.local()
+    flushed = []
+
+    def batch(item):
+        local.batch = getattr(local, 'batch', []) + [item]
+        if len(local.batch) == 3:
+            full, local.batch = local.batch, []
+            return [full]
+        return []
+
+    def flush():
+        # Неполная пачка потока дописывается после конца входа
+        flushed.append(threading.current_thread().name)
+        return [local.batch] if getattr(local, 'batch', []) else []
+
+    stages = [Stage('batch', batch, workers=2, flush=flush), Stage('consume', collector)]
+    Pipeline(stages).run(range(10))
+
+    assert sorted(flushed) == ["batch-0", "batch-1"]
+    assert sorted(item for batch in collector.items for item in batch) == list(range(10))
+    assert all(len(batch) <= 3 for batch in collector.items)
+    assert pipeline_threads() == []
+
+
+def test_worker_error_is_counted_and_other_items_pass():
+    collector = Collector()
+
+    def produce(item):
+        if item % 4 == 0:
+            raise ValueError(f"плохой элемент {item}")
+        return [item]
+
+    stages = [Stage('produce', produce, workers=3), Stage('consume', collector)]
+    Pipeline(stages).run(range(20))
+
+    # Ошибка элемента не роняет поток стадии: она учитывается, остальные элементы доходят до конца
+    assert stages[0].errors == 5
+    assert stages[0].items_in == 20
+    assert sorted(collector.items) == [item for item in range(20) if item % 4]
+    assert pipeline_threads() == []
+
+
+def test_input_error_propagates_after_stages_are_closed():
+    collector = Collector()
+
+    def items():
+        yield from range(5)
+        raise ConnectionError("источник недоступен")
+
+    stages = [Stage('produce', lambda item: [item]), Stage('consume', collector)]
+    with pytest.raises(ConnectionError):
+        Pipeline(stages).run(items())
+
+    # Уже переданные элементы дообработаны, потоки стадий остановлены
+    assert sorted(collector.items) == list(range(5))
+    assert pipeline_threads() == []
+
+
+def test_stops_cleanly_when_should_stop_flips():
+    collector = Collector()
+    stopped = threading.Event()
+
+    def produce(task):
+        # Как стадия загрузки: страницы задачи идут, пока не потеряна аренда
+        for page in range(100):
+            if stopped.is_set():
+                return
+            if (task, page) == (1, 3):
+                stopped.set()
+            yield (task, page)
+
+    stages = [Stage('produce', produce, queue_size=1), Stage('consume', collector, queue_size=1)]
+    Pipeline(stages).run(task for task in range(10) if not stopped.is_set())
+
+    assert collector.items == [(0, page) for page in range(100)] + [(1, page) for page in range(4)]
+    assert stages[1].items_in == 104
+    assert pipeline_threads() == []
@@ -0,0 +1,57 @@
+import random
+
+from core.database import create_connection, get_filtered_vacancies, insert_vacancy
+from services.skill_tagger import AhoCorasick, SkillTagger, retag_vacancies
+from tests.conftest import make_vacancy
+
+
+def naive_search(patterns, text):
+    return {
+        (start, start + len(pattern), tag)
+        for pattern, tag in patterns.items()
+        for start in range(len(text) - len(pattern) + 1)
+        if text.startswith(pattern, start)
+    }
+
+
+def test_automaton_matches_naive_search():
+    rng = random.Random(44)
+    for _ in range(50):
+        patterns = {"".join(rng.choices("abc", k=rng.randint(1, 4))): f"tag{i}" for i in range(8)}
+        automaton = AhoCorasick(patterns)
+        text = "".join(rng.choices("abcd", k=60))
+        assert set(automaton.search(text)) == naive_search(patterns, text)
+
+
+def test_extract_whole_words_only():
+    tagger = SkillTagger()
+
+    assert tagger.extract("Senior Python/Django developer") == ["django", "python"]
+    # go внутри django и java внутри javascript не засчитываются
+    assert tagger.extract("Django", "JavaScript") == ["django", "javascript"]
+    assert tagger.extract("Разработчик C++ и C#, опыт с K8s, Postgres и ML") == [
+        "c#", "c++", "kubernetes", "machine learning", "postgresql"]
+    assert tagger.extract("Программист 1С: Предприятие") == ["1c"]
+    assert tagger.extract("Менеджер по продажам", None) == []
+
+
+def test_canonical_tag():
+    tagger = SkillTagger()
+
+    assert tagger.canonical(" Postgres ") == "postgresql"
+    assert tagger.canonical("PYTHON") == "python"
+    assert tagger.canonical("cobol") == "cobol"
+
+
+def test_retag_and_filter_by_tag(db):
+    insert_vacancy(make_vacancy(1, title="Python developer", description="FastAPI, Redis"))
+    insert_vacancy(make_vacancy(2, title="Go developer", description="Golang, Kafka"))
+
+    assert retag_vacancies(batch_size=1) == 2
+    conn = create_connection()
+    try:
+        tags = sorted(tuple(row) for row in conn.execute("SELECT tag, vacancy_id FROM vacancy_tags"))
+    finally:
+        conn.close()
+    assert [tag for tag, _ in tags] == ["fastapi", "go", "kafka", "python", "redis"]
+    assert [row["title"] for row in get_filtered_vacancies(tag="kafka")] == ["Go developer"]
@@ -0,0 +1,84 @@
+import os
+import threading
+
+import pytest
+
+from core.database import (archive_old_vacancies, create_read_connection, get_snapshot_path,
+                           get_total_vacancies_count, get_vacancy_by_id, insert_vacancy, publish_snapshot)
+from tests.conftest import make_vacancy
+
+
+@pytest.fixture
+def snapshot_db(db, monkeypatch):
+    """БД, чтение которой идет из опубликованного снимка"""
+    monkeypatch.setattr("core.config.Config.READ_FROM_SNAPSHOT", True)
+    return db
+
+
+def count(conn):
+    return conn.execute("SELECT COUNT(*) FROM vacancies").fetchone()[0]
+
+
+def test_reads_come_from_published_snapshot(snapshot_db):
+    insert_vacancy(make_vacancy(1))
+    # Пока снимка нет, чтение идет из основной БД
+    assert get_total_vacancies_count() == 1
+
+    assert publish_snapshot() is True
+    insert_vacancy(make_vacancy(2))
+
+    conn = create_read_connection()
+    try:
+        assert conn.execute("PRAGMA database_list").fetchone()[2] == os.path.abspath(get_snapshot_path())
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+        assert count(conn) == 1
+    finally:
+        conn.close()
+    # Новая запись видна читателям только со следующим снимком
+    assert get_total_vacancies_count() == 1
+    publish_snapshot()
+    assert get_total_vacancies_count() == 2
+
+
+def test_reader_keeps_old_snapshot_during_publish(snapshot_db):
+    insert_vacancy(make_vacancy(1))
+    publish_snapshot()
+    reader = create_read_connection()
+    try:
+        assert count(reader) == 1
+
+        insert_vacancy(make_vacancy(2))
+        assert publish_snapshot() is True
+
+        # Открытое соединение дочитывает прежний файл, новые соединения открывают новый
+        assert count(reader) == 1
+        assert reader.execute("SELECT title FROM vacancies").fetchone()[0] == "Python developer 1"
+        assert get_total_vacancies_count() == 2
+    finally:
+        reader.close()
+
+
+def test_concurrent_publishes_leave_no_temp_files(snapshot_db):
+    insert_vacancy(make_vacancy(1))
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(publish_snapshot())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [True] * 4
+    assert [name for name in os.listdir(snapshot_db) if name.endswith(".tmp")] == []
+    assert get_total_vacancies_count() == 1
+
+
+def test_archived_row_still_in_snapshot_counted_once(snapshot_db):
+    insert_vacancy(make_vacancy(1, published_at="2020-03-01T10:00:00+03:00"))
+    insert_vacancy(make_vacancy(2))
+    publish_snapshot()
+
+    # Архивация прошла, а новый снимок еще не опубликован
+    assert archive_old_vacancies(max_age_days=365) == 1
+
+    assert get_total_vacancies_count(include_archived=True) == 2
+    assert get_vacancy_by_id(1)['title'] == "Python developer 1"
@@ -0,0 +1,136 @@
+import pytest
+
+from core import source_runner
+from core.source_runner import CircuitBreaker, SourceRunner
+from parsers.registry import BaseSource, CrawlTask, DeadlineExceeded, DeadlineMixin
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class PagedSource(BaseSource):
+    """Источник без сети: PAGES страниц на задачу, fail - ошибка вместо страниц"""
+    name = "test.runner"
+    pages = 3
+
+    def __init__(self):
+        self.fail = False
+
+    def fetch_pages(self, parser, task, start_page=0):
+        for page in range(start_page, self.pages):
+            if self.fail:
+                raise ConnectionError("сеть недоступна")
+            parser.check_deadline()
+            yield [page]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(source_runner, "monotonic", clock)
+    monkeypatch.setattr("parsers.registry.monotonic", clock)
+    monkeypatch.setattr(source_runner, "_breakers", {})
+    return clock
+
+
+def run(runner, task=CrawlTask(PagedSource.name, "Python")):
+    """Читает все страницы задачи, возвращает (страницы, пройдена ли задача до конца)"""
+    pages = runner.fetch_pages(DeadlineMixin(), task)
+    collected = []
+    while True:
+        try:
+            collected.append(next(pages))
+        except StopIteration as stop:
+            return collected, stop.value
+
+
+def test_breaker_opens_probes_and_closes(clock):
+    breaker = CircuitBreaker("test", threshold=2, cooldown=60)
+
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock.now += 60
+    assert breaker.state == "half_open"
+    # Пробная задача одна: пока она идет, остальные пропускаются
+    assert breaker.allow()
+    assert not breaker.allow()
+    # Неудачная проба снова размыкает цепь на cooldown
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock.now += 60
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+    assert breaker.allow() and breaker.allow()
+
+
+def test_runner_skips_open_source_and_recovers(clock, monkeypatch):
+    monkeypatch.setattr("core.config.Config.CIRCUIT_BREAKER_THRESHOLD", 2)
+    monkeypatch.setattr("core.config.Config.CIRCUIT_BREAKER_COOLDOWN", 60)
+    source = PagedSource()
+    runner = SourceRunner(source)
+
+    source.fail = True
+    assert run(runner) == ([], False)
+    assert run(runner) == ([], False)
+    source.fail = False
+    # Цепь разомкнута: задача пропускается без запросов
+    assert run(runner) == ([], False)
+    assert (runner.completed, runner.failed, runner.skipped) == (0, 2, 1)
+
+    clock.now += 60
+    assert run(runner) == ([[0], [1], [2]], True)
+    assert runner.breaker.state == "closed"
+
+
+def test_closed_page_stream_releases_probe(clock, monkeypatch):
+    monkeypatch.setattr("core.config.Config.CIRCUIT_BREAKER_THRESHOLD", 1)
+    monkeypatch.setattr("core.config.Config.CIRCUIT_BREAKER_COOLDOWN", 60)
+    source = PagedSource()
+    runner = SourceRunner(source)
+    source.fail = True
+    run(runner)
+    source.fail = False
+    clock.now += 60
+
+    # Конвейер остановился посреди пробной задачи и закрыл поток страниц
+    pages = runner.fetch_pages(DeadlineMixin(), CrawlTask(source.name, "Python"))
+    assert next(pages) == [0]
+    pages.close()
+
+    assert runner.breaker.state == "half_open"
+    assert run(runner) == ([[0], [1], [2]], True)
+    assert runner.breaker.state == "closed"
+
+
+def test_deadline_skips_tasks_and_stops_requests(clock, monkeypatch):
+    monkeypatch.setattr("core.config.Config.SOURCE_DEADLINE", 30)
+    source = PagedSource()
+    runner = SourceRunner(source)
+    parser = DeadlineMixin()
+
+    pages = runner.fetch_pages(parser, CrawlTask(source.name, "Python"))
+    assert next(pages) == [0]
+    assert parser.deadline == clock.now + 30
+    assert parser.request_timeout() == 15
+    # Срок истекает посреди задачи: следующий запрос парсер уже не начинает
+    clock.now += 30
+    with pytest.raises(DeadlineExceeded):
+        parser.request_timeout()
+    with pytest.raises(StopIteration) as stop:
+        next(pages)
+    assert stop.value.value is False
+    assert runner.failed == 1
+
+    # Новые задачи после срока не начинаются вовсе
+    assert run(runner, CrawlTask(source.name, "Go")) == ([], False)
+    assert runner.skipped == 1
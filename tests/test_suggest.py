@@ -0,0 +1,114 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from core.database import archive_old_vacancies, bump_data_generation, insert_vacancy, remove_duplicates
+from core.suggest import PrefixIndex, SuggestService
+from tests.conftest import make_vacancy
+
+
+def values(result, kind):
+    return {item["value"]: item["count"] for item in result[kind]}
+
+
+def test_prefix_index_matches_any_word():
+    index = PrefixIndex()
+    index.add({"Senior Python developer": 3, "Python разработчик": 5, "Java developer": 1})
+
+    assert index.search("pyth") == [("Python разработчик", 5), ("Senior Python developer", 3)]
+    assert index.search("dev", limit=1) == [("Senior Python developer", 3)]
+    assert index.search("") == []
+
+
+def test_refresh_after_archive_and_update(db):
+    old = (datetime.now(timezone.utc) - timedelta(days=400)).isoformat()
+    insert_vacancy(make_vacancy(1, title="Kotlin developer", company="Озон", published_at=old))
+    insert_vacancy(make_vacancy(2, title="Python developer"))
+    insert_vacancy(make_vacancy(3, title="Python developer", location="Казань"))
+    bump_data_generation()
+    service = SuggestService()
+
+    assert values(service.suggest("ko"), "title") == {"Kotlin developer": 1}
+    assert values(service.suggest("py"), "title") == {"Python developer": 2}
+    assert values(service.suggest("каз"), "location") == {"Казань": 1}
+
+    # Старая вакансия уходит в архив, другая меняет название и город
+    assert archive_old_vacancies(max_age_days=365) == 1
+    insert_vacancy(make_vacancy(3, title="Go developer", location="Москва"))
+    bump_data_generation()
+
+    assert values(service.suggest("ko"), "title") == {}
+    assert values(service.suggest("оз"), "company") == {}
+    assert values(service.suggest("py"), "title") == {"Python developer": 1}
+    assert values(service.suggest("go"), "title") == {"Go developer": 1}
+    assert values(service.suggest("каз"), "location") == {}
+
+
+def test_index_kept_while_generation_unchanged(db):
+    insert_vacancy(make_vacancy(1, title="Python developer"))
+    service = SuggestService()
+    assert values(service.suggest("py"), "title") == {"Python developer": 1}
+
+    # Без смены поколения индекс не перестраивается
+    insert_vacancy(make_vacancy(2, title="Python developer"))
+    assert values(service.suggest("py"), "title") == {"Python developer": 1}
+    bump_data_generation()
+    assert values(service.suggest("py"), "title") == {"Python developer": 2}
+
+
+def rebuilt(kind, prefix):
+    service = SuggestService()
+    service.refresh()
+    return dict(service.indexes[kind].search(prefix, limit=100))
+
+
+def test_incremental_refresh_matches_rebuild(db, monkeypatch):
+    rng = random.Random(33)
+    titles = ["Python developer", "Go developer", "Data engineer", "DevOps engineer"]
+    cities = ["Москва", "Казань", "Новосибирск"]
+    for index in range(40):
+        insert_vacancy(make_vacancy(index, title=rng.choice(titles), location=rng.choice(cities)))
+    bump_data_generation()
+    service = SuggestService()
+    service.refresh()
+    loads = []
+    monkeypatch.setattr(service, "_load", lambda conn: loads.append(conn))
+
+    for _ in range(3):
+        # Новые вакансии, смена названия и города у части старых, перенос в архив
+        for index in rng.sample(range(60), 20):
+            insert_vacancy(make_vacancy(index, title=rng.choice(titles), location=rng.choice(cities)))
+        remove_duplicates()
+        bump_data_generation()
+        service.refresh()
+        for kind, prefix in (("title", "d"), ("title", "eng"), ("location", "к"), ("location", "мо")):
+            assert dict(service.indexes[kind].search(prefix, limit=100)) == rebuilt(kind, prefix)
+    old = (datetime.now(timezone.utc) - timedelta(days=400)).isoformat()
+    insert_vacancy(make_vacancy(100, title="Kotlin developer", published_at=old))
+    archive_old_vacancies(max_age_days=365)
+    bump_data_generation()
+    service.refresh()
+
+    assert loads == []
+    assert values(service.suggest("ko"), "title") == {}
+    assert dict(service.indexes["title"].search("d", limit=100)) == rebuilt("title", "d")
+
+
+def test_refresh_rebuilds_when_change_log_was_pruned(db, monkeypatch):
+    insert_vacancy(make_vacancy(1, title="Python developer"))
+    bump_data_generation()
+    service = SuggestService()
+    assert values(service.suggest("py"), "title") == {"Python developer": 1}
+
+    # Читатель отстал: изменения, которые он не видел, уже удалены из журнала
+    monkeypatch.setattr("core.config.Config.SUGGEST_CHANGE_LOG_GENERATIONS", 0)
+    insert_vacancy(make_vacancy(2, title="Python developer"))
+    bump_data_generation()
+    insert_vacancy(make_vacancy(3, title="Go developer"))
+    bump_data_generation()
+    loaded = []
+    load = service._load
+    monkeypatch.setattr(service, "_load", lambda conn: loaded.append(load(conn)))
+
+    assert values(service.suggest("py"), "title") == {"Python developer": 2}
+    assert values(service.suggest("go"), "title") == {"Go developer": 1}
+    assert loaded == [3]
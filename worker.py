@@ -0,0 +1,45 @@
+from core.scheduler import start_scheduler, stop_scheduler
+from core.database import rebuild_rollups
+from core.profiling import MODES, request_next_crawl
+import argparse
+import logging
+import signal
+import threading
+
+# Настройка логирования
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    filename='worker.log'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Воркер загрузки вакансий: планирует парсинг и пишет в БД отдельно от веб-приложения"""
+    parser = argparse.ArgumentParser(description="Воркер загрузки вакансий")
+    parser.add_argument("--rebuild-rollups", action="store_true",
+                        help="пересчитать дневные агрегаты по всем вакансиям и выйти")
+    parser.add_argument("--profile-next-crawl", choices=MODES, metavar="MODE",
+                        help=f"профилировать следующий обход работающего воркера ({', '.join(MODES)}) и выйти")
+    args = parser.parse_args()
+    if args.rebuild_rollups:
+        rebuild_rollups()
+        return
+    if args.profile_next_crawl:
+        print(f"Следующий обход будет профилирован: {request_next_crawl(args.profile_next_crawl)}")
+        return
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+
+    logger.info("Запуск воркера загрузки вакансий...")
+    start_scheduler()
+    stop_event.wait()
+    stop_scheduler()
+    logger.info("Воркер остановлен")
+
+
+if __name__ == "__main__":
+    main()